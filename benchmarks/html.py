@@ -0,0 +1,50 @@
+"""
+Benchmark of formatting lexed scripts as HTML with `DaedalusHtmlFormatter` against the stock `HtmlFormatter`.
+
+    python benchmarks/html.py Scripts/Content --repeat 5
+
+Without paths, the test scripts are formatted many times over. The tokens are lexed once up front,
+only the formatting is timed.
+"""
+import argparse
+import io
+import os
+import time
+
+from pygments.formatters import HtmlFormatter
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.batch import read_script
+from gothic_lexer.formatter import DaedalusHtmlFormatter
+from gothic_lexer.project import collect_scripts
+
+TESTS_DIR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="scripts, directories or .src files")
+    parser.add_argument("--repeat", type=int, default=5, help="how many times the scripts are formatted per formatter")
+    args = parser.parse_args()
+
+    if args.paths:
+        scripts = [read_script(path) for path in collect_scripts(args.paths)]
+    else:
+        scripts = [read_script(path, "utf8") * 50 for path in collect_scripts([TESTS_DIR_PATH])]
+    lexer = DaedalusLexer()
+    streams = [list(lexer.get_tokens(script)) for script in scripts]
+    print(f"{len(streams)} scripts, {sum(map(len, streams))} tokens")
+
+    for name, formatter in (("HtmlFormatter", HtmlFormatter()), ("DaedalusHtmlFormatter", DaedalusHtmlFormatter())):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for tokens in streams:
+                formatter.format(tokens, io.StringIO())
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        print(f"{name:>22}: {best:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
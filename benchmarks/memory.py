@@ -0,0 +1,95 @@
+"""
+Benchmark of the memory lexing a huge synthetic input takes, e.g. a generated LeGo bundle.
+
+    python benchmarks/memory.py --size 100 --crlf
+    python benchmarks/memory.py --size 20 --trace --interval 100000
+
+The input is made of the test scripts, or of the given scripts, concatenated up to ``--size`` megabytes,
+followed by unbalanced brackets, conditions and comments. Its tokens are consumed by `DaedalusLexer.get_tokens`
+without keeping them. The peak resident set size is measured, or with ``--trace`` the memory `tracemalloc` sees,
+sampled every ``--interval`` tokens, which is many times slower. The snapshot taken at the largest sample
+is compared to the first one to show where the memory went.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.batch import read_script
+from gothic_lexer.project import collect_scripts
+
+TESTS_DIR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+
+# unbalanced input every lexer state pushes on
+UNBALANCED: tuple[str, ...] = ("(", "func void f() { if x { ", "/* ")
+
+
+def synthetic_input(scripts: list[str], size: int, crlf: bool = False, unbalanced: int = 0) -> str:
+    """Return the ``scripts`` concatenated up to ``size`` characters, and ``unbalanced`` repeats of each opening."""
+    bundle = "\n".join(scripts) + "\n"
+    text = bundle * max(1, size // len(bundle))
+    if unbalanced:
+        text += "".join(opening * unbalanced + "\n" for opening in UNBALANCED)
+    return text.replace("\n", "\r\n") if crlf else text
+
+
+def _max_rss() -> int:
+    # kilobytes on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="scripts, directories or .src files")
+    parser.add_argument("--size", type=int, default=100, help="megabytes of input")
+    parser.add_argument("--crlf", action="store_true", help="use Windows line breaks")
+    parser.add_argument("--unbalanced", type=int, default=100_000, help="repeats of each unbalanced opening")
+    parser.add_argument("--trace", action="store_true", help="measure with tracemalloc")
+    parser.add_argument("--interval", type=int, default=100_000, help="tokens between the tracemalloc samples")
+    parser.add_argument("--compiled", action="store_true", help="use the generated lexer module")
+    args = parser.parse_args()
+
+    if args.paths:
+        scripts = [read_script(path) for path in collect_scripts(args.paths)]
+    else:
+        scripts = [read_script(path, "utf8") for path in collect_scripts([TESTS_DIR_PATH])]
+    text = synthetic_input(scripts, args.size << 20, args.crlf, args.unbalanced)
+    lexer = DaedalusLexer(compiled=args.compiled)
+    print(f"{len(text) / (1 << 20):.1f} MB of input")
+
+    rss = _max_rss()
+    if args.trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    peak_sample = 0
+    first = peak_snapshot = None
+    for _ in lexer.get_tokens(text):
+        count += 1
+        if args.trace and count % args.interval == 0:
+            current = tracemalloc.get_traced_memory()[0]
+            if first is None:
+                first = tracemalloc.take_snapshot()
+            elif current > peak_sample:
+                peak_sample = current
+                peak_snapshot = tracemalloc.take_snapshot()
+    seconds = time.perf_counter() - start
+    print(f"{count} tokens in {seconds:.1f}s, {len(text) / seconds / (1 << 20):.2f} MB/s")
+
+    if args.trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"traced peak {peak / (1 << 20):.1f} MB, {peak / len(text):.2f} times the input")
+        if first is not None and peak_snapshot is not None:
+            for stat in peak_snapshot.compare_to(first, "lineno")[:5]:
+                print(f"  {stat}")
+    else:
+        grown = max(_max_rss() - rss, 0)
+        print(f"peak RSS grew by {grown / (1 << 20):.1f} MB, {grown / len(text):.2f} times the input")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark of lexing scripts on a thread pool sharing one lexer, with 1, 2, 4, ... threads.
+
+    python benchmarks/threads.py Scripts/Content --max-threads 16
+
+Without paths, the test scripts are lexed many times over. The threads only lex in parallel on a free-threaded
+Python build (3.13t or newer, with the GIL disabled), on other builds the speedup stays around 1.
+"""
+import argparse
+import os
+import sys
+import time
+
+from gothic_lexer.batch import lex_files_threaded
+from gothic_lexer.project import collect_scripts
+
+TESTS_DIR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="scripts, directories or .src files")
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=50, help="how many times the scripts are lexed per run")
+    args = parser.parse_args()
+
+    paths = collect_scripts(args.paths or [TESTS_DIR_PATH]) * args.repeat
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, {len(paths)} files")
+
+    baseline = None
+    threads = 1
+    while threads <= args.max_threads:
+        start = time.perf_counter()
+        for _ in lex_files_threaded(paths, threads):
+            pass
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"{threads:3} threads: {seconds:8.3f}s, speedup {baseline / seconds:5.2f}")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
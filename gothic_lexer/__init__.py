@@ -2,6 +2,14 @@
 The `gothic_lexer` module contains a Pygments lexer for the
 Daedalus scripting language used in Piranha Bytes Gothic series.
 """
-from .daedalus import DaedalusLexer
 
-__all__ = ["DaedalusLexer"]
+__all__ = ["BudgetExceeded", "DaedalusLexer"]
+
+
+def __getattr__(name: str):
+    # imported on first use, the client of the pool doesn't need Pygments
+    if name in __all__:
+        from . import daedalus
+
+        return getattr(daedalus, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
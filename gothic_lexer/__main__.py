@@ -0,0 +1,274 @@
+"""
+Command line tools of the `gothic_lexer` package:
+
+    python -m gothic_lexer extract-strings Scripts/Content/Story --format csv --output strings.csv
+    python -m gothic_lexer watch Scripts/Content --cache .token-cache --index scripts.idx
+    python -m gothic_lexer metrics Scripts/Content --format prometheus --output metrics.prom
+    python -m gothic_lexer diff Old/B_Story.d New/B_Story.d --ignore-comments
+    python -m gothic_lexer stats Scripts/Content --jobs 8
+    python -m gothic_lexer golden tests --golden tests/golden --baseline baseline.json
+    python -m gothic_lexer fuzz --iterations 200 --output findings
+    python -m gothic_lexer pool --workers 4
+    python -m gothic_lexer highlight -l dae -f html -O full -o result_dae.html script.d
+"""
+import argparse
+import os
+import sys
+
+
+def _diff(args: argparse.Namespace) -> None:
+    from .batch import read_script
+    from .diff import diff_texts, format_hunks
+
+    old = read_script(args.old, args.encoding)
+    new = read_script(args.new, args.encoding)
+    hunks = diff_texts(old, new, ignore_comments=args.ignore_comments, ignore_case=args.ignore_case)
+    if hunks:
+        for line in format_hunks(hunks, old, new, args.old, args.new):
+            print(line)
+        # like diff, the exit status tells whether the scripts differ
+        sys.exit(1)
+
+
+def _extract_strings(args: argparse.Namespace) -> None:
+    from .extract import extract_files, write_csv, write_jsonl
+    from .project import collect_scripts
+
+    write = write_csv if args.format == "csv" else write_jsonl
+    entries = extract_files(collect_scripts(args.paths), args.jobs, args.encoding)
+    if args.output == "-":
+        write(entries, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf8", newline="") as file:
+            write(entries, file)
+
+
+def _fuzz(args: argparse.Namespace) -> None:
+    from .fuzz import fuzz
+
+    options = {"compiled": True} if args.compiled else None
+    threshold = None if args.no_timing else args.threshold
+    found = 0
+    for finding in fuzz(
+        args.iterations, args.seed, args.declarations, args.scale, args.growth, threshold, options, args.min_time
+    ):
+        found += 1
+        print(f"seed {finding.seed}: {finding.kind}: {finding.detail}", flush=True)
+        if args.output is not None:
+            os.makedirs(args.output, exist_ok=True)
+            with open(os.path.join(args.output, f"{finding.seed}-{finding.kind}.d"), "w", encoding="utf8") as file:
+                file.write(finding.text)
+    print(f"{args.iterations} scripts, {found} findings", file=sys.stderr)
+    if found:
+        sys.exit(1)
+
+
+def _golden(args: argparse.Namespace) -> None:
+    from .golden import check_fixtures, load_baseline, regressions, save_baseline
+    from .project import collect_scripts
+
+    options = {"compiled": True} if args.compiled else None
+    results = check_fixtures(
+        collect_scripts(args.paths), args.golden, args.jobs, options, args.update, args.min_time, args.encoding
+    )
+    failed = False
+    for result in results:
+        status = "written" if result.written else "differs" if result.diff else "ok"
+        print(f"{result.name:30} {result.tokens:8} tokens {result.tokens_per_second:12.0f} tokens/s  {status}")
+    for result in results:
+        if result.diff:
+            failed = True
+            print()
+            print("\n".join(result.diff))
+    if args.baseline is not None:
+        if args.record or not os.path.exists(args.baseline):
+            save_baseline(results, args.baseline)
+            print(f"recorded the baseline in {args.baseline}")
+        else:
+            slower = regressions(results, load_baseline(args.baseline), args.tolerance)
+            if slower:
+                failed = True
+                print()
+                print("\n".join(slower))
+    if failed:
+        sys.exit(1)
+
+
+def _highlight(args: argparse.Namespace) -> None:
+    from .pool import PoolError, highlight, parse_options
+
+    if args.infile is None:
+        source = sys.stdin.buffer.read()
+    else:
+        with open(args.infile, "rb") as file:
+            source = file.read()
+    try:
+        output = highlight(source, args.lexer, args.formatter, parse_options(args.O, args.P), args.socket)
+    except PoolError as error:
+        print("Error:", error, file=sys.stderr)
+        sys.exit(1)
+    if args.output is None:
+        sys.stdout.buffer.write(output)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as file:
+            file.write(output)
+
+
+def _metrics(args: argparse.Namespace) -> None:
+    import json
+
+    from .metrics import measure_files
+    from .project import collect_scripts
+
+    metrics = measure_files(collect_scripts(args.paths), args.jobs, args.encoding)
+    output = metrics.to_prometheus() if args.format == "prometheus" else json.dumps(metrics.to_json(), indent=2)
+    if args.output == "-":
+        sys.stdout.write(output)
+    else:
+        with open(args.output, "w", encoding="utf8") as file:
+            file.write(output)
+
+
+def _pool(args: argparse.Namespace) -> None:
+    from .pool import default_address, serve
+
+    address = args.socket or default_address()
+
+    def ready() -> None:
+        print(f"listening on {address} with {args.workers or os.cpu_count()} workers", file=sys.stderr, flush=True)
+
+    serve(address, args.workers, tuple(args.preload or ("html", "daedalus-html")), on_ready=ready)
+
+
+def _stats(args: argparse.Namespace) -> None:
+    import json
+
+    from .project import collect_scripts
+    from .stats import count_files
+
+    usage = count_files(collect_scripts(args.paths), args.jobs, args.encoding)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf8")
+    try:
+        if args.format == "json":
+            json.dump(usage.to_json(), output, indent=2)
+            output.write("\n")
+        else:
+            usage.write_text(output, args.top)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def _watch(args: argparse.Namespace) -> None:
+    from .watch import Watcher
+
+    watcher = Watcher(args.directory, args.cache, args.index, args.interval, args.settle, args.jobs, args.encoding)
+
+    def report(changed: set[str], removed: set[str]) -> None:
+        print(f"updated {len(changed)} files, removed {len(removed)} files", file=sys.stderr, flush=True)
+
+    try:
+        watcher.run(on_update=report)
+    except KeyboardInterrupt:
+        pass
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("paths", nargs="+", help="scripts, .src files or directories searched for .d files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: all CPUs)")
+    parser.add_argument("--encoding", default="cp1252", help="encoding of the scripts (default: cp1252)")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m gothic_lexer", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract-strings", help="extract the translatable strings of scripts")
+    _add_common_arguments(extract)
+    extract.add_argument("-f", "--format", choices=("csv", "jsonl"), default="csv", help="output format")
+    extract.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    extract.set_defaults(handler=_extract_strings)
+
+    watch = commands.add_parser("watch", help="keep the token caches and the index of a script tree up to date")
+    watch.add_argument("directory", help="directory searched for .d files")
+    watch.add_argument("--cache", help="directory of the token caches")
+    watch.add_argument("--index", help="path of the identifier index")
+    watch.add_argument("--interval", type=float, default=0.5, help="seconds between polls (default: 0.5)")
+    watch.add_argument("--settle", type=float, default=0.3, help="seconds without changes before updating")
+    watch.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: all CPUs)")
+    watch.add_argument("--encoding", default="cp1252", help="encoding of the scripts (default: cp1252)")
+    watch.set_defaults(handler=_watch)
+
+    metrics = commands.add_parser("metrics", help="measure the lexing of scripts")
+    _add_common_arguments(metrics)
+    metrics.add_argument("-f", "--format", choices=("prometheus", "json"), default="prometheus", help="output format")
+    metrics.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    metrics.set_defaults(handler=_metrics)
+
+    stats = commands.add_parser("stats", help="count the externals, library calls, declarations and errors of scripts")
+    _add_common_arguments(stats)
+    stats.add_argument("-f", "--format", choices=("text", "json"), default="text", help="output format")
+    stats.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    stats.add_argument("--top", type=int, default=20, help="most common names listed per counter in the text format")
+    stats.set_defaults(handler=_stats)
+
+    fuzz = commands.add_parser("fuzz", help="search for random scripts lexed wrongly or in super-linear time")
+    fuzz.add_argument("-n", "--iterations", type=int, default=100, help="number of scripts (default: 100)")
+    fuzz.add_argument("--seed", type=int, default=0, help="seed of the first script (default: 0)")
+    fuzz.add_argument("--declarations", type=int, default=8, help="top level declarations per script (default: 8)")
+    fuzz.add_argument("--scale", type=int, default=64, help="length of the runs of the smaller timed script")
+    fuzz.add_argument("--growth", type=int, default=16, help="how many times longer the runs of the larger one are")
+    fuzz.add_argument("--threshold", type=float, default=1.2, help="highest allowed power of the time growth")
+    fuzz.add_argument("--min-time", type=float, default=0.05, help="seconds each timed script is lexed")
+    fuzz.add_argument("--no-timing", action="store_true", help="only check the tokens")
+    fuzz.add_argument("--compiled", action="store_true", help="time the compiled lexer")
+    fuzz.add_argument("-o", "--output", help="directory the scripts of the findings are saved in")
+    fuzz.set_defaults(handler=_fuzz)
+
+    golden = commands.add_parser("golden", help="compare the tokens and the throughput of fixtures with golden files")
+    _add_common_arguments(golden)
+    golden.add_argument("--golden", required=True, help="directory of the golden files")
+    golden.add_argument("--update", action="store_true", help="rewrite the golden files that differ")
+    golden.add_argument("--compiled", action="store_true", help="use the compiled lexer")
+    golden.add_argument("--baseline", help="JSON file of the tokens per second, recorded if it doesn't exist")
+    golden.add_argument("--record", action="store_true", help="overwrite the baseline")
+    golden.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (default: 0.2, 20%%)")
+    golden.add_argument("--min-time", type=float, default=0.2, help="seconds each fixture is lexed (default: 0.2)")
+    golden.set_defaults(handler=_golden)
+
+    pool = commands.add_parser("pool", help="run warm worker processes serving the highlight command")
+    pool.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes (default: all CPUs)")
+    pool.add_argument("--socket", help="path of the Unix socket (default: $GOTHIC_LEXER_POOL or a per-user temp file)")
+    pool.add_argument(
+        "--preload",
+        action="append",
+        default=None,
+        help="formatter to import before forking, can be repeated (default: html and daedalus-html)",
+    )
+    pool.set_defaults(handler=_pool)
+
+    highlight = commands.add_parser("highlight", help="highlight a script on the pool, like pygmentize")
+    highlight.add_argument("infile", nargs="?", help="script to highlight (default: standard input)")
+    highlight.add_argument("-l", dest="lexer", default="dae", help="lexer name (default: dae)")
+    highlight.add_argument("-f", dest="formatter", default="html", help="formatter name (default: html)")
+    highlight.add_argument("-O", action="append", help="comma-separated options of the lexer and the formatter")
+    highlight.add_argument("-P", action="append", help="single option of the lexer and the formatter, key=value")
+    highlight.add_argument("-o", dest="output", help="output file (default: standard output)")
+    highlight.add_argument("--socket", help="path of the Unix socket of the pool")
+    highlight.set_defaults(handler=_highlight)
+
+    diff = commands.add_parser("diff", help="compare the tokens of two versions of a script")
+    diff.add_argument("old", help="old version of the script")
+    diff.add_argument("new", help="new version of the script")
+    diff.add_argument("--ignore-comments", action="store_true", help="don't compare the comments")
+    diff.add_argument("--ignore-case", action="store_true", help="don't compare the case of names and keywords")
+    diff.add_argument("--encoding", default="cp1252", help="encoding of the scripts (default: cp1252)")
+    diff.set_defaults(handler=_diff)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
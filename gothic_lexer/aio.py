@@ -0,0 +1,70 @@
+"""
+Tokenization for asyncio applications.
+Lexing a large script in a coroutine blocks the event loop, so either give control back to it regularly:
+
+    async for token, value in DaedalusLexer().aget_tokens(source, yield_every=500):
+        ...
+
+or lex the whole script in an executor:
+
+    tokens = await get_tokens_in_executor(DaedalusLexer(), source, executor)
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator
+
+from pygments.token import _TokenType
+
+from .batch import restore_tokens
+
+# the clock is only read every few tokens, it is slower than lexing a single token
+_CLOCK_EVERY: int = 32
+
+
+def _lex_pickled(lexer, text: str) -> list[tuple[str, str]]:
+    """Lex ``text`` with `get_tokens` of a lexer sent to a worker, see `gothic_lexer.batch.lex_text`."""
+    return [(str(token), value) for token, value in lexer.get_tokens(text)]
+
+
+async def aget_tokens(
+    lexer, text: str, yield_every: int = 1000, yield_interval: float | None = None
+) -> AsyncIterator[tuple[_TokenType, str]]:
+    """
+    Yield the ``(tokentype, value)`` pairs of `get_tokens`, giving control back to the event loop
+    every ``yield_every`` tokens and, if given, at least every ``yield_interval`` seconds.
+    """
+    if yield_every < 1:
+        raise ValueError("yield_every must be at least 1")
+
+    count = 0
+    deadline = time.perf_counter() + yield_interval if yield_interval is not None else None
+    for token in lexer.get_tokens(text):
+        yield token
+        count += 1
+        if count == yield_every:
+            count = 0
+            await asyncio.sleep(0)
+            if deadline is not None:
+                deadline = time.perf_counter() + yield_interval
+        elif deadline is not None and count % _CLOCK_EVERY == 0 and time.perf_counter() >= deadline:
+            await asyncio.sleep(0)
+            deadline = time.perf_counter() + yield_interval
+
+
+async def get_tokens_in_executor(
+    lexer, text: str, executor: Executor | None = None
+) -> list[tuple[_TokenType, str]]:
+    """
+    Lex the whole ``text`` in the ``executor``, the default executor of the loop if not given,
+    and return the list of ``(tokentype, value)`` pairs.
+    A `ProcessPoolExecutor` gets a pickled copy of the ``lexer``, with its filters, whose class has to be
+    importable by the workers. A ``cancel`` token can't be checked in another process, use ``max_seconds``.
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        if getattr(lexer, "cancel", None) is not None:
+            raise ValueError("a lexer with a cancel token can't lex in a process pool, use max_seconds instead")
+        tokens = await loop.run_in_executor(executor, _lex_pickled, lexer, text)
+        return restore_tokens(tokens)
+    return await loop.run_in_executor(executor, lambda: list(lexer.get_tokens(text)))
@@ -0,0 +1,94 @@
+"""
+Helpers for lexing scripts outside of the calling thread or process.
+
+Token types are sent between processes by name, because unpickled token types
+are copies, not the `pygments.token` singletons the formatters compare with ``is``.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator
+
+from pygments.token import _TokenType, string_to_tokentype
+
+from .daedalus import DaedalusLexer
+
+# the scripts of the original games are saved in the Windows code page
+ENCODING: str = "cp1252"
+
+_TOKEN_TYPES: dict[str, _TokenType] = {}
+
+
+def token_type(name: str) -> _TokenType:
+    """Return the token type singleton for its ``name``, e.g. ``"Token.Name.Builtin.Externals"``."""
+    try:
+        return _TOKEN_TYPES[name]
+    except KeyError:
+        return _TOKEN_TYPES.setdefault(name, string_to_tokentype(name))
+
+
+def lex_text(text: str, options: dict | None = None) -> list[tuple[str, str]]:
+    """Lex ``text`` with `get_tokens` and return the ``(tokentype name, value)`` pairs, safe to pickle."""
+    return [(str(token), value) for token, value in DaedalusLexer(**(options or {})).get_tokens(text)]
+
+
+def restore_tokens(tokens: list[tuple[str, str]]) -> list[tuple[_TokenType, str]]:
+    """Turn the pairs returned by `lex_text` back into ``(tokentype, value)`` pairs."""
+    return [(token_type(name), value) for name, value in tokens]
+
+
+def read_script(path: str, encoding: str = ENCODING) -> str:
+    """Read a script, replacing the bytes that aren't valid in the ``encoding``."""
+    with open(path, encoding=encoding, errors="replace") as file:
+        return file.read()
+
+
+def _lex_file(path: str, options: dict | None, encoding: str) -> list[tuple[str, str]]:
+    return lex_text(read_script(path, encoding), options)
+
+
+def map_files(function: Callable, paths: Iterable[str], jobs: int | None = None, *args) -> Iterator[tuple[str, Any]]:
+    """
+    Call ``function(path, *args)`` for every path on a pool of ``jobs`` processes, all CPUs by default,
+    and yield the ``(path, result)`` pairs in the order of the ``paths``.
+    With a single job the function is called in the calling process.
+    The ``function`` has to be importable by the workers and its results picklable.
+    """
+    paths = list(paths)
+    jobs = min(jobs or os.cpu_count() or 1, len(paths) or 1)
+    if jobs == 1:
+        for path in paths:
+            yield path, function(path, *args)
+        return
+
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(jobs) as executor:
+        yield from zip(paths, executor.map(function, paths, *([arg] * len(paths) for arg in args), chunksize=chunksize))
+
+
+def lex_files(
+    paths: Iterable[str], jobs: int | None = None, options: dict | None = None, encoding: str = ENCODING
+) -> Iterator[tuple[str, list[tuple[_TokenType, str]]]]:
+    """
+    Lex the scripts on a pool of ``jobs`` processes, all CPUs by default,
+    and yield the ``(path, tokens)`` pairs in the order of the ``paths``.
+    """
+    for path, tokens in map_files(_lex_file, paths, jobs, options, encoding):
+        yield path, restore_tokens(tokens)
+
+
+def lex_files_threaded(
+    paths: Iterable[str], threads: int | None = None, options: dict | None = None, encoding: str = ENCODING
+) -> Iterator[tuple[str, list[tuple[_TokenType, str]]]]:
+    """
+    Lex the scripts on a pool of ``threads`` threads sharing one lexer, as many as CPUs by default,
+    and yield the ``(path, tokens)`` pairs in the order of the ``paths``.
+    Nothing is pickled, but the threads only lex in parallel on a free-threaded Python build.
+    """
+    lexer = DaedalusLexer(**(options or {}))
+
+    def lex(path: str) -> list[tuple[_TokenType, str]]:
+        return list(lexer.get_tokens(read_script(path, encoding)))
+
+    paths = list(paths)
+    with ThreadPoolExecutor(min(threads or os.cpu_count() or 1, len(paths) or 1)) as executor:
+        yield from zip(paths, executor.map(lex, paths))
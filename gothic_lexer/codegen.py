@@ -0,0 +1,256 @@
+"""
+Generation of a specialized pure-Python module from the tokens table of `DaedalusLexer`.
+
+    lexer = DaedalusLexer(compiled=True)
+    python -m gothic_lexer.codegen > daedalus_generated.py
+
+The generated ``lex(text, stack, listener, pos, profile_get, library, bulk_comments, max_depth)`` generator
+does what `DaedalusLexer._lex` and the builtin name resolution of `DaedalusLexer.get_tokens_unprocessed` do,
+without interpreting the table: the rules of each state are joined into one alternation, which the regex engine
+tries in order like `RegexLexer` tries the rules one by one, the rule that matched is read from ``lastindex``,
+and the token types, `bygroups` groups and state transitions of every rule are written out as code.
+
+The module is cached in ``$GOTHIC_LEXER_CACHE`` or ``~/.cache/gothic_lexer``, under a name derived from the table,
+so it is regenerated whenever the table changes. Without a writable cache it is compiled in memory.
+"""
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+from types import ModuleType
+
+from pygments.token import Name, _TokenType
+
+from .daedalus import DaedalusLexer, EveryGroupMatch
+
+# bump when the generated code changes for the same table
+GENERATOR_VERSION: int = 5
+
+_LOADED: dict[type, ModuleType] = {}
+_LOCK = threading.Lock()
+
+
+def _group_types(lexer_class: type, action: object, groups: int) -> tuple[_TokenType | None, ...]:
+    """
+    Return the token type of every group a callback of a rule emits, ``None`` for the groups it skips,
+    read by calling it on a match in which every group matched like `gothic_lexer.formatter.lexer_token_types` does.
+    Only callbacks emitting each group's text as one token of a token type, like `bygroups` of token types, are
+    supported.
+    """
+    types: list[_TokenType | None] = [None] * groups
+    try:
+        tokens = list(action(lexer_class, EveryGroupMatch()))
+    except Exception as error:
+        raise ValueError(f"only token types and bygroups of token types are supported: {action!r}") from error
+    for start, ttype, value in tokens:
+        if not isinstance(ttype, _TokenType) or not 0 < start <= groups or types[start - 1] is not None or value != " ":
+            raise ValueError(f"only token types and bygroups of token types are supported: {action!r}")
+        types[start - 1] = ttype
+    return tuple(types)
+
+
+def _rules(lexer_class: type) -> dict[str, list[tuple[str, int, object, object]]]:
+    """Return the ``(pattern, groups, action, new state)`` rules of every state of the processed table."""
+    if "_tokens" not in lexer_class.__dict__:
+        lexer_class()
+    rules = {}
+    for state, state_rules in lexer_class._tokens.items():
+        rules[state] = []
+        for rexmatch, action, new_state in state_rules:
+            pattern = rexmatch.__self__
+            if pattern.groupindex:
+                raise ValueError(f"named groups aren't supported: {pattern.pattern!r}")
+            if action is not None and not isinstance(action, _TokenType):
+                action = _group_types(lexer_class, action, pattern.groups)
+            if isinstance(new_state, tuple) and any(pushed.startswith("#") for pushed in new_state):
+                raise ValueError(f"only state names can be pushed together: {new_state!r}")
+            rules[state].append((pattern.pattern, pattern.groups, action, new_state))
+    return rules
+
+
+def fingerprint(lexer_class: type = DaedalusLexer) -> str:
+    """Return a digest of the tokens table and the generator version, the generated module depends on nothing else."""
+    flags = getattr(lexer_class, "flags", 0)
+    digest = hashlib.sha1(repr((GENERATOR_VERSION, flags, sorted(_rules(lexer_class).items()))).encode())
+    return digest.hexdigest()[:16]
+
+
+def generate(lexer_class: type = DaedalusLexer) -> str:
+    """Return the source of the specialized module of the lexer class."""
+    rules = _rules(lexer_class)
+    flags = lexer_class.flags
+    states = list(rules)
+    state_ids = {state: number for number, state in enumerate(states)}
+    types: dict[_TokenType, str] = {}
+
+    def token(ttype: _TokenType) -> str:
+        return types.setdefault(ttype, f"_T{len(types)}")
+
+    def emit(start: str, ttype: _TokenType) -> str:
+        # names are resolved to the builtins of the profile, library calls only of a known library
+        if ttype is Name:
+            return f"yield {start}, profile_get(data.upper(), {token(Name)}), data"
+        if ttype is Name.Builtin.Other:
+            resolved = f"profile_get(data.upper(), {token(Name)})"
+            return f"yield {start}, {token(ttype)} if library(data) is not None else {resolved}, data"
+        return f"yield {start}, {token(ttype)}, data"
+
+    body = []
+    for state in states:
+        body.append(f"        {'if' if state_ids[state] == 0 else 'elif'} sid == {state_ids[state]}:  # {state}")
+        body.append(f"            m = _S{state_ids[state]}(text, pos)")
+        body.append("            if m is not None:")
+        body.append("                i = m.lastindex")
+        group = 1
+        for number, (_, groups, action, new_state) in enumerate(rules[state]):
+            body.append(f"                {'if' if number == 0 else 'elif'} i == {group}:")
+            lines = []
+            if new_state == ("comment-block",) and isinstance(action, _TokenType):
+                # the bulk_comments option, see DaedalusLexer._lex
+                lines.append("if bulk_comments:")
+                lines.append("    start = m.end()")
+                lines.append("    end = _comment_end(text, start)")
+                lines.append(f"    yield pos, {token(action)}, text[pos:end]")
+                lines.append("    if listener is not None:")
+                lines.append("        enter('comment-block', pos, start)")
+                lines.append("        if text.endswith('*/', start, end):")
+                lines.append("            leave('comment-block', end - 2, end)")
+                lines.append("    pos = end")
+                lines.append("    continue")
+            if isinstance(action, _TokenType):
+                lines.append("data = m.group()")
+                lines.append(emit("pos", action))
+            elif action is not None:
+                for offset, argument in enumerate(action, group + 1):
+                    if argument is not None:
+                        lines.append(f"data = m.group({offset})")
+                        lines.append("if data:")
+                        lines.append("    " + emit(f"m.start({offset})", argument))
+            lines.append("start = pos")
+            lines.append("pos = m.end()")
+            if isinstance(new_state, tuple):
+                for pushed in new_state:
+                    lines.append("if len(statestack) < max_depth:")
+                    lines.append(f"    statestack.append({pushed!r})")
+                    lines.append("    if listener is not None:")
+                    lines.append(f"        enter({pushed!r}, start, pos)")
+                    if len(new_state) == 1:
+                        lines.append(f"    sid = {state_ids[pushed]}")
+                if len(new_state) > 1:
+                    lines.append("sid = _IDS[statestack[-1]]")
+            elif isinstance(new_state, int):
+                lines.append(f"depth = len(statestack) - min({-new_state}, len(statestack) - 1)")
+                lines.append("if listener is not None:")
+                lines.append("    for state in reversed(statestack[depth:]):")
+                lines.append("        leave(state, start, pos)")
+                lines.append("del statestack[depth:]")
+                lines.append("sid = _IDS[statestack[-1]]")
+            elif new_state == "#push":
+                lines.append("if len(statestack) < max_depth:")
+                lines.append("    statestack.append(statestack[-1])")
+                lines.append("    if listener is not None:")
+                lines.append("        enter(statestack[-1], start, pos)")
+            lines.append("continue")
+            body.extend("                    " + line for line in lines)
+            group += groups + 1
+
+    patterns = []
+    for state in states:
+        alternation = "|".join(f"({pattern})" for pattern, _, _, _ in rules[state])
+        patterns.append(f"_S{state_ids[state]} = re.compile({alternation!r}, {flags!r}).match  # {state}")
+
+    return "\n".join(
+        [
+            f'"""Generated by gothic_lexer.codegen from {lexer_class.__module__}.{lexer_class.__qualname__}, '
+            f'table {fingerprint(lexer_class)}, do not edit."""',
+            "import re",
+            "import sys",
+            "",
+            "from pygments.token import Token",
+            "",
+            "from gothic_lexer.comments import comment_end as _comment_end",
+            "",
+            *(f"{name} = {ttype!r}" for ttype, name in types.items()),
+            "_Whitespace = Token.Text.Whitespace",
+            "_Error = Token.Error",
+            "",
+            *patterns,
+            "",
+            f"_IDS = {state_ids!r}",
+            "",
+            "",
+            "def lex(",
+            "    text,",
+            "    stack,",
+            "    listener,",
+            "    pos=0,",
+            "    profile_get={}.get,",
+            "    library={}.get,",
+            "    bulk_comments=False,",
+            "    max_depth=sys.maxsize,",
+            "):",
+            "    statestack = list(stack)",
+            "    sid = _IDS[statestack[-1]]",
+            "    if listener is not None:",
+            "        enter = listener.enter",
+            "        leave = listener.leave",
+            "    while True:",
+            *body,
+            "        # no rule matched, at EOL reset the state to \"root\", otherwise mark the character",
+            "        if pos >= len(text):",
+            "            break",
+            '        if text[pos] == "\\n":',
+            "            if listener is not None:",
+            "                for state in reversed(statestack[1:]):",
+            "                    leave(state, pos, pos)",
+            '            statestack = ["root"]',
+            f"            sid = {state_ids['root']}",
+            '            yield pos, _Whitespace, "\\n"',
+            "        else:",
+            "            yield pos, _Error, text[pos]",
+            "        pos += 1",
+            "",
+        ]
+    )
+
+
+def _cache_dir() -> str:
+    cache = os.environ.get("GOTHIC_LEXER_CACHE")
+    if cache:
+        return cache
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gothic_lexer")
+
+
+def load(lexer_class: type = DaedalusLexer) -> ModuleType:
+    """Return the specialized module of the lexer class, generated on first use and cached on disk."""
+    module = _LOADED.get(lexer_class)
+    if module is not None:
+        return module
+    with _LOCK:
+        module = _LOADED.get(lexer_class)
+        if module is not None:
+            return module
+
+        name = f"_gothic_lexer_{lexer_class.__name__.lower()}_{fingerprint(lexer_class)}"
+        path = os.path.join(_cache_dir(), name + ".py")
+        try:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temporary = f"{path}.{os.getpid()}.tmp"
+                with open(temporary, "w", encoding="utf8") as file:
+                    file.write(generate(lexer_class))
+                os.replace(temporary, path)
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except OSError:
+            module = ModuleType(name)
+            exec(compile(generate(lexer_class), f"<{name}>", "exec"), module.__dict__)
+        _LOADED[lexer_class] = module
+        return module
+
+
+if __name__ == "__main__":
+    sys.stdout.write(generate())
@@ -0,0 +1,83 @@
+"""
+Scanning of `/* */` comments with `str.find` instead of the `comment-block` state of the lexer.
+
+    lexer = DaedalusLexer(bulk_comments=True)  # one Comment.Multiline token per comment
+    for start, end in comment_spans(source):
+        ...
+
+Comments nest like in the lexer: every ``/*`` inside a comment needs its own ``*/``, and an unterminated
+comment runs to the end of the text. The functions accept `str`, `bytes` or any buffer with a ``find`` method,
+e.g. the memory mapping of a `gothic_lexer.vdf.Volume`, so the spans of a script can be found without decoding it.
+"""
+from typing import Iterator
+
+_STR_NEEDLES = ("/*", "*/", "//", '"', "\n")
+_BYTES_NEEDLES = tuple(needle.encode() for needle in _STR_NEEDLES)
+
+
+def _needles(text) -> tuple:
+    return _STR_NEEDLES if isinstance(text, str) else _BYTES_NEEDLES
+
+
+def comment_end(text, pos: int, depth: int = 1) -> int:
+    """
+    Return the offset after the ``*/`` closing the comment that ``pos`` is ``depth`` levels deep in,
+    or the length of the text when the comment isn't terminated. ``pos`` usually follows an opening ``/*``.
+    """
+    opening, closing = _needles(text)[:2]
+    while depth:
+        close = text.find(closing, pos)
+        if close < 0:
+            return len(text)
+        # an opening starting before the closing wins, also when they overlap as in "/*/"
+        open_ = text.find(opening, pos, close + 1)
+        if open_ < 0:
+            depth -= 1
+            pos = close + 2
+        else:
+            depth += 1
+            pos = open_ + 2
+    return pos
+
+
+def comment_spans(text, start: int = 0, end: int | None = None) -> Iterator[tuple[int, int]]:
+    """
+    Yield the ``(start, end)`` offsets of the outermost `/* */` comments between ``start`` and ``end``,
+    skipping strings and `//` comments, without slicing the text.
+    An unterminated comment ends at the end of the text.
+
+    Unlike the lexer, the pre-scan doesn't know the states in which ``/*`` is an error,
+    e.g. between the parameter type and name of a function.
+    """
+    opening, _, line_comment, quote, newline = _needles(text)
+    if end is None:
+        end = len(text)
+    pos = start
+    # the next occurrence of each needle, searched again only once the scan has passed it
+    next_opening = next_line_comment = next_quote = -1
+    while pos < end:
+        if next_opening < pos:
+            next_opening = text.find(opening, pos, end)
+            if next_opening < 0:
+                return
+        if next_line_comment < pos:
+            next_line_comment = text.find(line_comment, pos, end)
+            if next_line_comment < 0:
+                next_line_comment = end
+        if next_quote < pos:
+            next_quote = text.find(quote, pos, end)
+            if next_quote < 0:
+                next_quote = end
+
+        if next_opening < next_line_comment and next_opening < next_quote:
+            pos = comment_end(text, next_opening + 2)
+            yield next_opening, pos
+        elif next_line_comment < next_quote:
+            pos = text.find(newline, next_line_comment, end)
+            if pos < 0:
+                return
+        else:
+            # strings don't span lines, an unterminated quote is a single character
+            close = text.find(quote, next_quote + 1, end)
+            line_end = text.find(newline, next_quote + 1, end)
+            pos = close + 1 if close >= 0 and (line_end < 0 or close < line_end) else next_quote + 1
@@ -4,20 +4,140 @@ Run:
 pygmentize -l daedalus.py:DaedalusLexer -x -f html -o result_dae.html -O full,debug_token_types <INPUT_FILE>
 """
 import re
+import sys
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping
 
-from pygments.lexer import RegexLexer, bygroups, include, words
-from pygments.token import Comment, Keyword, Name, Number, Operator, Punctuation, String, Text
+from pygments.lexer import RegexLexer, RegexLexerMeta, bygroups, include, words
+from pygments.token import (
+    Comment,
+    Error,
+    Keyword,
+    Name,
+    Number,
+    Operator,
+    Punctuation,
+    String,
+    Text,
+    _TokenType,
+)
+from pygments.util import OptionError, get_bool_opt, get_choice_opt, get_int_opt, get_list_opt
+
+from .comments import comment_end
+from .libraries import LibraryTable
 
 Declaration = Keyword.Declaration
+# the custom token types are created on import, creating them lazily from several threads could create duplicates
+Externals = Name.Builtin.Externals
 Integer = Number.Integer
 Member = Name.Variable.Instance
 Namespace = Name.Namespace
 Reserved = Keyword.Reserved
 Whitespace = Text.Whitespace
+ZParserExtender = Name.Builtin.ZParserExtender
+
+_COMPILE_LOCK = threading.Lock()
+
+# the clock and the cancellation token are checked every this many tokens
+_BUDGET_CHECK_EVERY: int = 32
+
+# the default of the max_depth option, real scripts don't nest more than a few dozen levels
+_MAX_DEPTH: int = 1024
+
+# the transition of the rule opening a `/* */` comment, skipped by the ``bulk_comments`` option
+_COMMENT_BLOCK: tuple[str] = ("comment-block",)
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised by a lexer with the ``budget_action="raise"`` option when the ``reason``, ``"tokens"``, ``"seconds"``
+    or ``"cancelled"``, stopped it before the offset ``position``.
+    """
+
+    def __init__(self, reason: str, position: int) -> None:
+        super().__init__(f"lexing stopped at offset {position}: {reason}")
+        self.reason = reason
+        self.position = position
+
+
+class EveryGroupMatch:
+    """
+    A stand-in match of a rule in which every group matched a space, to collect what a callback of the rule,
+    e.g. of `bygroups`, emits for each group. A group starts at its index.
+    """
 
+    def group(self, index: int = 0) -> str:
+        return " "
 
-class DaedalusLexer(RegexLexer):
-    """Pygments lexer for the Daedalus scripting language used in Piranha Bytes Gothic series."""
+    def start(self, index: int = 0) -> int:
+        return index
+
+    def end(self, index: int = 0) -> int:
+        return index + 1
+
+
+class _DaedalusLexerMeta(RegexLexerMeta):
+    """
+    `RegexLexerMeta` compiling the token definitions under a lock, so that instantiating the first lexers
+    from several threads at once doesn't compile them concurrently into the shared class attributes.
+    """
+
+    def __call__(cls, *args, **kwds):
+        if "_tokens" not in cls.__dict__:
+            with _COMPILE_LOCK:
+                if "_tokens" not in cls.__dict__:
+                    cls._all_tokens = {}
+                    cls._tmpname = 0
+                    cls._tokens = cls.process_tokendef("", cls.get_tokendefs())
+        return super().__call__(*args, **kwds)
+
+
+class DaedalusLexer(RegexLexer, metaclass=_DaedalusLexerMeta):
+    """
+    Pygments lexer for the Daedalus scripting language used in Piranha Bytes Gothic series.
+
+    Additional options accepted:
+
+    `game`
+        The game whose engine externals are highlighted: ``g1``, ``g2`` or ``all`` (default).
+        ``g2a`` (Night of the Raven) is an alias of ``g2``, the addon has the same externals.
+    `zparserextender`
+        Highlight the zParserExtender externals (default: ``True``).
+    `ikarus`
+        Highlight calls of the Ikarus ``MEM`` and ``CALL`` functions (default: ``True``).
+    `lego`
+        Highlight calls of the ``LeGo`` functions (default: ``True``).
+    `libraries`
+        More library functions to highlight the calls of: a `gothic_lexer.libraries.LibraryTable`, or the paths
+        of symbol lists and ``.d`` scripts declaring the functions, separated by spaces.
+    `max_tokens`
+        Stop lexing after this many tokens (default: ``0``, no limit).
+    `max_seconds`
+        Stop lexing after this many seconds of a `get_tokens` call (default: ``0``, no limit).
+    `cancel`
+        A cancellation token, an object whose ``is_set()`` returns true to stop lexing, e.g. a `threading.Event`.
+    `budget_action`
+        What happens when lexing stops: ``text`` (default) or ``error`` to emit the rest of the input as a single
+        ``Text`` or ``Error`` token, or ``raise`` to raise `BudgetExceeded`.
+        The time and the cancellation token are checked every few tokens, a single match isn't interrupted.
+    `compiled`
+        Lex with the module generated from the tokens table by `gothic_lexer.codegen` (default: ``False``).
+    `bulk_comments`
+        Find the end of a `/* */` comment with `str.find` and emit the whole comment, nested ones included,
+        as a single ``Comment.Multiline`` token, instead of lexing it in the ``comment-block`` state
+        (default: ``False``). A listener is only told about the outermost comment, so the per-line states
+        of `gothic_lexer.partial.LineStates` don't see the lines inside comments.
+    `max_depth`
+        The most states the state stack holds (default: ``1024``, ``0`` for no limit). Deeper blocks, brackets
+        and comments stay in the state of the last level that fits, so that unbalanced input like a long run
+        of ``(`` can't grow the stack with the input.
+
+    An instance can be used by several threads at once, also on free-threaded Python builds: the options are
+    only read after construction and the lexing state is local to each call. Filters added with `add_filter`
+    have to be stateless too, and must not be added while the instance is in use.
+    """
 
     name: str = "Daedalus"
     aliases: list[str] = ["pbd", "dae"]
@@ -170,23 +290,249 @@ class DaedalusLexer(RegexLexer):
         ],
     }
 
-    def get_tokens_unprocessed(self, text, stack=("root",)):
-        for index, token, value in RegexLexer.get_tokens_unprocessed(self, text, stack):
-            if token is Name.Builtin.Other and not value.startswith(self._OTHER):
+    def __init__(self, **options):
+        super().__init__(**options)
+        game = get_choice_opt(options, "game", [*self._GAMES, *self._GAME_ALIASES], "all")
+        self.game = self._GAME_ALIASES.get(game, game)
+        self.zparserextender = get_bool_opt(options, "zparserextender", True)
+        self.ikarus = get_bool_opt(options, "ikarus", True)
+        self.lego = get_bool_opt(options, "lego", True)
+        self.max_tokens = get_int_opt(options, "max_tokens", 0)
+        try:
+            self.max_seconds = float(options.get("max_seconds") or 0)
+        except (TypeError, ValueError):
+            raise OptionError(f"Invalid type {options.get('max_seconds')!r} for option max_seconds; use a number")
+        self.cancel = options.get("cancel")
+        self.budget_action = get_choice_opt(options, "budget_action", ["text", "error", "raise"], "text")
+        self.compiled = get_bool_opt(options, "compiled", False)
+        self.bulk_comments = get_bool_opt(options, "bulk_comments", False)
+        self.max_depth = get_int_opt(options, "max_depth", _MAX_DEPTH)
+        self._compiled_lex = None
+        if self.compiled:
+            from .codegen import load
+
+            self._compiled_lex = load(type(self)).lex
+
+        self._profile = self._get_profile(self.game, self.zparserextender)
+        self._libraries = LibraryTable.default(
+            library for library, enabled in (("ikarus", self.ikarus), ("lego", self.lego)) if enabled
+        )
+        libraries = options.get("libraries")
+        if isinstance(libraries, LibraryTable):
+            self._libraries.update(libraries)
+        else:
+            for path in get_list_opt(options, "libraries", []):
+                self._libraries.load(path)
+
+    def __getstate__(self):
+        # the generated module and the frozen profile are looked up again by the unpickling process
+        state = self.__dict__.copy()
+        state["_compiled_lex"] = None
+        state["_profile"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.compiled:
+            from .codegen import load
+
+            self._compiled_lex = load(type(self)).lex
+        self._profile = self._get_profile(self.game, self.zparserextender)
+
+    @classmethod
+    def _get_profile(cls, game: str, zparserextender: bool) -> Mapping[str, _TokenType]:
+        """
+        Return the frozen lookup table from upper case names to the builtin token types of a profile.
+        The tables are built on first use and shared by all lexer instances.
+        """
+        key = (game, zparserextender)
+        profile = cls._PROFILES.get(key)
+        if profile is None:
+            table = dict.fromkeys(cls._ZPARSEREXTENDER, ZParserExtender) if zparserextender else {}
+            table.update(dict.fromkeys(cls._EXTERNALS - cls._GAMES[game], Externals))
+            profile = cls._PROFILES.setdefault(key, MappingProxyType(table))
+        return profile
+
+    def _preprocess_lexer_input(self, text):
+        """
+        `Lexer._preprocess_lexer_input` stripping the newlines around a `str` and ensuring the final one with
+        a single slice, instead of copying the text once to strip the final newline and again to add it back,
+        which held the text three times at once.
+        """
+        if not isinstance(text, str) or self.stripall or not self.stripnl or self.tabsize > 0:
+            return super()._preprocess_lexer_input(text)
+        if text.startswith("\ufeff"):
+            text = text[1:]
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        start = 0
+        end = len(text)
+        while start < end and text[start] == "\n":
+            start += 1
+        while end > start and text[end - 1] == "\n":
+            end -= 1
+        if not self.ensurenl:
+            return text[start:end]
+        if start == end:
+            return "\n"
+        if end < len(text):
+            # slicing the whole text returns it without a copy
+            return text[start:end + 1]
+        return text[start:] + "\n"
+
+    def get_tokens_unprocessed(self, text, stack=("root",), listener=None, start=0):
+        """
+        Split ``text`` into ``(index, tokentype, value)`` triples.
+        If a ``listener`` is given, its ``enter(state, start, end)`` and ``leave(state, start, end)``
+        methods are called on every state transition, see `gothic_lexer.structure`.
+        Lexing begins at the offset ``start`` in the states of the ``stack``, see `gothic_lexer.partial`.
+        """
+        if self._compiled_lex is not None:
+            # the generated module resolves the builtin names itself
+            tokens = self._compiled_lex(
+                text,
+                stack,
+                listener,
+                start,
+                self._profile.get,
+                self._libraries.get,
+                self.bulk_comments,
+                self.max_depth or sys.maxsize,
+            )
+        else:
+            tokens = self._resolve(self._lex(text, stack, listener, start))
+        if self.max_tokens or self.max_seconds or self.cancel is not None:
+            tokens = self._limit(tokens, text)
+        return tokens
+
+    def _resolve(self, tokens):
+        """Turn the names of the enabled builtins and library calls into their token types."""
+        profile = self._profile
+        library = self._libraries.get
+        for index, token, value in tokens:
+            if token is Name.Builtin.Other and library(value) is None:
                 token = Name
 
-            if token is Name and value.upper() in self._EXTERNALS:
-                yield index, Name.Builtin.Externals, value
-            elif token is Name and value.upper() in self._ZPARSEREXTENDER:
-                yield index, Name.Builtin.ZParserExtender, value
+            if token is Name:
+                token = profile.get(value.upper(), Name)
+            yield index, token, value
+
+    def _limit(self, tokens, text):
+        """Pass the ``tokens`` through until the token, time or cancellation budget runs out."""
+        # a count never reached when there is no token limit
+        max_tokens = self.max_tokens or -1
+        deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        cancel = self.cancel
+        count = 0
+        for index, token, value in tokens:
+            if count == max_tokens:
+                reason = "tokens"
+            elif count % _BUDGET_CHECK_EVERY:
+                reason = None
+            elif deadline is not None and time.monotonic() > deadline:
+                reason = "seconds"
+            elif cancel is not None and cancel.is_set():
+                reason = "cancelled"
             else:
+                reason = None
+
+            if reason is None:
+                count += 1
                 yield index, token, value
+                continue
+            tokens.close()
+            if self.budget_action == "raise":
+                raise BudgetExceeded(reason, index)
+            yield index, Error if self.budget_action == "error" else Text, text[index:]
+            return
 
-    _OTHER: tuple[str] = (
-        "LeGo",
-        "MEM",
-        "CALL",
-    )
+    def aget_tokens(self, text, yield_every=1000, yield_interval=None):
+        """Asynchronous `get_tokens`, see `gothic_lexer.aio.aget_tokens`."""
+        from .aio import aget_tokens
+
+        return aget_tokens(self, text, yield_every, yield_interval)
+
+    def _lex(self, text, stack, listener, pos=0):
+        """
+        The `RegexLexer` state machine, extended to report state transitions to the ``listener``
+        and to begin at the offset ``pos``.
+        ``start`` and ``end`` are the bounds of the match that caused the transition.
+        A listener with a ``match(start, end)`` method also gets the bounds of every match, after its transitions,
+        see `gothic_lexer.partial.LineStates`.
+        """
+        tokendefs = self._tokens
+        bulk_comments = self.bulk_comments
+        max_depth = self.max_depth or sys.maxsize
+        statestack = list(stack)
+        statetokens = tokendefs[statestack[-1]]
+        matched = None
+        if listener is not None:
+            enter = listener.enter
+            leave = listener.leave
+            matched = getattr(listener, "match", None)
+        while True:
+            for rexmatch, action, new_state in statetokens:
+                m = rexmatch(text, pos)
+                if m:
+                    if bulk_comments and new_state == _COMMENT_BLOCK and type(action) is _TokenType:
+                        start = m.end()
+                        end = comment_end(text, start)
+                        yield pos, action, text[pos:end]
+                        if listener is not None:
+                            enter("comment-block", pos, start)
+                            # an unterminated comment stays open, like in the comment-block state
+                            if text.endswith("*/", start, end):
+                                leave("comment-block", end - 2, end)
+                            if matched is not None:
+                                matched(pos, end)
+                        pos = end
+                        break
+                    if action is not None:
+                        if type(action) is _TokenType:
+                            yield pos, action, m.group()
+                        else:
+                            yield from action(self, m)
+                    start = pos
+                    pos = m.end()
+                    if new_state is not None:
+                        if isinstance(new_state, tuple):
+                            for state in new_state:
+                                if len(statestack) < max_depth:
+                                    statestack.append(state)
+                                    if listener is not None:
+                                        enter(state, start, pos)
+                        elif isinstance(new_state, int):
+                            # pop, but keep at least the root state on the stack
+                            depth = len(statestack) - min(-new_state, len(statestack) - 1)
+                            popped = statestack[depth:]
+                            del statestack[depth:]
+                            if listener is not None:
+                                for state in reversed(popped):
+                                    leave(state, start, pos)
+                        elif len(statestack) < max_depth:  # "#push"
+                            statestack.append(statestack[-1])
+                            if listener is not None:
+                                enter(statestack[-1], start, pos)
+                        statetokens = tokendefs[statestack[-1]]
+                    if matched is not None:
+                        matched(start, pos)
+                    break
+            else:
+                # no rule matched, at EOL reset the state to "root", otherwise mark the character
+                if pos >= len(text):
+                    break
+                if text[pos] == "\n":
+                    if listener is not None:
+                        for state in reversed(statestack[1:]):
+                            leave(state, pos, pos)
+                    statestack = ["root"]
+                    statetokens = tokendefs["root"]
+                    yield pos, Whitespace, "\n"
+                else:
+                    yield pos, Error, text[pos]
+                if matched is not None:
+                    matched(pos, pos + 1)
+                pos += 1
 
     _EXTERNALS: set[str] = {
         "AI_AIMAT",
@@ -514,6 +860,62 @@ class DaedalusLexer(RegexLexer):
         "WLD_STOPEFFECT",
     }
 
+    # externals of only one of the games, Night of the Raven shares the Gothic 2 ones
+    _EXTERNALS_G1: set[str] = {
+        "DOC_FONT",
+        "DOC_MAPCOORDINATES",
+        "DOC_OPEN",
+        "DOC_PRINT",
+    }
+
+    _EXTERNALS_G2: set[str] = {
+        "AI_PLAYFX",
+        "AI_PRINTSCREEN",
+        "AI_STOPFX",
+        "APPLY_OPTIONS_AUDIO",
+        "APPLY_OPTIONS_CONTROLS",
+        "APPLY_OPTIONS_GAME",
+        "APPLY_OPTIONS_PERFORMANCE",
+        "APPLY_OPTIONS_VIDEO",
+        "DOC_SETLEVEL",
+        "DOC_SETLEVELCOORDS",
+        "EXITSESSION",
+        "GAME_INITENGLISH",
+        "GAME_INITGERMAN",
+        "NPC_GETACTIVESPELLISSCROLL",
+        "NPC_GETACTIVESPELLLEVEL",
+        "NPC_GETDETECTEDMOB",
+        "NPC_GETHEIGHTTOITEM",
+        "NPC_GETHEIGHTTONPC",
+        "NPC_GETLASTHITSPELLCAT",
+        "NPC_GETLASTHITSPELLID",
+        "NPC_HASRANGEDWEAPONWITHAMMO",
+        "NPC_ISDETECTEDMOBOWNEDBYGUILD",
+        "NPC_ISDETECTEDMOBOWNEDBYNPC",
+        "NPC_ISDRAWINGSPELL",
+        "NPC_ISDRAWINGWEAPON",
+        "NPC_SETACTIVESPELLINFO",
+        "NPC_STOPANI",
+        "PLAYVIDEOEX",
+        "TAL_CONFIGURE",
+        "UPDATE_CHOICEBOX",
+        "WLD_DETECTNPCEXATT",
+        "WLD_ISRAINING",
+        "WLD_PLAYEFFECT",
+        "WLD_SPAWNNPCRANGE",
+        "WLD_STOPEFFECT",
+    }
+
+    # the externals excluded from the profile of each game
+    _GAMES: dict[str, set[str]] = {
+        "all": set(),
+        "g1": _EXTERNALS_G2,
+        "g2": _EXTERNALS_G1,
+    }
+    _GAME_ALIASES: dict[str, str] = {"g2a": "g2"}
+
+    _PROFILES: dict[tuple[str, bool], Mapping[str, _TokenType]] = {}
+
     _ZPARSEREXTENDER: set[str] = {
         "AI_CALLSCRIPT",
         "AI_GETNEXTTRIGGERBYFUNC",
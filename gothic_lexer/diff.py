@@ -0,0 +1,243 @@
+"""
+Token-level diff of two versions of a script, insensitive to reformatting.
+
+    for hunk in diff_texts(old_source, new_source, ignore_comments=True):
+        hunk.old_lines, hunk.new_lines  # one-based line ranges
+        hunk.old, hunk.new  # the changed (index, tokentype, value) triples
+
+    python -m gothic_lexer diff Old/B_Story.d New/B_Story.d --ignore-comments
+
+Whitespace is never compared. The tokens are interned to integer ids, equal ``(tokentype, value)`` pairs
+getting the same id, and the id sequences are compared with the linear space variant of the Myers algorithm.
+"""
+from typing import Iterable, Iterator, NamedTuple
+
+from pygments.token import Comment, Keyword, Name, Text, _TokenType
+
+from .daedalus import DaedalusLexer
+
+
+class Hunk(NamedTuple):
+    """
+    A change, ``tag`` is ``"replace"``, ``"delete"`` or ``"insert"``.
+    The line ranges are one-based, an empty range is the place of the tokens inserted on the other side.
+    """
+
+    tag: str
+    old: list[tuple[int, _TokenType, str]]
+    new: list[tuple[int, _TokenType, str]]
+    old_lines: range
+    new_lines: range
+
+
+class _Stream(NamedTuple):
+    tokens: list[tuple[int, _TokenType, str]]
+    ids: list[int]
+    # the one-based lines of the first and last character of each token
+    first_lines: list[int]
+    last_lines: list[int]
+    # the line after the last token
+    end_line: int
+
+
+def _intern(
+    tokens: Iterable[tuple[int, _TokenType, str]], table: dict, ignore_comments: bool, ignore_case: bool
+) -> _Stream:
+    kept = []
+    ids = []
+    first_lines = []
+    last_lines = []
+    line = 1
+    for index, token, value in tokens:
+        newlines = value.count("\n")
+        if not (token in Text and value.isspace() or ignore_comments and token in Comment):
+            if token in Comment:
+                # the line comments end with the carriage return of Windows line breaks
+                key = value.rstrip()
+            elif ignore_case and (token in Name or token in Keyword):
+                key = value.casefold()
+            else:
+                key = value
+            ids.append(table.setdefault((token, key), len(table)))
+            kept.append((index, token, value))
+            first_lines.append(line)
+            last_lines.append(line + newlines - value.endswith("\n"))
+        line += newlines
+    return _Stream(kept, ids, first_lines, last_lines, line)
+
+
+# rounds of the middle snake search after which a subproblem is split at the furthest reaching point,
+# the scripts of up to twice as many edits are the shortest ones and the time is O((N + M) * MAX_COST)
+MAX_COST: int = 64
+
+
+def _bisect(
+    a: list[int], b: list[int], alo: int, ahi: int, blo: int, bhi: int, max_cost: int
+) -> tuple[int, int] | None:
+    """
+    Return a point of a shortest edit script of ``a[alo:ahi]`` and ``b[blo:bhi]`` to split them at,
+    found with the linear space middle snake search of Myers, or ``None`` if they have nothing in common.
+    After ``max_cost`` rounds the forward path reaching the furthest is split at instead.
+    """
+    n, m = ahi - alo, bhi - blo
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [-1] * (2 * offset + 2)
+    backward = [-1] * (2 * offset + 2)
+    forward[offset + 1] = backward[offset + 1] = 0
+    delta = n - m
+    odd = delta % 2 != 0
+    # the diagonals leaving the edit graph are skipped
+    forward_start = forward_end = backward_start = backward_end = 0
+    best = None
+    best_sum = 0
+    for d in range(max_d + 1):
+        if d > max_cost:
+            return best
+        for k in range(-d + forward_start, d + 1 - forward_end, 2):
+            if k == -d or k != d and forward[offset + k - 1] < forward[offset + k + 1]:
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if x > n:
+                forward_end += 2
+            elif y > m:
+                forward_start += 2
+            else:
+                if x + y > best_sum and (x, y) != (n, m):
+                    best, best_sum = (alo + x, blo + y), x + y
+                if odd and 0 <= offset + delta - k < len(backward):
+                    backward_x = backward[offset + delta - k]
+                    if backward_x != -1 and x >= n - backward_x:
+                        return alo + x, blo + y
+        for k in range(-d + backward_start, d + 1 - backward_end, 2):
+            if k == -d or k != d and backward[offset + k - 1] < backward[offset + k + 1]:
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[ahi - x - 1] == b[bhi - y - 1]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if x > n:
+                backward_end += 2
+            elif y > m:
+                backward_start += 2
+            elif not odd and 0 <= offset + delta - k < len(forward):
+                forward_x = forward[offset + delta - k]
+                if forward_x != -1 and forward_x >= n - x:
+                    return alo + forward_x, blo + forward_x - delta + k
+    return None
+
+
+def matching_blocks(a: list[int], b: list[int], max_cost: int = MAX_COST) -> list[tuple[int, int, int]]:
+    """
+    Return the ``(i, j, size)`` blocks of equal ids of an edit script, in order. The script is a shortest one
+    unless it has more than about ``2 * max_cost`` edits, which bounds the time of very different inputs.
+    """
+    blocks = []
+    pending = [(0, len(a), 0, len(b))] if not set(a).isdisjoint(b) else []
+    while pending:
+        alo, ahi, blo, bhi = pending.pop()
+        prefix = 0
+        while alo + prefix < ahi and blo + prefix < bhi and a[alo + prefix] == b[blo + prefix]:
+            prefix += 1
+        if prefix:
+            blocks.append((alo, blo, prefix))
+            alo += prefix
+            blo += prefix
+        suffix = 0
+        while alo < ahi - suffix and blo < bhi - suffix and a[ahi - 1 - suffix] == b[bhi - 1 - suffix]:
+            suffix += 1
+        if suffix:
+            ahi -= suffix
+            bhi -= suffix
+            blocks.append((ahi, bhi, suffix))
+        if alo == ahi or blo == bhi:
+            continue
+        split = _bisect(a, b, alo, ahi, blo, bhi, max_cost)
+        if split is not None:
+            x, y = split
+            pending.append((x, ahi, y, bhi))
+            pending.append((alo, x, blo, y))
+
+    blocks.sort()
+    merged = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+    return merged
+
+
+def _lines(stream: _Stream, start: int, end: int) -> range:
+    if start < end:
+        return range(stream.first_lines[start], stream.last_lines[end - 1] + 1)
+    line = stream.first_lines[start] if start < len(stream.tokens) else stream.end_line
+    return range(line, line)
+
+
+def diff_tokens(
+    old: Iterable[tuple[int, _TokenType, str]],
+    new: Iterable[tuple[int, _TokenType, str]],
+    ignore_comments: bool = False,
+    ignore_case: bool = False,
+) -> list[Hunk]:
+    """
+    Return the changes between two streams of ``(index, tokentype, value)`` triples, ignoring whitespace,
+    comments if ``ignore_comments`` and the case of names and keywords if ``ignore_case``, like the game does.
+    """
+    table: dict[tuple[_TokenType, str], int] = {}
+    old_stream = _intern(old, table, ignore_comments, ignore_case)
+    new_stream = _intern(new, table, ignore_comments, ignore_case)
+
+    hunks = []
+    i = j = 0
+    blocks = matching_blocks(old_stream.ids, new_stream.ids)
+    for block_i, block_j, size in blocks + [(len(old_stream.ids), len(new_stream.ids), 0)]:
+        if i < block_i or j < block_j:
+            tag = "replace" if i < block_i and j < block_j else "delete" if i < block_i else "insert"
+            hunks.append(
+                Hunk(
+                    tag,
+                    old_stream.tokens[i:block_i],
+                    new_stream.tokens[j:block_j],
+                    _lines(old_stream, i, block_i),
+                    _lines(new_stream, j, block_j),
+                )
+            )
+        i, j = block_i + size, block_j + size
+    return hunks
+
+
+def diff_texts(
+    old: str, new: str, lexer: DaedalusLexer | None = None, ignore_comments: bool = False, ignore_case: bool = False
+) -> list[Hunk]:
+    """Lex two versions of a script and return their changes, see `diff_tokens`."""
+    lexer = lexer or DaedalusLexer()
+    return diff_tokens(
+        lexer.get_tokens_unprocessed(old), lexer.get_tokens_unprocessed(new), ignore_comments, ignore_case
+    )
+
+
+def format_hunks(
+    hunks: Iterable[Hunk], old_text: str, new_text: str, old_name: str = "a", new_name: str = "b"
+) -> Iterator[str]:
+    """Yield the lines of a unified-diff-like report of the hunks, with the whole changed lines of both versions."""
+    old_lines = [line.rstrip("\r") for line in old_text.split("\n")]
+    new_lines = [line.rstrip("\r") for line in new_text.split("\n")]
+    yield f"--- {old_name}"
+    yield f"+++ {new_name}"
+    for hunk in hunks:
+        yield f"@@ -{hunk.old_lines.start},{len(hunk.old_lines)} +{hunk.new_lines.start},{len(hunk.new_lines)} @@"
+        for line in hunk.old_lines:
+            yield "-" + old_lines[line - 1]
+        for line in hunk.new_lines:
+            yield "+" + new_lines[line - 1]
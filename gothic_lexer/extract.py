@@ -0,0 +1,169 @@
+"""
+Extraction of the translatable strings of Daedalus scripts, streamed from the token stream:
+
+- the dialogue lines, the `//` comments after `AI_Output` calls, keyed by their output name
+- the `AI_OutputSVM` names
+- the strings passed to `Info_AddChoice`, `Log_AddEntry`, `PrintScreen` and the like
+- the `description`, `name` and `text` members of instances and prototypes
+- the `const string` declarations
+
+    python -m gothic_lexer extract-strings Scripts/Content/Story --format csv --output strings.csv
+"""
+import csv
+import json
+from typing import IO, Iterable, Iterator, NamedTuple
+
+from pygments.token import Comment, Keyword, Name, Operator, Punctuation, String, Text
+
+from .batch import ENCODING, map_files, read_script
+from .daedalus import DaedalusLexer
+
+_OUTPUTS: dict[str, str] = {
+    "AI_OUTPUT": "output",
+    "AI_OUTPUTSVM": "svm",
+    "AI_OUTPUTSVM_OVERLAY": "svm",
+}
+
+_CALLS: dict[str, str] = {
+    "AI_PRINTSCREEN": "print",
+    "INFO_ADDCHOICE": "choice",
+    "LOG_ADDENTRY": "log",
+    "LOG_CREATETOPIC": "log",
+    "PRINT": "print",
+    "PRINTDIALOG": "print",
+    "PRINTSCREEN": "print",
+}
+
+_MEMBERS: set[str] = {"DESCRIPTION", "NAME", "TEXT"}
+
+COLUMNS: tuple[str, ...] = ("file", "line", "kind", "key", "text")
+
+
+class Entry(NamedTuple):
+    """A translatable string, ``line`` is one-based."""
+
+    file: str
+    line: int
+    kind: str
+    key: str
+    text: str
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def extract_strings(tokens: Iterable[tuple[int, object, str]], path: str = "") -> Iterator[Entry]:
+    """Yield the translatable strings of the ``(index, tokentype, value)`` triples of a script as they complete."""
+    line = 1
+    instance = ""
+    # the call being read: [kind, function, depth, strings, last identifier argument, line]
+    call = None
+    # the output call waiting for the comment after its semicolon: (entry without text, line)
+    output = None
+    # the member or constant being read: [kind, key, strings, line, array, assigned]
+    assignment = None
+    declaration = ""
+    previous = None
+
+    for _, token, value in tokens:
+        if output is not None and (token is Text.Whitespace or value == ";") and "\n" not in value:
+            pass
+        elif output is not None:
+            entry, output_line = output
+            output = None
+            if token is Comment and value.startswith("//") and output_line == line:
+                yield entry._replace(text=value[2:].strip())
+            else:
+                yield entry
+
+        if call is not None and call[2] == 0 and token is not Text.Whitespace and value != "(":
+            # a function name that isn't called
+            call = None
+        if call is not None:
+            if token in Punctuation and value == "(":
+                call[2] += 1
+            elif token in Punctuation and value == ")":
+                call[2] -= 1
+                if call[2] == 0:
+                    kind, function, _, strings, argument, call_line = call
+                    call = None
+                    if kind in ("output", "svm"):
+                        entry = Entry(path, call_line, kind, strings[0] if strings else "", "")
+                        if kind == "output":
+                            output = (entry, line)
+                        else:
+                            yield entry
+                    else:
+                        for text in strings:
+                            yield Entry(path, call_line, kind, argument or function, text)
+            elif token in String and call[2] == 1:
+                call[3].append(_unquote(value))
+            elif token in Name and call[2] == 1:
+                call[4] = value
+        elif token in Name and previous is not None and previous[0] in Keyword.Declaration:
+            if previous[1].upper() in ("INSTANCE", "PROTOTYPE"):
+                instance = value
+        elif token in Name and previous is not None and previous[0] in Keyword.Type and declaration == "CONST STRING":
+            assignment = ["const", value, [], line, False, False]
+        elif token in Name and value.upper() in _OUTPUTS:
+            call = [_OUTPUTS[value.upper()], value, 0, [], "", line]
+        elif token in Name and value.upper() in _CALLS:
+            call = [_CALLS[value.upper()], value, 0, [], "", line]
+        elif token is Name.Variable.Instance and value.upper() in _MEMBERS:
+            assignment = ["member", f"{instance}.{value}", [], line, False, False]
+        elif assignment is not None:
+            if token in Punctuation and value.startswith(";"):
+                kind, key, strings, assignment_line, array, _ = assignment
+                for number, text in enumerate(strings):
+                    if array and kind == "const":
+                        yield Entry(path, assignment_line, kind, f"{key}[{number}]", text)
+                    else:
+                        yield Entry(path, assignment_line, kind, key, text)
+                assignment = None
+            elif token in String:
+                assignment[2].append(_unquote(value))
+            elif not assignment[5]:
+                if token in Operator and value == "=":
+                    assignment[5] = True
+                elif token is not Text.Whitespace:
+                    # the index of an array member or the size of an array constant
+                    assignment[4] = True
+                    if assignment[0] == "member":
+                        assignment[1] += value
+
+        if token in Keyword.Declaration:
+            declaration = value.upper()
+        elif token in Keyword.Type:
+            declaration += " " + value.upper()
+        if token is not Text.Whitespace:
+            previous = (token, value)
+        line += value.count("\n")
+
+    if output is not None:
+        yield output[0]
+
+
+def extract_file(path: str, encoding: str = ENCODING) -> list[Entry]:
+    """Return the translatable strings of the script at ``path``."""
+    tokens = DaedalusLexer().get_tokens_unprocessed(read_script(path, encoding))
+    return list(extract_strings(tokens, path))
+
+
+def extract_files(paths: Iterable[str], jobs: int | None = None, encoding: str = ENCODING) -> Iterator[Entry]:
+    """Yield the translatable strings of the scripts, extracted on a pool of ``jobs`` processes, in script order."""
+    for _, entries in map_files(extract_file, paths, jobs, encoding):
+        yield from entries
+
+
+def write_csv(entries: Iterable[Entry], file: IO[str]) -> None:
+    """Write the entries as CSV with a header row."""
+    writer = csv.writer(file)
+    writer.writerow(COLUMNS)
+    writer.writerows(entries)
+
+
+def write_jsonl(entries: Iterable[Entry], file: IO[str]) -> None:
+    """Write the entries as JSON lines."""
+    for entry in entries:
+        file.write(json.dumps(entry._asdict(), ensure_ascii=False) + "\n")
@@ -0,0 +1,132 @@
+"""
+HTML formatter specialized for the token types of `DaedalusLexer`.
+
+    highlight(source, DaedalusLexer(), DaedalusHtmlFormatter())
+    pygmentize -l dae -f daedalus-html -O full -o result_dae.html example_file.d
+
+The output uses the CSS classes of `HtmlFormatter` and renders the same. The span of every token type the lexer
+can emit is built once, the text is escaped and joined in chunks, spans run across lines and whitespace joins
+the span before it where that can't change the rendering. `get_style_defs` only returns the rules of those types.
+The options that work line by line, ``linenos``, ``hl_lines``, ``lineanchors``, ``linespans``, ``tagsfile``
+and a ``lineseparator`` other than a newline, use the line-based formatting of `HtmlFormatter`.
+"""
+from pygments.formatters.html import HtmlFormatter, _escape_html_table
+from pygments.token import Error, Name, Text, _TokenType
+
+from .daedalus import DaedalusLexer, EveryGroupMatch, Externals, Whitespace, ZParserExtender
+
+# the escaped parts are joined and written out every this many, so that huge inputs aren't held twice in memory
+_CHUNK_PARTS: int = 1 << 14
+
+
+def lexer_token_types(lexer_class: type = DaedalusLexer) -> set[_TokenType]:
+    """Return the token types a `DaedalusLexer` can emit, read from its rules and its post-processing."""
+    types = {Name, Text, Whitespace, Error, Externals, ZParserExtender}
+    for rules in lexer_class.tokens.values():
+        for rule in rules:
+            if not isinstance(rule, tuple):
+                continue
+            action = rule[1]
+            if isinstance(action, _TokenType):
+                types.add(action)
+            elif callable(action):
+                # a callback, e.g. of `bygroups`, emits the token types of the groups that matched
+                types.update(token for _, token, _ in action(lexer_class, EveryGroupMatch()))
+    return types
+
+
+class DaedalusHtmlFormatter(HtmlFormatter):
+    """
+    `HtmlFormatter` with a precomputed span table for the token types of `DaedalusLexer`,
+    see `gothic_lexer.formatter`. It accepts the same options.
+    """
+
+    name: str = "Daedalus HTML"
+    aliases: list[str] = ["daedalus-html", "dae-html"]
+    filenames: list[str] = []
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._linewise = bool(
+            self.linenos
+            or self.hl_lines
+            or self.lineanchors
+            or self.linespans
+            or self.tagsfile
+            or self.lineseparator != "\n"
+        )
+        # whitespace can join the span before it when neither of them draws anything around the characters
+        self._merge_whitespace = not self._is_decorated(Whitespace)
+        self._spans: dict[_TokenType, str] = {}
+        self._mergeable: set[str] = {""}
+        for ttype in lexer_token_types():
+            self._span(ttype)
+
+    def _is_decorated(self, ttype: _TokenType) -> bool:
+        while not self.style.styles_token(ttype) and ttype.parent is not None:
+            ttype = ttype.parent
+        style = self.style.style_for_token(ttype)
+        return bool(style["bgcolor"] or style["underline"] or style["border"])
+
+    def _span(self, ttype: _TokenType) -> str:
+        """Build the opening tag of the span of a token type, like `HtmlFormatter` does, and store it."""
+        title = ' title="{}"'.format(".".join(ttype)) if self.debug_token_types else ""
+        if self.noclasses:
+            css_style = self._get_css_inline_styles(ttype)
+            span = f'<span style="{self.class2style[css_style][0]}"{title}>' if css_style else ""
+        else:
+            css_class = self._get_css_classes(ttype)
+            span = f'<span class="{css_class}"{title}>' if css_class else ""
+        self._spans[ttype] = span
+        if not self._is_decorated(ttype):
+            self._mergeable.add(span)
+        return span
+
+    def _format_lines(self, tokensource):
+        if self._linewise:
+            yield from super()._format_lines(tokensource)
+            return
+
+        spans = self._spans
+        mergeable = self._mergeable if self._merge_whitespace else set()
+        table = _escape_html_table
+        parts = []
+        append = parts.append
+        current = ""
+        value = ""
+        for ttype, value in tokensource:
+            if ttype is Whitespace and current in mergeable:
+                append(value)
+                continue
+            span = spans.get(ttype)
+            if span is None:
+                span = self._span(ttype)
+            if span != current:
+                if current:
+                    append("</span>")
+                if span:
+                    append(span)
+                current = span
+            append(value.translate(table))
+            if len(parts) >= _CHUNK_PARTS:
+                # the open span carries over into the next chunk
+                yield 1, "".join(parts)
+                parts.clear()
+        if current:
+            append("</span>")
+        if not value.endswith("\n"):
+            append("\n")
+        yield 1, "".join(parts)
+
+    def get_token_style_defs(self, arg=None):
+        """Return the CSS rules of the token types `DaedalusLexer` emits and of their parents."""
+        classes = set()
+        for ttype in lexer_token_types():
+            classes.update(self._get_css_classes(ttype).split())
+        prefix = self.get_css_prefix(arg)
+        styles = sorted(
+            (level, ttype, cls, style)
+            for cls, (style, ttype, level) in self.class2style.items()
+            if cls and style and cls in classes
+        )
+        return [f"{prefix(cls)} {{ {style} }} /* {repr(ttype)[6:]} */" for level, ttype, cls, style in styles]
@@ -0,0 +1,286 @@
+"""
+Fuzzing of the lexer with random scripts following the Daedalus grammar, searching for inputs it doesn't
+round-trip and for inputs whose lexing time grows faster than their length.
+
+    for finding in fuzz(iterations=200, seed=0):
+        print(finding.seed, finding.kind, finding.detail)
+
+    python -m gothic_lexer fuzz --iterations 200 --output findings
+
+`ScriptGenerator` composes functions, instances, prototypes, classes, namespaces and META blocks with variables,
+nested IF / ELSE IF / ELSE blocks, calls, strings, labels, comments and some stray characters. A generator of
+the same seed makes the same choices at any ``scale``, only the whitespace runs, the name suffixes, the strings
+and the comments are ``scale`` times longer, so the scripts of all scales have the same tokens. A script is lexed
+at two scales, where those runs make up most of it, and flagged as super-linear when the lexing time grows with
+a power of the length higher than ``threshold``, e.g. about 2 when a rule rescans a whitespace run once per
+character of it. The time of a linear lexer grows at most with the power of 1, less when the tokens that aren't
+scaled take a good part of it.
+
+Every script is also checked for the invariants of the lexer: the values of the tokens concatenate to the input,
+at their offsets, and the compiled lexer returns the same tokens as the interpreted one.
+"""
+import math
+import random
+import time
+from typing import Iterator, NamedTuple
+
+from .daedalus import DaedalusLexer
+
+_WORDS: tuple[str, ...] = (
+    "Hero",
+    "Npc",
+    "Diego",
+    "MIS_Quest",
+    "B_Say",
+    "Wld_IsTime",
+    "Npc_GetDistToWP",
+    "Info_AddChoice",
+    "Mdl_SetVisual",
+    "MEM_Alloc",
+    "LeGo_Init",
+    "Str_Format",
+    "self",
+    "other",
+    "instance_help",
+    "TRUE",
+    "x",
+    "ATR_HITPOINTS",
+    "a@b",
+    "c^d",
+)
+_TYPES: tuple[str, ...] = ("void", "int", "float", "string", "C_Npc", "C_Item", "func", "instance")
+_CLASSES: tuple[str, ...] = ("C_Npc", "C_Item", "C_Info", "C_Mission")
+_OPERATORS: tuple[str, ...] = ("+", "-", "*", "/", "%", "==", "!=", "<", ">=", "&&", "||", "&", "|")
+_WHITESPACE: tuple[str, ...] = (" ", " ", " ", "\n", "\t", "\r\n")
+_TEXT: str = "abcdefghijklmnopqrstuvwxyz ABC 0123456789.,!?-_ąęż"
+# characters that no rule or only an error path matches
+_NOISE: tuple[str, ...] = ("#", "$", "'", "\\", "?", "`", '"', "ąę")
+
+
+class ScriptGenerator:
+    """Random scripts of the ``seed``, with ``scale`` times longer runs, see the module documentation."""
+
+    def __init__(self, seed: int | None = None, scale: int = 1, max_depth: int = 4, noise: float = 0.02) -> None:
+        self.random = random.Random(seed)
+        self.scale = scale
+        self.max_depth = max_depth
+        self.noise = noise
+
+    def script(self, declarations: int = 20) -> str:
+        """Return a script of ``declarations`` top level declarations."""
+        return "".join(self.declaration(0) for _ in range(declarations))
+
+    def space(self, minimum: int = 0) -> str:
+        count = self.random.randint(minimum, 2)
+        return "".join(self.random.choice(_WHITESPACE) for _ in range(count)) * self.scale
+
+    def name(self) -> str:
+        name = self.random.choice(_WORDS)
+        if self.random.random() < 0.3:
+            name += "_" + "a" * self.random.randint(1, 3) * self.scale
+        return name
+
+    def text(self) -> str:
+        return "".join(self.random.choice(_TEXT) for _ in range(self.random.randint(0, 3))) * self.scale
+
+    def string(self) -> str:
+        return '"' + self.text() + '"'
+
+    def comment(self) -> str:
+        kind = self.random.random()
+        if kind < 0.5:
+            return "//" + self.text() + "\n"
+        if kind < 0.8:
+            return "/*" + self.text() + "*/"
+        return "/*" + self.text() + "/*" + self.text() + "*/" + self.text() + "*/"
+
+    def expression(self, depth: int) -> str:
+        kind = self.random.random()
+        if depth >= self.max_depth or kind < 0.2:
+            return str(self.random.randint(0, 1000))
+        if kind < 0.3:
+            return f"{self.random.randint(0, 99)}.{self.random.randint(0, 99)}"
+        if kind < 0.45:
+            return self.string()
+        if kind < 0.65:
+            return self.name()
+        if kind < 0.8:
+            return self.call(depth + 1)
+        if kind < 0.9:
+            operator = self.random.choice(_OPERATORS)
+            left = self.expression(depth + 1)
+            return left + self.space() + operator + self.space() + self.expression(depth + 1)
+        return "(" + self.space() + self.expression(depth + 1) + self.space() + ")"
+
+    def call(self, depth: int) -> str:
+        arguments = [self.expression(depth + 1) for _ in range(self.random.randint(0, 3))]
+        return self.name() + self.space() + "(" + ("," + self.space()).join(arguments) + ")"
+
+    def variable(self, keyword: str = "var") -> str:
+        declaration = keyword + self.space(1) + self.random.choice(_TYPES) + self.space(1) + self.name()
+        if self.random.random() < 0.2:
+            declaration += "[" + str(self.random.randint(1, 9)) + "]"
+        if keyword == "const":
+            declaration += self.space() + "=" + self.space() + self.expression(1)
+        return declaration + self.space() + ";"
+
+    def block(self, depth: int) -> str:
+        statements = "".join(self.statement(depth + 1) for _ in range(self.random.randint(0, 4)))
+        return "{" + self.space() + statements + "}"
+
+    def statement(self, depth: int) -> str:
+        kind = self.random.random()
+        if self.random.random() < self.noise:
+            statement = self.random.choice(_NOISE)
+        elif kind < 0.15:
+            statement = self.variable()
+        elif kind < 0.35:
+            statement = self.name() + self.space() + "=" + self.space() + self.expression(depth) + ";"
+        elif kind < 0.55:
+            statement = self.call(depth) + ";"
+        elif kind < 0.7 and depth < self.max_depth:
+            statement = "if" + self.space(1) + self.expression(depth) + self.space() + self.block(depth)
+            for _ in range(self.random.randint(0, 2)):
+                condition = self.expression(depth)
+                statement += self.space() + "else" + self.space(1) + "if" + self.space(1) + condition
+                statement += self.space() + self.block(depth)
+            if self.random.random() < 0.5:
+                statement += self.space() + "else" + self.space() + self.block(depth)
+            statement += ";"
+        elif kind < 0.78:
+            statement = "return" + self.space(1) + self.expression(depth) + ";"
+        elif kind < 0.88:
+            statement = self.name() + self.space() + ":"
+        else:
+            statement = self.comment()
+        return statement + self.space()
+
+    def member(self) -> str:
+        kind = self.random.random()
+        if kind < 0.4:
+            member = self.name() + self.space() + "=" + self.space() + self.expression(1) + ";"
+        elif kind < 0.55:
+            index = str(self.random.randint(0, 9)) if self.random.random() < 0.5 else self.name()
+            member = self.name() + self.space() + "[" + index + "]" + self.space() + "=" + self.space()
+            member += self.expression(1) + ";"
+        elif kind < 0.8:
+            member = self.call(1) + ";"
+        else:
+            member = self.comment()
+        return member + self.space()
+
+    def declaration(self, depth: int) -> str:
+        kind = self.random.random()
+        if kind < 0.3:
+            parameters = [self.variable()[:-1].rstrip(" \t\r\n") for _ in range(self.random.randint(0, 3))]
+            declaration = "func" + self.space(1) + self.random.choice(_TYPES) + self.space(1) + self.name()
+            declaration += self.space() + "(" + ("," + self.space()).join(parameters) + ")" + self.space()
+            declaration += "{" + self.space() + "".join(self.statement(1) for _ in range(self.random.randint(0, 6)))
+            declaration += "};"
+        elif kind < 0.5:
+            keyword = self.random.choice(("instance", "prototype"))
+            declaration = keyword + self.space(1) + self.name() + self.space()
+            declaration += "(" + self.space() + self.random.choice(_CLASSES) + self.space() + ")" + self.space()
+            declaration += "{" + self.space() + "".join(self.member() for _ in range(self.random.randint(0, 6)))
+            declaration += "};"
+        elif kind < 0.6:
+            declaration = "class" + self.space(1) + self.name() + self.space() + "{" + self.space()
+            declaration += "".join(self.variable() + self.space() for _ in range(self.random.randint(0, 4))) + "};"
+        elif kind < 0.68 and depth < 2:
+            declaration = "namespace" + self.space(1) + self.name() + self.space() + "{" + self.space()
+            declaration += "".join(self.declaration(depth + 1) for _ in range(self.random.randint(0, 3))) + "};"
+        elif kind < 0.74:
+            declaration = "META" + self.space(1) + "{" + self.space()
+            for _ in range(self.random.randint(0, 3)):
+                value = self.random.choice(("Game", "Menu", "Ikarus, LeGo", "0", "1"))
+                declaration += self.name() + self.space() + "=" + self.space() + value + ";" + self.space()
+            declaration += "};"
+        elif kind < 0.9:
+            declaration = self.variable(self.random.choice(("var", "const")))
+        else:
+            declaration = self.comment()
+        return declaration + self.space(1)
+
+
+class Finding(NamedTuple):
+    """An input breaking an invariant of the lexer or lexed in super-linear time."""
+
+    seed: int
+    # "roundtrip", "compiled" or "superlinear"
+    kind: str
+    detail: str
+    text: str
+
+
+def check_roundtrip(text: str, lexer: DaedalusLexer) -> str | None:
+    """Return how the tokens of ``text`` don't concatenate to it at their offsets, or ``None``."""
+    position = 0
+    for index, _, value in lexer.get_tokens_unprocessed(text):
+        if index != position:
+            return f"token at {index} instead of {position}"
+        if text[index : index + len(value)] != value:
+            return f"token at {index} isn't a slice of the input: {value[:40]!r}"
+        position += len(value)
+    if position != len(text):
+        return f"tokens end at {position} of {len(text)}"
+    return None
+
+
+def seconds(text: str, lexer: DaedalusLexer, min_time: float = 0.05) -> float:
+    """Return the time of the fastest of the lexing runs of ``text`` in at least ``min_time`` seconds."""
+    best = float("inf")
+    start = time.perf_counter()
+    while True:
+        run = time.perf_counter()
+        for _ in lexer.get_tokens_unprocessed(text):
+            pass
+        end = time.perf_counter()
+        best = min(best, end - run)
+        if end - start >= min_time:
+            return best
+
+
+def fuzz(
+    iterations: int = 100,
+    seed: int = 0,
+    declarations: int = 8,
+    scale: int = 64,
+    growth: int = 16,
+    threshold: float | None = 1.2,
+    options: dict | None = None,
+    min_time: float = 0.05,
+    lexer_class: type = DaedalusLexer,
+    compare_compiled: bool = True,
+) -> Iterator[Finding]:
+    """
+    Check the scripts of ``iterations`` seeds from ``seed`` and yield the findings. With a ``threshold``,
+    a script is also lexed at ``scale`` and ``scale * growth`` and flagged when its lexing time grows
+    with a power of its length higher than the ``threshold``. The timed lexer is the compiled one
+    with the ``compiled`` option.
+    """
+    options = dict(options or {})
+    timed_compiled = bool(options.pop("compiled", False))
+    lexer = lexer_class(**options)
+    compiled = lexer_class(compiled=True, **options) if compare_compiled or timed_compiled else None
+    timed = compiled if timed_compiled else lexer
+    for current in range(seed, seed + iterations):
+        text = ScriptGenerator(current).script(declarations)
+        problem = check_roundtrip(text, lexer)
+        if problem is not None:
+            yield Finding(current, "roundtrip", problem, text)
+            continue
+        if compare_compiled and list(compiled.get_tokens_unprocessed(text)) != list(
+            lexer.get_tokens_unprocessed(text)
+        ):
+            yield Finding(current, "compiled", "the compiled lexer returns other tokens", text)
+            continue
+        if threshold is None:
+            continue
+        small = ScriptGenerator(current, scale).script(declarations)
+        large = ScriptGenerator(current, scale * growth).script(declarations)
+        exponent = math.log(seconds(large, timed, min_time) / seconds(small, timed, min_time)) / math.log(
+            len(large) / len(small)
+        )
+        if exponent > threshold:
+            detail = f"the lexing time grows with the length to the power of {exponent:.2f}"
+            yield Finding(current, "superlinear", detail, large)
@@ -0,0 +1,203 @@
+"""
+Golden token streams of fixture scripts, compared as a whole and reported as a diff, and the lexing throughput
+of the fixtures against a stored baseline, so that changes to the lexer are safe and measurable.
+
+    python -m gothic_lexer golden tests --golden tests/golden --update  # write the missing and changed golden files
+    python -m gothic_lexer golden tests --golden tests/golden --baseline baseline.json --record
+    python -m gothic_lexer golden tests --golden tests/golden --baseline baseline.json --tolerance 0.15
+
+The fixtures are named by their paths relative to the directory holding all of them, and the golden files
+are kept in the same layout under the golden directory. A golden file holds a token per line, its type without
+the ``Token.`` prefix and its value as a JSON string:
+
+    Keyword.Declaration "func"
+    Text.Whitespace " "
+
+The fixtures are checked in parallel. The throughput of a fixture is the number of its tokens per second
+of the fastest of the runs in ``min_time`` seconds. It depends on the machine, record the baseline before
+changing the lexer and compare with it after.
+"""
+import difflib
+import json
+import os
+import time
+from collections import deque
+from typing import Iterable, NamedTuple
+
+from pygments.token import _TokenType
+
+from .batch import ENCODING, map_files, read_script, token_type
+from .daedalus import DaedalusLexer
+
+SUFFIX: str = ".tokens"
+
+
+class FixtureResult(NamedTuple):
+    """The comparison of a fixture with its golden file and its throughput."""
+
+    name: str
+    tokens: int
+    tokens_per_second: float
+    # the report of the differences, empty when the streams are equal
+    diff: list[str]
+    # whether the golden file was written
+    written: bool
+
+
+def dumps(tokens: Iterable[tuple[_TokenType, str]]) -> str:
+    """Return the ``(tokentype, value)`` pairs in the golden file format."""
+    return "".join(f"{str(token)[6:] or 'Token'} {json.dumps(value, ensure_ascii=False)}\n" for token, value in tokens)
+
+
+def loads(text: str) -> list[tuple[_TokenType, str]]:
+    """Return the ``(tokentype, value)`` pairs of a golden file."""
+    tokens = []
+    # not splitlines, which also splits the line separators JSON leaves unescaped
+    for line in text.split("\n"):
+        if line:
+            name, _, value = line.partition(" ")
+            tokens.append((token_type(name if name == "Token" else "Token." + name), json.loads(value)))
+    return tokens
+
+
+def fixture_root(paths: Iterable[str]) -> str:
+    """Return the deepest directory holding all the fixtures at ``paths``."""
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+
+
+def fixture_name(path: str, root: str) -> str:
+    """Return the name of the fixture at ``path``, its path relative to the ``root`` with ``/`` separators."""
+    return os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+
+
+def golden_path(path: str, golden_dir: str, root: str | None = None) -> str:
+    """Return the path of the golden file of the fixture at ``path``, see `fixture_root`."""
+    name = fixture_name(path, os.path.dirname(os.path.abspath(path)) if root is None else root)
+    return os.path.join(golden_dir, *(os.path.splitext(name)[0] + SUFFIX).split("/"))
+
+
+def diff_tokens(
+    golden: list[tuple[_TokenType, str]],
+    tokens: list[tuple[_TokenType, str]],
+    golden_name: str = "golden",
+    name: str = "tokens",
+    context: int = 3,
+) -> list[str]:
+    """
+    Return the report of the differences between two streams, empty if they are equal:
+    the token and the script line of the first difference, then a unified diff of the golden file lines.
+    """
+    if golden == tokens:
+        return []
+    index = next((i for i, (expected, actual) in enumerate(zip(golden, tokens)) if expected != actual), None)
+    if index is None:
+        index = min(len(golden), len(tokens))
+    line = 1 + sum(value.count("\n") for _, value in tokens[:index])
+    report = [f"{name}: first difference at token {index}, line {line}"]
+    report.extend(
+        difflib.unified_diff(
+            dumps(golden).splitlines(), dumps(tokens).splitlines(), golden_name, name, n=context, lineterm=""
+        )
+    )
+    return report
+
+
+def measure(
+    text: str, options: dict | None = None, min_time: float = 0.2
+) -> tuple[list[tuple[_TokenType, str]], float]:
+    """Lex ``text`` for at least ``min_time`` seconds, return its tokens and the tokens per second of the best run."""
+    lexer = DaedalusLexer(**(options or {}))
+    tokens = list(lexer.get_tokens(text))
+    best = float("inf")
+    start = time.perf_counter()
+    while True:
+        run = time.perf_counter()
+        deque(lexer.get_tokens(text), maxlen=0)
+        end = time.perf_counter()
+        best = min(best, end - run)
+        if end - start >= min_time:
+            break
+    return tokens, len(tokens) / best if best > 0 else float("inf")
+
+
+def check_fixture(
+    path: str,
+    golden_dir: str,
+    options: dict | None = None,
+    update: bool = False,
+    min_time: float = 0.2,
+    encoding: str = ENCODING,
+    root: str | None = None,
+) -> FixtureResult:
+    """
+    Lex the fixture at ``path`` and compare its tokens with its golden file. The golden file is written
+    if it doesn't exist, or with ``update`` if it differs. The fixture is named relative to the ``root``,
+    its directory by default.
+    """
+    tokens, tokens_per_second = measure(read_script(path, encoding), options, min_time)
+    root = os.path.dirname(os.path.abspath(path)) if root is None else root
+    name = fixture_name(path, root)
+    golden_file = golden_path(path, golden_dir, root)
+    diff = []
+    if os.path.exists(golden_file):
+        with open(golden_file, encoding="utf8", newline="") as file:
+            diff = diff_tokens(loads(file.read()), tokens, golden_file, name)
+    written = (bool(diff) and update) or not os.path.exists(golden_file)
+    if written:
+        os.makedirs(os.path.dirname(golden_file), exist_ok=True)
+        with open(golden_file, "w", encoding="utf8", newline="") as file:
+            file.write(dumps(tokens))
+        diff = []
+    return FixtureResult(name, len(tokens), tokens_per_second, diff, written)
+
+
+def check_fixtures(
+    paths: Iterable[str],
+    golden_dir: str,
+    jobs: int | None = None,
+    options: dict | None = None,
+    update: bool = False,
+    min_time: float = 0.2,
+    encoding: str = ENCODING,
+) -> list[FixtureResult]:
+    """
+    Check the fixtures on a pool of ``jobs`` processes, all CPUs by default, see `check_fixture`.
+    The fixtures are named relative to the `fixture_root` of all of them.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    root = fixture_root(paths)
+    return [
+        result
+        for _, result in map_files(
+            check_fixture, paths, jobs, golden_dir, options, update, min_time, encoding, root
+        )
+    ]
+
+
+def load_baseline(path: str) -> dict[str, float]:
+    """Return the tokens per second of the fixtures saved at ``path``."""
+    with open(path, encoding="utf8") as file:
+        return json.load(file)["tokens_per_second"]
+
+
+def save_baseline(results: Iterable[FixtureResult], path: str) -> None:
+    """Save the tokens per second of the fixtures at ``path``."""
+    baseline = {"tokens_per_second": {result.name: round(result.tokens_per_second) for result in results}}
+    with open(path, "w", encoding="utf8") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def regressions(results: Iterable[FixtureResult], baseline: dict[str, float], tolerance: float = 0.2) -> list[str]:
+    """Describe the fixtures lexed more than ``tolerance`` slower than in the ``baseline``, fixtures not in it pass."""
+    slower = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if expected and result.tokens_per_second < expected * (1 - tolerance):
+            slower.append(
+                f"{result.name}: {result.tokens_per_second:.0f} tokens/s, "
+                f"{1 - result.tokens_per_second / expected:.0%} below the baseline of {expected:.0f} tokens/s"
+            )
+    return slower
@@ -0,0 +1,244 @@
+"""
+Inverted index from identifiers to the places they are defined and used in a script tree.
+
+    index = build_index(collect_scripts(["Scripts/Content"]), jobs=8)
+    index.usages("Npc_GetDistToWP")
+    index.save("scripts.idx")
+
+Identifiers are casefolded, like the game does. Comments and strings are never indexed.
+Definitions are function, class, namespace, instance and prototype names and declared variables, constants and
+parameters, every other name token is a use.
+"""
+import os
+import zlib
+from typing import Iterable, NamedTuple
+
+from pygments.token import Keyword, Name, Punctuation, Text, _TokenType
+
+from .batch import ENCODING, map_files, read_script, token_type
+from .daedalus import DaedalusLexer
+from .serialize import FormatError, read_varint, write_varint
+
+MAGIC: bytes = b"GLIX"
+VERSION: int = 1
+
+# token types that are definitions wherever they appear
+_DEFINITIONS: tuple[_TokenType, ...] = (Name.Function, Name.Namespace)
+
+
+class Posting(NamedTuple):
+    """A place where an identifier appears."""
+
+    file: str
+    offset: int
+    token: _TokenType
+    definition: bool
+
+
+def index_tokens(tokens: Iterable[tuple[int, _TokenType, str]]) -> list[tuple[str, int, _TokenType, bool]]:
+    """Return the ``(identifier, offset, tokentype, definition)`` postings of ``(index, tokentype, value)`` triples."""
+    postings = []
+    previous = None
+    # the names after INSTANCE or PROTOTYPE up to the parent class are all declared
+    declaring = False
+    for index, token, value in tokens:
+        if token is Text.Whitespace:
+            continue
+        if token in Name and token is not Name.Label:
+            if token in _DEFINITIONS or declaring:
+                definition = True
+            elif previous is not None:
+                definition = previous[0] in Keyword.Type or previous[0] in Keyword.Declaration
+            else:
+                definition = False
+            postings.append((value.casefold(), index, token, definition))
+        elif token in Keyword.Declaration:
+            declaring = value.upper() in ("INSTANCE", "PROTOTYPE")
+        elif declaring and token in Punctuation and value != ",":
+            declaring = False
+        previous = (token, value)
+    return postings
+
+
+def _index_file(path: str, encoding: str) -> tuple[int, list[tuple[str, int, str, bool]]]:
+    mtime = os.stat(path).st_mtime_ns
+    tokens = DaedalusLexer().get_tokens_unprocessed(read_script(path, encoding))
+    return mtime, [(name, offset, str(token), definition) for name, offset, token, definition in index_tokens(tokens)]
+
+
+class IdentifierIndex:
+    """An inverted index of identifiers, updated per file."""
+
+    def __init__(self) -> None:
+        self._files: dict[str, int] = {}
+        # identifier -> file -> [(offset, tokentype, definition)]
+        self._terms: dict[str, dict[str, list[tuple[int, _TokenType, bool]]]] = {}
+        self._file_terms: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @property
+    def files(self) -> dict[str, int]:
+        """The indexed files mapped to their modification time in nanoseconds when they were indexed."""
+        return dict(self._files)
+
+    def update(self, path: str, postings: Iterable[tuple[str, int, _TokenType, bool]], mtime: int = 0) -> None:
+        """Replace the postings of the file at ``path``, as returned by `index_tokens`."""
+        self.remove(path)
+        terms = set()
+        for name, offset, token, definition in postings:
+            self._terms.setdefault(name, {}).setdefault(path, []).append((offset, token, definition))
+            terms.add(name)
+        self._files[path] = mtime
+        self._file_terms[path] = terms
+
+    def update_named(self, path: str, postings: Iterable[tuple[str, int, str, bool]], mtime: int = 0) -> None:
+        """
+        Replace the postings of the file at ``path`` with ones whose token types are given by their names,
+        e.g. ``"Token.Name.Function"``, as they are sent back by the processes of a pool.
+        """
+        self.update(
+            path, ((name, offset, token_type(token), definition) for name, offset, token, definition in postings), mtime
+        )
+
+    def update_file(self, path: str, encoding: str = ENCODING) -> None:
+        """Lex the file at ``path`` and replace its postings."""
+        mtime, postings = _index_file(path, encoding)
+        self.update_named(path, postings, mtime)
+
+    def remove(self, path: str) -> None:
+        """Remove the postings of the file at ``path``, if it is indexed."""
+        for name in self._file_terms.pop(path, ()):
+            files = self._terms[name]
+            del files[path]
+            if not files:
+                del self._terms[name]
+        self._files.pop(path, None)
+
+    def find(self, identifier: str, definition: bool | None = None) -> list[Posting]:
+        """
+        Return the postings of an ``identifier`` in file and offset order,
+        only the definitions or the uses if ``definition`` is given.
+        """
+        postings = []
+        for path, entries in sorted(self._terms.get(identifier.casefold(), {}).items()):
+            postings.extend(
+                Posting(path, offset, token, is_definition)
+                for offset, token, is_definition in entries
+                if definition is None or is_definition == definition
+            )
+        return postings
+
+    def definitions(self, identifier: str) -> list[Posting]:
+        """Return the places where an ``identifier`` is defined."""
+        return self.find(identifier, True)
+
+    def usages(self, identifier: str) -> list[Posting]:
+        """Return the places where an ``identifier`` is used."""
+        return self.find(identifier, False)
+
+    def dumps(self) -> bytes:
+        """
+        Serialize the index: the file table with modification times, the token type table, then for each identifier
+        its postings grouped by file with varint offset deltas, all zlib-compressed.
+        """
+        files = {path: number for number, path in enumerate(self._files)}
+        types: dict[_TokenType, int] = {}
+        body = bytearray()
+        for name, entries in self._terms.items():
+            encoded = name.encode()
+            write_varint(body, len(encoded))
+            body += encoded
+            write_varint(body, len(entries))
+            for path, postings in entries.items():
+                write_varint(body, files[path])
+                write_varint(body, len(postings))
+                previous = 0
+                for offset, token, definition in postings:
+                    write_varint(body, offset - previous)
+                    write_varint(body, types.setdefault(token, len(types)) << 1 | definition)
+                    previous = offset
+
+        payload = bytearray()
+        write_varint(payload, len(files))
+        for path, mtime in self._files.items():
+            encoded = path.encode("utf-8", "surrogateescape")
+            write_varint(payload, len(encoded))
+            payload += encoded
+            write_varint(payload, mtime)
+        write_varint(payload, len(types))
+        for token in types:
+            encoded = str(token).encode()
+            write_varint(payload, len(encoded))
+            payload += encoded
+        write_varint(payload, len(self._terms))
+        payload += body
+        return MAGIC + bytes((VERSION,)) + zlib.compress(payload)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "IdentifierIndex":
+        """Deserialize an index written by `dumps`."""
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise FormatError("not an identifier index in a supported version")
+        payload = zlib.decompress(data[5:])
+        index = cls()
+
+        count, pos = read_varint(payload, 0)
+        files = []
+        for _ in range(count):
+            length, pos = read_varint(payload, pos)
+            path = payload[pos:pos + length].decode("utf-8", "surrogateescape")
+            mtime, pos = read_varint(payload, pos + length)
+            files.append(path)
+            index._files[path] = mtime
+            index._file_terms[path] = set()
+        count, pos = read_varint(payload, pos)
+        types = []
+        for _ in range(count):
+            length, pos = read_varint(payload, pos)
+            types.append(token_type(payload[pos:pos + length].decode()))
+            pos += length
+
+        count, pos = read_varint(payload, pos)
+        for _ in range(count):
+            length, pos = read_varint(payload, pos)
+            name = payload[pos:pos + length].decode()
+            file_count, pos = read_varint(payload, pos + length)
+            entries = index._terms[name] = {}
+            for _ in range(file_count):
+                file_number, pos = read_varint(payload, pos)
+                posting_count, pos = read_varint(payload, pos)
+                path = files[file_number]
+                index._file_terms[path].add(name)
+                postings = entries[path] = []
+                offset = 0
+                for _ in range(posting_count):
+                    delta, pos = read_varint(payload, pos)
+                    value, pos = read_varint(payload, pos)
+                    offset += delta
+                    postings.append((offset, types[value >> 1], bool(value & 1)))
+        return index
+
+    def save(self, path: str) -> None:
+        """Write the index to a file, replacing it atomically."""
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(self.dumps())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IdentifierIndex":
+        """Read an index written by `save`."""
+        with open(path, "rb") as file:
+            return cls.loads(file.read())
+
+
+def build_index(
+    paths: Iterable[str], jobs: int | None = None, encoding: str = ENCODING, index: IdentifierIndex | None = None
+) -> IdentifierIndex:
+    """Index the scripts on a pool of ``jobs`` processes, into a new index or updating the given one."""
+    index = IdentifierIndex() if index is None else index
+    for path, (mtime, postings) in map_files(_index_file, paths, jobs, encoding):
+        index.update_named(path, postings, mtime)
+    return index
@@ -0,0 +1,98 @@
+"""
+Recognition of the calls of script libraries like Ikarus and LeGo by the names of their functions.
+
+    table = LibraryTable.default()
+    table.load("AFSP.txt")  # symbol list, library "afsp"
+    table.load("Ikarus/Ikarus.d", "ikarus")  # the functions a script declares
+    lexer = DaedalusLexer(libraries=table)
+    pygmentize -l dae -O libraries="AFSP.txt Ikarus.d" script.d
+
+A library is known by the prefixes of its function names, the part before an underscore, e.g. ``LeGo_`` or
+``MEMINT_``, or by a list of full names. Names are compared in upper case, like the game does, and the lookup
+only depends on the length of the name, not on how many libraries and symbols there are.
+
+A symbol list has one name per line, a prefix ends with ``_*``. Empty lines and ones starting with ``//`` or ``#``
+are skipped. The functions declared by a ``.d`` script are read with the lexer.
+"""
+import os
+from typing import Iterable
+
+from pygments.token import Name
+
+# the prefixes of the libraries highlighted by the ``ikarus`` and ``lego`` options of the lexer
+DEFAULT_PREFIXES: dict[str, str] = {
+    "CALL": "ikarus",
+    "CALLINT": "ikarus",
+    "LEGO": "lego",
+    "MEM": "ikarus",
+    "MEMINT": "ikarus",
+}
+
+
+class LibraryTable:
+    """Upper case function names and name prefixes mapped to the names of their libraries."""
+
+    def __init__(self, prefixes: dict[str, str] | None = None, names: dict[str, str] | None = None) -> None:
+        self.prefixes: dict[str, str] = {}
+        self.names: dict[str, str] = {}
+        for prefix, library in (prefixes or {}).items():
+            self.add_prefix(prefix, library)
+        for name, library in (names or {}).items():
+            self.add_name(name, library)
+
+    @classmethod
+    def default(cls, libraries: Iterable[str] = ("ikarus", "lego")) -> "LibraryTable":
+        """Return a table with the default prefixes of the ``libraries``."""
+        libraries = set(libraries)
+        return cls({prefix: library for prefix, library in DEFAULT_PREFIXES.items() if library in libraries})
+
+    def add_prefix(self, prefix: str, library: str) -> None:
+        """Recognize the names starting with ``prefix`` followed by an underscore, e.g. ``LeGo`` or ``LeGo_``."""
+        self.prefixes[prefix.upper().rstrip("_")] = library
+
+    def add_name(self, name: str, library: str) -> None:
+        """Recognize a single function name."""
+        self.names[name.upper()] = library
+
+    def load(self, path: str, library: str | None = None) -> None:
+        """Add a symbol list or the functions declared by a ``.d`` script, of ``library`` or the file name."""
+        library = library or os.path.splitext(os.path.basename(path))[0].lower()
+        with open(path, encoding="cp1252", errors="replace") as file:
+            text = file.read()
+        if path.lower().endswith(".d"):
+            from .daedalus import DaedalusLexer
+
+            for _, token, value in DaedalusLexer().get_tokens_unprocessed(text):
+                if token is Name.Function:
+                    self.add_name(value, library)
+            return
+        for line in text.splitlines():
+            line = line.strip()
+            if not line or line.startswith(("//", "#")):
+                continue
+            if line.endswith("*"):
+                self.add_prefix(line.rstrip("*"), library)
+            else:
+                self.add_name(line, library)
+
+    def update(self, other: "LibraryTable") -> None:
+        """Add the prefixes and names of another table."""
+        self.prefixes.update(other.prefixes)
+        self.names.update(other.names)
+
+    def get(self, name: str) -> str | None:
+        """Return the library of a function name, the one of its longest known prefix, or ``None``."""
+        upper = name.upper()
+        library = self.names.get(upper)
+        if library is not None or not self.prefixes:
+            return library
+        end = upper.rfind("_")
+        while end > 0:
+            library = self.prefixes.get(upper[:end])
+            if library is not None:
+                return library
+            end = upper.rfind("_", 0, end)
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self.prefixes or self.names)
@@ -0,0 +1,205 @@
+"""
+Lexing metrics for batch and server modes: per-file measurements aggregated into histograms,
+exported in the Prometheus text format or as JSON.
+
+    metrics = measure_files(collect_scripts(["Scripts/Content"]), jobs=8)
+    metrics.slowest(10)
+    open("metrics.prom", "w").write(metrics.to_prometheus())
+
+    python -m gothic_lexer metrics Scripts/Content --format json --output metrics.json
+"""
+import math
+import os
+import time
+from bisect import bisect_left
+from typing import Iterable, NamedTuple
+
+from pygments.token import Error, Name
+
+from .batch import ENCODING, map_files, read_script
+from .daedalus import DaedalusLexer
+
+# upper bounds of the histogram buckets, the last bucket is +Inf
+SECONDS_BUCKETS: tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BYTES_BUCKETS: tuple[float, ...] = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+TOKENS_BUCKETS: tuple[float, ...] = (100, 1000, 10000, 100000, 1000000)
+
+
+class FileMetrics(NamedTuple):
+    """The measurements of lexing a single file or request."""
+
+    path: str
+    seconds: float
+    bytes: int
+    tokens: int
+    max_depth: int
+    errors: int
+    externals: int
+    zparserextender: int
+
+
+class _DepthListener:
+    """State transition listener tracking the depth of the state stack."""
+
+    __slots__ = ("depth", "max_depth")
+
+    def __init__(self) -> None:
+        self.depth = self.max_depth = 1
+
+    def enter(self, state: str, start: int, end: int) -> None:
+        self.depth += 1
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+
+    def leave(self, state: str, start: int, end: int) -> None:
+        self.depth -= 1
+
+
+def measure(text: str, path: str = "", lexer: DaedalusLexer | None = None, size: int | None = None) -> FileMetrics:
+    """Lex ``text`` and return its measurements, ``size`` defaults to the UTF-8 length of the text."""
+    lexer = lexer or DaedalusLexer()
+    listener = _DepthListener()
+    tokens = errors = externals = zparserextender = 0
+    Externals = Name.Builtin.Externals
+    ZParserExtender = Name.Builtin.ZParserExtender
+
+    start = time.perf_counter()
+    for _, token, _ in lexer.get_tokens_unprocessed(text, listener=listener):
+        tokens += 1
+        if token is Externals:
+            externals += 1
+        elif token is ZParserExtender:
+            zparserextender += 1
+        elif token is Error:
+            errors += 1
+    seconds = time.perf_counter() - start
+
+    size = len(text.encode("utf-8", "surrogatepass")) if size is None else size
+    return FileMetrics(path, seconds, size, tokens, listener.max_depth, errors, externals, zparserextender)
+
+
+def measure_file(path: str, encoding: str = ENCODING) -> FileMetrics:
+    """Read and lex the script at ``path`` and return its measurements."""
+    return measure(read_script(path, encoding), path, size=os.path.getsize(path))
+
+
+class Histogram:
+    """A cumulative histogram with fixed bucket upper bounds, like the Prometheus one."""
+
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+        self.counts: list[int] = [0] * len(self.buckets)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        """Count a value in the first bucket whose upper bound is at least the value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        """Add the observations of a histogram with the same buckets."""
+        if other.buckets != self.buckets:
+            raise ValueError("the histograms have different buckets")
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return the ``(upper bound, observations up to it)`` pairs."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self) -> dict:
+        """Return the cumulative buckets, sum and count as a JSON-serializable dict."""
+        return {
+            "buckets": [["+Inf" if math.isinf(bound) else bound, count] for bound, count in self.cumulative()],
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class BatchMetrics:
+    """Aggregated measurements of a batch of files or of the requests of a server."""
+
+    def __init__(self) -> None:
+        self.files: list[FileMetrics] = []
+        self.seconds = Histogram(SECONDS_BUCKETS)
+        self.bytes = Histogram(BYTES_BUCKETS)
+        self.tokens = Histogram(TOKENS_BUCKETS)
+        self.max_depth: int = 0
+        self.errors: int = 0
+        self.externals: int = 0
+        self.zparserextender: int = 0
+
+    def observe(self, metrics: FileMetrics) -> None:
+        """Add the measurements of a file or request."""
+        self.files.append(metrics)
+        self.seconds.observe(metrics.seconds)
+        self.bytes.observe(metrics.bytes)
+        self.tokens.observe(metrics.tokens)
+        self.max_depth = max(self.max_depth, metrics.max_depth)
+        self.errors += metrics.errors
+        self.externals += metrics.externals
+        self.zparserextender += metrics.zparserextender
+
+    def slowest(self, count: int = 10) -> list[FileMetrics]:
+        """Return the files that took the longest to lex per byte, the pathological ones."""
+        return sorted(self.files, key=lambda metrics: metrics.seconds / max(metrics.bytes, 1), reverse=True)[:count]
+
+    def to_prometheus(self, prefix: str = "gothic_lexer") -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        histograms = (
+            ("lex_seconds", "Time spent lexing a file.", self.seconds),
+            ("lex_bytes", "Size of the lexed files.", self.bytes),
+            ("lex_tokens", "Number of tokens of the lexed files.", self.tokens),
+        )
+        for name, description, histogram in histograms:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for bound, count in histogram.cumulative():
+                bound = "+Inf" if math.isinf(bound) else repr(float(bound))
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum {histogram.sum!r}")
+            lines.append(f"{prefix}_{name}_count {histogram.count}")
+
+        counters = (
+            ("error_tokens_total", "Number of Error tokens.", self.errors),
+            ("externals_total", "Number of Name.Builtin.Externals tokens.", self.externals),
+            ("zparserextender_total", "Number of Name.Builtin.ZParserExtender tokens.", self.zparserextender),
+        )
+        for name, description, value in counters:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.append(f"{prefix}_{name} {value}")
+        lines.append(f"# HELP {prefix}_max_stack_depth Deepest lexer state stack.")
+        lines.append(f"# TYPE {prefix}_max_stack_depth gauge")
+        lines.append(f"{prefix}_max_stack_depth {self.max_depth}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        """Return the metrics, including the per-file measurements, as a JSON-serializable dict."""
+        return {
+            "seconds": self.seconds.to_dict(),
+            "bytes": self.bytes.to_dict(),
+            "tokens": self.tokens.to_dict(),
+            "max_depth": self.max_depth,
+            "errors": self.errors,
+            "externals": self.externals,
+            "zparserextender": self.zparserextender,
+            "files": [metrics._asdict() for metrics in self.files],
+        }
+
+
+def measure_files(paths: Iterable[str], jobs: int | None = None, encoding: str = ENCODING) -> BatchMetrics:
+    """Lex the scripts on a pool of ``jobs`` processes and return their aggregated measurements."""
+    metrics = BatchMetrics()
+    for _, file_metrics in map_files(measure_file, paths, jobs, encoding):
+        metrics.observe(file_metrics)
+    return metrics
@@ -0,0 +1,291 @@
+"""
+Lexing only some lines of a script, e.g. the hunks of a patch, instead of the whole file.
+
+    hunks = diff_texts(old_source, new_source)
+    for fragment in lex_lines(new_source, [hunk.new_lines for hunk in hunks], context=3):
+        fragment.lines, fragment.tokens
+
+Lexing a range has to begin in the states the lexer is in at its first line, e.g. inside a function body
+or a `/* */` comment. They are restored from the per-line checkpoints of a `LineStates`, built by lexing
+the script once and worth keeping when the same version is rendered repeatedly. A checkpoint is only kept
+for the lines where a match of a rule begins, a line continuing a match, e.g. a declaration split across
+lines, is lexed from the nearest checkpoint before it.
+Without checkpoints, a backward scan finds the nearest line before the range that starts a top-level
+`func`, `instance`, `prototype` or `class` declaration outside of a comment and before any namespace,
+and lexing begins there in the root state.
+
+A viewer showing a window of a long script fills the checkpoints lazily, only as far as it has scrolled,
+and lexes only the lines of the window:
+
+    states = LineStates(source, lazy=True)
+    html = highlight_window(states, first_line=1200, line_count=50)
+"""
+import re
+import zlib
+from typing import Iterable, Iterator, NamedTuple
+
+import pygments
+from pygments.formatter import Formatter
+from pygments.token import _TokenType
+
+from .comments import comment_spans
+from .daedalus import DaedalusLexer
+
+# declarations that can only appear at the top level, at the start of a line
+_TOP_LEVEL = re.compile(r"(?:FUNC|INSTANCE|PROTOTYPE|CLASS)\s", re.IGNORECASE)
+# the declarations of zParserExtender namespaces, whose bodies are lexed in the namespace state
+_NAMESPACE = re.compile(r"^[ \t]*NAMESPACE\s", re.IGNORECASE | re.MULTILINE)
+# the code of a line before a // comment, strings don't span lines and an unterminated quote is a single character
+_CODE = re.compile(r'(?:"[^"\n]*"|"|/(?!/)|[^"/\n])*')
+
+# the lines a lazy `LineStates` fills past the requested one, a few windows of a viewer
+_FILL_AHEAD: int = 256
+
+
+class Fragment(NamedTuple):
+    """
+    The tokens of the one-based ``lines`` of a script, cut at the bounds of the lines,
+    so that their values add up to the text of the lines.
+    """
+
+    lines: range
+    tokens: list[tuple[int, _TokenType, str]]
+
+
+def line_starts(text: str) -> list[int]:
+    """Return the offsets of the lines of ``text``, the first line starts at 0."""
+    return [0] + [match.end() for match in re.finditer("\n", text)]
+
+
+class _StackListener:
+    """State transition listener mirroring the state stack of the lexer."""
+
+    __slots__ = ("stack",)
+
+    def __init__(self, stack: Iterable[str]) -> None:
+        self.stack = list(stack)
+
+    def enter(self, state: str, start: int, end: int) -> None:
+        self.stack.append(state)
+
+    def leave(self, state: str, start: int, end: int) -> None:
+        self.stack.pop()
+
+
+class _CheckpointListener(_StackListener):
+    """Records the stack at the lines a match begins at, and ``None`` for the lines beginning inside a match."""
+
+    __slots__ = ("starts", "stacks", "interned")
+
+    def __init__(self, stack: Iterable[str], states: "LineStates") -> None:
+        super().__init__(stack)
+        self.starts = states.starts
+        self.stacks = states.stacks
+        self.interned = states._interned
+
+    def match(self, start: int, end: int) -> None:
+        starts = self.starts
+        stacks = self.stacks
+        line = len(stacks)
+        while line < len(starts) and starts[line] < end:
+            stacks.append(None)
+            line += 1
+        if line < len(starts) and starts[line] == end:
+            stack = tuple(self.stack)
+            stacks.append(self.interned.setdefault(stack, stack))
+
+
+class LineStates:
+    """
+    The state stack of the lexer at the start of every line of a script where a match of a rule begins.
+    A line beginning inside a match, e.g. the type of ``func`` followed by a newline, can't be lexed on its own,
+    lexing it begins at the nearest line before it that has a checkpoint.
+    A ``lazy`` instance lexes the script only up to the lines asked for, and a bit beyond.
+    """
+
+    def __init__(self, text: str, lexer: DaedalusLexer | None = None, lazy: bool = False) -> None:
+        self.text = text
+        self.lexer = lexer or DaedalusLexer()
+        self.starts = line_starts(text)
+        # the stack of every line, None where the line begins inside a match
+        self.stacks: list[tuple[str, ...] | None] = []
+        # equal stacks are shared, most lines are in a handful of states
+        self._interned: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self._keys: dict[tuple[str, ...], int] = {}
+        if not lazy:
+            self.fill(len(self.starts))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def fill(self, line: int) -> None:
+        """Record the stacks up to the one-based ``line``, lexing on from the last checkpoint."""
+        starts = self.starts
+        stacks = self.stacks
+        stop = min(line, len(starts))
+        if len(stacks) >= stop:
+            return
+        # the last checkpoint is lexed again and the lines after it recorded the same
+        while stacks and stacks[-1] is None:
+            stacks.pop()
+        stack = stacks.pop() if stacks else ("root",)
+        listener = _CheckpointListener(stack, self)
+        stacks.append(self._interned.setdefault(stack, stack))
+        # only the bounds of the matches and the states matter, the names don't have to be resolved
+        matches = self.lexer._lex(self.text, stack, listener, starts[len(stacks) - 1])
+        for _ in matches:
+            if len(stacks) >= stop:
+                matches.close()
+                return
+        stack = tuple(listener.stack)
+        stacks.extend([self._interned.setdefault(stack, stack)] * (len(starts) - len(stacks)))
+
+    def checkpoint(self, line: int) -> tuple[int, tuple[str, ...]]:
+        """Return the one-based line of the nearest checkpoint at or before the one-based ``line`` and its stack."""
+        if line > len(self.stacks):
+            self.fill(line + _FILL_AHEAD)
+        stacks = self.stacks
+        while stacks[line - 1] is None:
+            line -= 1
+        return line, stacks[line - 1]
+
+    def stack(self, line: int) -> tuple[str, ...]:
+        """Return the state stack at the start of the one-based ``line``, or of its `checkpoint`."""
+        return self.checkpoint(line)[1]
+
+    def key(self, line: int) -> int:
+        """
+        Return a hash of the state stack at the start of the one-based ``line``, the same in every process,
+        e.g. to key the rendered lines of a viewer by their text and starting state. For a line without
+        a checkpoint it also covers the text from the checkpoint, which the lexing of the line depends on.
+        """
+        checkpoint, stack = self.checkpoint(line)
+        key = self._keys.get(stack)
+        if key is None:
+            key = self._keys.setdefault(stack, zlib.crc32("/".join(stack).encode()))
+        if checkpoint != line:
+            key = zlib.crc32(self.text[self.starts[checkpoint - 1]:self.starts[line - 1]].encode(), key)
+        return key
+
+
+def _follows_statement(text: str, start: int, comments: list[tuple[int, int]]) -> bool:
+    """Return whether the code before the offset ``start`` ends with a ``;``, skipping whitespace and comments."""
+    pos = start
+    while True:
+        end = pos
+        while end > 0 and text[end - 1].isspace():
+            end -= 1
+        if end == 0:
+            return True
+        comment = next((begin for begin, stop in comments if begin < end <= stop), None)
+        if comment is not None:
+            pos = comment
+            continue
+        line = text.rfind("\n", 0, end - 1) + 1
+        code = _CODE.match(text, line, end).end()
+        if code < end:
+            # the end of a // comment
+            pos = code
+            continue
+        return text[end - 1] == ";"
+
+
+def find_restart(text: str, offset: int) -> int:
+    """
+    Return the offset of the nearest line at or before ``offset`` where lexing can begin in the root state:
+    a line starting with a top-level declaration after a ``;``, outside of comments and before any namespace,
+    or the start of the text.
+    """
+    start = text.rfind("\n", 0, offset) + 1
+    comments = list(comment_spans(text, 0, start))
+    namespace = _NAMESPACE.search(text, 0, start)
+    while namespace is not None and any(begin <= namespace.start() < end for begin, end in comments):
+        namespace = _NAMESPACE.search(text, namespace.end(), start)
+    if namespace is not None:
+        start = text.rfind("\n", 0, namespace.start()) + 1
+    while start > 0:
+        if (
+            _TOP_LEVEL.match(text, start)
+            and not any(begin < start < end for begin, end in comments)
+            and _follows_statement(text, start, comments)
+        ):
+            return start
+        start = text.rfind("\n", 0, start - 1) + 1
+    return 0
+
+
+def _merge(lines: Iterable[range], context: int, count: int) -> list[range]:
+    merged: list[range] = []
+    for line_range in sorted(lines, key=lambda line_range: line_range.start):
+        first = max(1, line_range.start - context)
+        stop = min(count, line_range.stop - 1 + context) + 1
+        if first >= stop:
+            continue
+        if merged and first <= merged[-1].stop:
+            merged[-1] = range(merged[-1].start, max(stop, merged[-1].stop))
+        else:
+            merged.append(range(first, stop))
+    return merged
+
+
+def _cut(
+    tokens: Iterable[tuple[int, _TokenType, str]], start: int, end: int
+) -> Iterator[tuple[int, _TokenType, str]]:
+    for index, token, value in tokens:
+        if index >= end:
+            return
+        if index + len(value) <= start:
+            continue
+        if index < start:
+            value = value[start - index:]
+            index = start
+        yield index, token, value[:end - index]
+
+
+def lex_lines(
+    text: str,
+    lines: Iterable[range],
+    lexer: DaedalusLexer | None = None,
+    context: int = 0,
+    states: LineStates | None = None,
+) -> list[Fragment]:
+    """
+    Lex the one-based ``lines`` ranges of a script, with ``context`` lines around each, and return the fragments
+    of the merged ranges in line order. The starting states are restored from the ``states`` checkpoints
+    if given, their text must be the ``text``, otherwise they are found by a backward scan.
+    """
+    if states is not None:
+        lexer = lexer or states.lexer
+        starts = states.starts
+    else:
+        lexer = lexer or DaedalusLexer()
+        starts = line_starts(text)
+
+    fragments = []
+    for line_range in _merge(lines, context, len(starts)):
+        start = starts[line_range.start - 1]
+        end = starts[line_range.stop - 1] if line_range.stop <= len(starts) else len(text)
+        if states is not None:
+            checkpoint, stack = states.checkpoint(line_range.start)
+            tokens = lexer.get_tokens_unprocessed(text, stack, start=starts[checkpoint - 1])
+        else:
+            tokens = lexer.get_tokens_unprocessed(text, start=find_restart(text, start))
+        fragments.append(Fragment(line_range, list(_cut(tokens, start, end))))
+    return fragments
+
+
+def highlight_window(
+    states: LineStates, first_line: int, line_count: int, formatter: Formatter | None = None
+) -> str:
+    """
+    Format the ``line_count`` lines of the script of the ``states`` from the one-based ``first_line``, lexing only
+    them from the checkpoint of the first one. The default formatter is a `DaedalusHtmlFormatter` without
+    the wrapping ``<div>`` and ``<pre>``, so that windows can be put together.
+    """
+    if formatter is None:
+        from .formatter import DaedalusHtmlFormatter
+
+        formatter = DaedalusHtmlFormatter(nowrap=True)
+    fragments = lex_lines(states.text, [range(first_line, first_line + line_count)], states=states)
+    tokens = ((token, value) for fragment in fragments for _, token, value in fragment.tokens)
+    return pygments.format(tokens, formatter)
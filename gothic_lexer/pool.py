@@ -0,0 +1,284 @@
+"""
+Pool of warm worker processes highlighting scripts for short-lived clients, e.g. build tools running
+``pygmentize`` once per code block, which pay the start of Python, the imports and the compilation
+of the lexer every time.
+
+    python -m gothic_lexer pool --workers 4
+    python -m gothic_lexer highlight -l dae -f html -O full,game=g1 -o result_dae.html script.d
+
+The supervisor imports Pygments, creates a `DaedalusLexer`, which compiles the regular expressions of its states,
+loads the generated module of the compiled lexer and renders a script with the preloaded formatters, then forks
+the workers. They share those pages copy-on-write and accept the connections on the same listening socket.
+Workers that exit are replaced. Forking needs a POSIX system.
+
+A request is the length of a JSON header, the header and the script bytes up to the end of the stream. The header
+holds the ``lexer`` and ``formatter`` names and the ``options`` passed to both, like ``pygmentize -O``, with the paths
+of the options naming files made absolute by the client, since the workers don't run in its directory. The response
+is a status byte, ``0`` or ``1``, followed by the output or an error message. The script is decoded by the lexer,
+so the ``encoding`` and ``inencoding`` options work as with ``pygmentize``. The output is encoded with the
+``outencoding`` or ``encoding`` option, UTF-8 by default.
+"""
+import gc
+import json
+import os
+import signal
+import socket
+import struct
+from typing import Callable
+
+_HEADER = struct.Struct("!I")
+
+_OK: bytes = b"0"
+_FAILED: bytes = b"1"
+
+# seconds a worker waits for a stalled client before dropping the connection
+TIMEOUT: float = 30.0
+
+# the options naming files, the lexer's list of library files and the formatter's CSS and ctags files
+_PATH_OPTIONS: tuple[str, ...] = ("cssfile", "tagsfile")
+_PATH_LIST_OPTIONS: tuple[str, ...] = ("libraries",)
+
+
+class PoolError(Exception):
+    """Raised when a script can't be highlighted, e.g. for an unknown formatter or an invalid option."""
+
+
+class _Stop(Exception):
+    pass
+
+
+def default_address() -> str:
+    """
+    Return the path of the pool socket, ``$GOTHIC_LEXER_POOL`` or one per user in ``$XDG_RUNTIME_DIR`` or ``$TMPDIR``.
+    `tempfile` isn't used, importing it takes longer than a request.
+    """
+    address = os.environ.get("GOTHIC_LEXER_POOL")
+    if address:
+        return address
+    directory = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return os.path.join(directory, f"gothic-lexer-{user}.sock")
+
+
+def parse_options(options: list[str] | None = None, single: list[str] | None = None) -> dict:
+    """
+    Parse ``pygmentize`` options, the comma-separated ``key=value`` lists of ``-O``, where a key alone is ``True``,
+    and the single ``key=value`` options of ``-P``, whose values may contain commas.
+    """
+    parsed: dict = {}
+    for option in options or ():
+        for argument in option.split(","):
+            argument = argument.strip()
+            if not argument:
+                continue
+            key, equals, value = argument.partition("=")
+            parsed[key.strip()] = value.strip() if equals else True
+    for option in single or ():
+        key, _, value = option.partition("=")
+        parsed[key.strip()] = value
+    return parsed
+
+
+def render(source: bytes, lexer: str = "dae", formatter: str = "html", options: dict | None = None) -> bytes:
+    """Highlight ``source`` like ``pygmentize -l lexer -f formatter -O options`` and return the encoded output."""
+    from pygments import highlight
+    from pygments.formatters import get_formatter_by_name
+    from pygments.lexers import get_lexer_by_name
+
+    from .daedalus import DaedalusLexer
+    from .formatter import DaedalusHtmlFormatter
+
+    options = options or {}
+    # the classes of this package are found also when it isn't installed and has no entry points
+    if lexer in DaedalusLexer.aliases:
+        lexer_instance = DaedalusLexer(**options)
+    else:
+        lexer_instance = get_lexer_by_name(lexer, **options)
+    if formatter in DaedalusHtmlFormatter.aliases:
+        formatter_instance = DaedalusHtmlFormatter(**options)
+    else:
+        formatter_instance = get_formatter_by_name(formatter, **options)
+    if not formatter_instance.encoding:
+        formatter_instance.encoding = "utf-8"
+    return highlight(source, lexer_instance, formatter_instance)
+
+
+def _receive(connection: socket.socket) -> tuple[bytes, bytes]:
+    stream = connection.makefile("rb")
+    try:
+        (size,) = _HEADER.unpack(stream.read(_HEADER.size))
+        return stream.read(size), stream.read()
+    finally:
+        stream.close()
+
+
+def _handle(connection: socket.socket) -> None:
+    try:
+        header, source = _receive(connection)
+    except (OSError, struct.error):
+        # the client went away or sent a truncated request, nobody reads the response
+        return
+    try:
+        header = json.loads(header)
+        lexer, formatter = header.get("lexer", "dae"), header.get("formatter", "html")
+        output = _OK + render(source, lexer, formatter, header.get("options"))
+    except Exception as error:  # the client reports the error, like pygmentize does
+        output = _FAILED + f"{type(error).__name__}: {error}".encode("utf-8")
+    try:
+        connection.sendall(output)
+    except OSError:
+        pass
+
+
+def _work(listener: socket.socket) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        connection, _ = listener.accept()
+        with connection:
+            connection.settimeout(TIMEOUT)
+            _handle(connection)
+
+
+def warm_up(formatters: tuple[str, ...] = ("html", "daedalus-html")) -> None:
+    """Import and compile everything highlighting a script needs, once, before the workers are forked."""
+    for formatter in formatters:
+        for compiled in ("false", "true"):
+            render(b"func void Warm() { Print(\"\"); };\n", "dae", formatter, {"compiled": compiled})
+
+
+def _spawn(listener: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _work(listener)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(
+    address: str | None = None,
+    workers: int | None = None,
+    formatters: tuple[str, ...] = ("html", "daedalus-html"),
+    on_ready: Callable[[], None] | None = None,
+) -> None:
+    """
+    Warm up, listen on the Unix socket at ``address`` and fork ``workers`` processes, all CPUs by default,
+    then replace the ones that exit until the supervisor gets SIGTERM or SIGINT, which stop the workers too.
+    """
+    if not hasattr(os, "fork"):
+        raise OSError("the pool needs os.fork, which this platform doesn't have")
+    address = address or default_address()
+    workers = workers or os.cpu_count() or 1
+
+    warm_up(formatters)
+    # keep the warmed objects out of the collections of the workers, which would copy their pages
+    gc.collect()
+    gc.freeze()
+
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    def stop(signum: int, frame) -> None:
+        raise _Stop
+
+    previous = {signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    children: set[int] = set()
+    try:
+        listener.bind(address)
+        listener.listen(128)
+        for _ in range(workers):
+            children.add(_spawn(listener))
+        if on_ready is not None:
+            on_ready()
+        while True:
+            pid, _ = os.wait()
+            children.discard(pid)
+            children.add(_spawn(listener))
+    except _Stop:
+        pass
+    finally:
+        for signum in previous:
+            signal.signal(signum, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        listener.close()
+        if os.path.exists(address):
+            os.unlink(address)
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        gc.unfreeze()
+
+
+def _absolute_paths(options: dict) -> dict:
+    """Return ``options`` with the relative paths of the options naming files made absolute in the current directory."""
+    options = dict(options)
+    for key in _PATH_OPTIONS:
+        if isinstance(options.get(key), str) and options[key]:
+            options[key] = os.path.abspath(options[key])
+    for key in _PATH_LIST_OPTIONS:
+        paths = options.get(key)
+        if isinstance(paths, str):
+            # split like `pygments.util.get_list_opt`
+            paths = paths.split()
+        if isinstance(paths, (list, tuple)):
+            options[key] = [os.path.abspath(path) for path in paths]
+    return options
+
+
+def request(
+    source: bytes,
+    lexer: str = "dae",
+    formatter: str = "html",
+    options: dict | None = None,
+    address: str | None = None,
+    timeout: float | None = TIMEOUT,
+) -> bytes:
+    """
+    Highlight ``source`` on the pool listening at ``address`` and return the output. The relative paths of
+    the ``libraries``, ``cssfile`` and ``tagsfile`` options are made absolute in the current directory, the workers
+    run in the one of the supervisor. Raises `OSError` when no pool is listening and `PoolError` when the worker fails.
+    """
+    options = _absolute_paths(options or {})
+    header = json.dumps({"lexer": lexer, "formatter": formatter, "options": options}).encode("utf-8")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(address or default_address())
+        connection.sendall(_HEADER.pack(len(header)) + header)
+        connection.sendall(source)
+        connection.shutdown(socket.SHUT_WR)
+        chunks = []
+        while chunk := connection.recv(1 << 16):
+            chunks.append(chunk)
+    response = b"".join(chunks)
+    if response[:1] != _OK:
+        raise PoolError(response[1:].decode("utf-8", "replace") or "the worker closed the connection")
+    return response[1:]
+
+
+def _render_locally(source: bytes, lexer: str, formatter: str, options: dict | None) -> bytes:
+    from pygments.util import ClassNotFound, OptionError
+
+    try:
+        return render(source, lexer, formatter, options)
+    except (ClassNotFound, OptionError, OSError) as error:
+        raise PoolError(f"{type(error).__name__}: {error}") from error
+
+
+def highlight(
+    source: bytes, lexer: str = "dae", formatter: str = "html", options: dict | None = None, address: str | None = None
+) -> bytes:
+    """Highlight ``source`` on the pool, or in the calling process when no pool is listening."""
+    if not hasattr(socket, "AF_UNIX"):
+        return _render_locally(source, lexer, formatter, options)
+    try:
+        return request(source, lexer, formatter, options, address)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return _render_locally(source, lexer, formatter, options)
+
@@ -0,0 +1,125 @@
+"""
+Lexing whole script projects in the compile order of their `.src` files.
+
+A `.src` file lists the scripts and other `.src` files to parse, one path per line,
+relative to the directory of the `.src` file, with Windows separators and wildcards in the file names:
+
+    _Intern\\Constants.d
+    AI\\AI.src
+    Story\\Dialoge\\*.d
+
+The game resolves the paths case-insensitively and parses the files matching a wildcard in name order.
+"""
+import fnmatch
+import os
+from typing import Iterable, Iterator
+
+from pygments.token import _TokenType
+
+from .batch import ENCODING, lex_files
+
+_WILDCARDS: str = "*?["
+
+
+def _listdir(directory: str, cache: dict[str, list[str]]) -> list[str]:
+    if directory not in cache:
+        try:
+            cache[directory] = sorted(os.listdir(directory), key=str.casefold)
+        except OSError:
+            cache[directory] = []
+    return cache[directory]
+
+
+def resolve_path(base: str, path: str, cache: dict[str, list[str]] | None = None) -> list[str]:
+    """
+    Resolve a `.src` entry ``path`` relative to the ``base`` directory case-insensitively
+    and return the matching files, sorted by name when the file name is a wildcard pattern.
+    """
+    cache = {} if cache is None else cache
+    parts = [part for part in path.replace("\\", "/").split("/") if part and part != "."]
+    candidates = [base]
+    for depth, part in enumerate(parts):
+        last = depth == len(parts) - 1
+        pattern = part.casefold()
+        wildcard = any(char in part for char in _WILDCARDS)
+        matches = []
+        for candidate in candidates:
+            if part == "..":
+                matches.append(os.path.dirname(candidate))
+                continue
+            for name in _listdir(candidate, cache):
+                folded = name.casefold()
+                if folded == pattern or (wildcard and fnmatch.fnmatchcase(folded, pattern)):
+                    full_path = os.path.join(candidate, name)
+                    if os.path.isfile(full_path) if last else os.path.isdir(full_path):
+                        matches.append(full_path)
+        candidates = matches
+    return candidates
+
+
+def _entries(src_path: str) -> Iterator[str]:
+    with open(src_path, encoding=ENCODING, errors="replace") as file:
+        for line in file:
+            entry = line.split("//", 1)[0].strip()
+            if entry:
+                yield entry
+
+
+def _parse_src(src_path: str, cache: dict[str, list[str]], parents: list[str]) -> list[str]:
+    key = os.path.normcase(os.path.realpath(src_path))
+    if key in parents:
+        cycle = [*parents[parents.index(key):], key]
+        raise ValueError(f"{src_path}: the .src files include each other: {' -> '.join(cycle)}")
+    parents.append(key)
+    base = os.path.dirname(os.path.abspath(src_path))
+    paths = []
+    for entry in _entries(src_path):
+        matches = resolve_path(base, entry, cache)
+        if not matches and not any(char in entry for char in _WILDCARDS):
+            raise FileNotFoundError(f"{src_path}: {entry} not found")
+        for path in matches:
+            if path.casefold().endswith(".src"):
+                paths.extend(_parse_src(path, cache, parents))
+            else:
+                paths.append(path)
+    parents.pop()
+    return paths
+
+
+def parse_src(src_path: str, cache: dict[str, list[str]] | None = None) -> list[str]:
+    """
+    Return the paths of the scripts listed by a `.src` file in compile order,
+    following the nested `.src` files.
+    Raise `FileNotFoundError` for entries without wildcards that don't match any file
+    and `ValueError` for `.src` files including themselves, directly or through others.
+    """
+    return _parse_src(src_path, {} if cache is None else cache, [])
+
+
+def lex_project(
+    src_path: str, jobs: int | None = None, options: dict | None = None, encoding: str = ENCODING
+) -> Iterator[tuple[str, list[tuple[_TokenType, str]]]]:
+    """
+    Lex every script listed by a `.src` file in parallel on a pool of ``jobs`` processes
+    and yield the ``(path, tokens)`` pairs in compile order.
+    """
+    return lex_files(parse_src(src_path), jobs, options, encoding)
+
+
+def collect_scripts(paths: Iterable[str]) -> list[str]:
+    """
+    Return the scripts to process for the ``paths`` given on a command line:
+    `.src` files are parsed, directories are searched recursively for `.d` files in name order.
+    """
+    scripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, directories, files in os.walk(path):
+                directories.sort(key=str.casefold)
+                files = sorted(files, key=str.casefold)
+                scripts.extend(os.path.join(root, name) for name in files if name.casefold().endswith(".d"))
+        elif path.casefold().endswith(".src"):
+            scripts.extend(parse_src(path))
+        else:
+            scripts.append(path)
+    return scripts
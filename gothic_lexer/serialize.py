@@ -0,0 +1,142 @@
+"""
+Compact binary format for token streams, to cache lexed scripts without re-lexing them.
+
+    data = dumps(DaedalusLexer().get_tokens_unprocessed(source), source)
+    tokens = loads(data)
+
+Layout, all integers are unsigned LEB128 varints:
+
+    b"GLTS", version byte, flags byte (1: zlib-compressed payload, 2: text included)
+    payload:
+        number of token types, then for each its length and UTF-8 name, e.g. "Token.Name.Function"
+        if the text is included, its UTF-8 length and the UTF-8 text
+        number of tokens, then for each the offset delta from the end of the previous token,
+        the length of its value in characters and its index in the token type table
+
+The values are slices of the text, so loading needs either the included text or the original one.
+"""
+import zlib
+from typing import Iterable
+
+from pygments.token import _TokenType
+
+from .batch import token_type
+
+MAGIC: bytes = b"GLTS"
+VERSION: int = 1
+
+COMPRESSED: int = 1
+WITH_TEXT: int = 2
+
+
+class FormatError(ValueError):
+    """Raised for data that isn't a token stream in a supported version."""
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Append the unsigned LEB128 varint of ``value`` to ``buffer``."""
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Return the unsigned LEB128 varint at ``pos`` of ``data`` and the offset after it."""
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos + 1
+        shift += 7
+
+
+def dumps(
+    tokens: Iterable[tuple[int, _TokenType, str]], text: str, compress: bool = True, include_text: bool = True
+) -> bytes:
+    """Serialize the ``(index, tokentype, value)`` triples of `get_tokens_unprocessed` for ``text``."""
+    type_ids: dict[_TokenType, int] = {}
+    body = bytearray()
+    count = 0
+    end = 0
+    for index, token, value in tokens:
+        type_id = type_ids.get(token)
+        if type_id is None:
+            type_id = type_ids[token] = len(type_ids)
+        if index < end:
+            raise ValueError("the tokens must be in text order")
+        write_varint(body, index - end)
+        write_varint(body, len(value))
+        write_varint(body, type_id)
+        end = index + len(value)
+        count += 1
+
+    payload = bytearray()
+    write_varint(payload, len(type_ids))
+    for token in type_ids:
+        name = str(token).encode()
+        write_varint(payload, len(name))
+        payload += name
+    if include_text:
+        encoded = text.encode("utf-8", "surrogatepass")
+        write_varint(payload, len(encoded))
+        payload += encoded
+    write_varint(payload, count)
+    payload += body
+
+    flags = (COMPRESSED if compress else 0) | (WITH_TEXT if include_text else 0)
+    return MAGIC + bytes((VERSION, flags)) + (zlib.compress(payload) if compress else bytes(payload))
+
+
+def loads(data: bytes, text: str | None = None) -> list[tuple[int, _TokenType, str]]:
+    """
+    Deserialize the ``(index, tokentype, value)`` triples written by `dumps`.
+    The ``text`` is required if it wasn't included in the data.
+    """
+    if data[:4] != MAGIC:
+        raise FormatError("not a token stream")
+    if data[4] != VERSION:
+        raise FormatError(f"unsupported token stream version {data[4]}")
+    flags = data[5]
+    payload = zlib.decompress(data[6:]) if flags & COMPRESSED else memoryview(data)[6:]
+
+    type_count, pos = read_varint(payload, 0)
+    types = []
+    for _ in range(type_count):
+        length, pos = read_varint(payload, pos)
+        types.append(token_type(bytes(payload[pos:pos + length]).decode()))
+        pos += length
+    if flags & WITH_TEXT:
+        length, pos = read_varint(payload, pos)
+        included = bytes(payload[pos:pos + length]).decode("utf-8", "surrogatepass")
+        text = text if text is not None else included
+        pos += length
+    elif text is None:
+        raise ValueError("the token stream doesn't include the text, pass the lexed text")
+
+    count, pos = read_varint(payload, pos)
+    tokens = []
+    end = 0
+    for _ in range(count):
+        # almost every token starts where the previous one ended and is shorter than 128 characters
+        delta = payload[pos]
+        if delta < 0x80:
+            pos += 1
+        else:
+            delta, pos = read_varint(payload, pos)
+        length = payload[pos]
+        if length < 0x80:
+            pos += 1
+        else:
+            length, pos = read_varint(payload, pos)
+        type_id, pos = read_varint(payload, pos)
+        index = end + delta
+        end = index + length
+        tokens.append((index, types[type_id], text[index:end]))
+    return tokens
@@ -0,0 +1,177 @@
+"""
+Pool lexing that returns the tokens through shared memory instead of pickling them.
+
+Each worker writes the offsets, lengths and type ids of the tokens of a script into a
+`multiprocessing.shared_memory` block and returns only its name, the token count and the type table.
+The parent maps the block and slices the values from the script text when they are accessed:
+
+    for path, tokens in lex_files_shared(paths, jobs=8):
+        with tokens:
+            for index, token, value in tokens:
+                ...
+"""
+import os
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterable, Iterator
+
+from pygments.token import _TokenType
+
+from .batch import ENCODING, read_script, token_type
+from .daedalus import DaedalusLexer
+
+# offsets and lengths are unsigned 32-bit, type ids unsigned 16-bit
+_INT: str = "I"
+_TYPE: str = "H"
+
+
+def _lex_to_shared_memory(path: str, options: dict | None, encoding: str) -> tuple[str | None, int, list[str]]:
+    type_ids: dict[_TokenType, int] = {}
+    offsets = array(_INT)
+    lengths = array(_INT)
+    types = array(_TYPE)
+    lexer = DaedalusLexer(**(options or {}))
+    for index, token, value in lexer.get_tokens_unprocessed(read_script(path, encoding)):
+        type_id = type_ids.get(token)
+        if type_id is None:
+            type_id = type_ids[token] = len(type_ids)
+        offsets.append(index)
+        lengths.append(len(value))
+        types.append(type_id)
+
+    count = len(offsets)
+    type_names = [str(token) for token in type_ids]
+    if not count:
+        return None, 0, type_names
+
+    size = count * (2 * offsets.itemsize + types.itemsize)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    # the parent owns the block, the worker must not unlink it when it exits
+    resource_tracker.unregister(block._name, "shared_memory")
+    position = 0
+    for values in (offsets, lengths, types):
+        data = values.tobytes()
+        block.buf[position:position + len(data)] = data
+        position += len(data)
+    name = block.name
+    block.close()
+    return name, count, type_names
+
+
+class TokenBuffer(Sequence):
+    """
+    The ``(index, tokentype, value)`` triples of a script lexed by a worker, backed by a shared memory block.
+    The values are sliced from the script text, read on first access.
+    """
+
+    def __init__(
+        self, path: str, name: str | None, count: int, type_names: list[str], encoding: str = ENCODING
+    ) -> None:
+        self._block = None
+        self.path = path
+        self.encoding = encoding
+        self._count = count
+        self._types = [token_type(type_name) for type_name in type_names]
+        self._text: str | None = None
+        if name is None:
+            self.offsets = self.lengths = self.type_ids = memoryview(b"").cast(_INT)
+            return
+
+        self._block = shared_memory.SharedMemory(name=name)
+        # the mapping stays valid after unlinking, the memory is freed once the buffer is closed or collected
+        self._block.unlink()
+        int_size = array(_INT).itemsize
+        buffer = self._block.buf
+        self.offsets = buffer[:count * int_size].cast(_INT)
+        self.lengths = buffer[count * int_size:2 * count * int_size].cast(_INT)
+        self.type_ids = buffer[2 * count * int_size:2 * count * int_size + count * array(_TYPE).itemsize].cast(_TYPE)
+
+    @property
+    def text(self) -> str:
+        """The lexed script text."""
+        if self._text is None:
+            self._text = read_script(self.path, self.encoding)
+        return self._text
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[number] for number in range(*item.indices(self._count))]
+        if item < 0:
+            item += self._count
+        if not 0 <= item < self._count:
+            raise IndexError("token index out of range")
+        offset = self.offsets[item]
+        return offset, self._types[self.type_ids[item]], self.text[offset:offset + self.lengths[item]]
+
+    def __iter__(self) -> Iterator[tuple[int, _TokenType, str]]:
+        if not self._count:
+            return
+        text = self.text
+        types = self._types
+        for offset, length, type_id in zip(self.offsets, self.lengths, self.type_ids):
+            yield offset, types[type_id], text[offset:offset + length]
+
+    def close(self) -> None:
+        """Release the shared memory block, the buffer can't be used afterwards."""
+        if self._block is not None:
+            self.offsets.release()
+            self.lengths.release()
+            self.type_ids.release()
+            self._block.close()
+            self._block = None
+        self._count = 0
+
+    def __del__(self) -> None:
+        # the views have to be released before the block is closed, which it otherwise does when collected
+        self.close()
+
+    def __enter__(self) -> "TokenBuffer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _unlink(name: str | None) -> None:
+    if name is not None:
+        block = shared_memory.SharedMemory(name=name)
+        block.close()
+        block.unlink()
+
+
+def lex_files_shared(
+    paths: Iterable[str], jobs: int | None = None, options: dict | None = None, encoding: str = ENCODING
+) -> Iterator[tuple[str, TokenBuffer]]:
+    """
+    Lex the scripts on a pool of ``jobs`` processes, all CPUs by default, and yield the ``(path, tokens)`` pairs
+    in the order of the ``paths``, with the tokens in a shared memory `TokenBuffer`.
+    The blocks of the scripts not yielded yet are unlinked when the iteration stops early.
+    """
+    paths = list(paths)
+    jobs = min(jobs or os.cpu_count() or 1, len(paths) or 1)
+    if jobs == 1:
+        for path in paths:
+            yield path, TokenBuffer(path, *_lex_to_shared_memory(path, options, encoding), encoding)
+        return
+
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [executor.submit(_lex_to_shared_memory, path, options, encoding) for path in paths]
+        wrapped = 0
+        try:
+            for path, future in zip(paths, futures):
+                tokens = TokenBuffer(path, *future.result(), encoding)
+                wrapped += 1
+                yield path, tokens
+        finally:
+            # the workers unregistered the blocks from the resource tracker, only the parent can free them
+            pending = futures[wrapped:]
+            for future in pending:
+                future.cancel()
+            for future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    _unlink(future.result()[0])
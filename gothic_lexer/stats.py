@@ -0,0 +1,133 @@
+"""
+Usage statistics of script trees, counted in one lexing pass: the engine externals and zParserExtender functions
+called, the LeGo and Ikarus calls, the declarations by kind and the `Error` tokens, per file and for the whole tree.
+
+    usage = count_files(collect_scripts(["Scripts/Content"]), jobs=8)
+    usage.total.dependencies()  # e.g. ["ikarus", "lego"]
+    usage.files["Scripts/Content/Story/B_Story.d"].externals.most_common(10)
+
+    python -m gothic_lexer stats Scripts/Content --jobs 8 --format json --output stats.json
+
+Names are counted in upper case, the game ignores their case. The counters of the files are counted
+by the worker processes and merged by the caller.
+"""
+from collections import Counter
+from typing import Iterable, TextIO
+
+from pygments.token import Error, Name
+
+from .batch import ENCODING, map_files, read_script
+from .daedalus import DaedalusLexer, Declaration, Externals, ZParserExtender
+from .libraries import LibraryTable
+
+
+class Usage:
+    """Counters of the builtins, library calls, declarations and errors of a script or of many scripts."""
+
+    def __init__(self) -> None:
+        self.externals: Counter[str] = Counter()
+        self.zparserextender: Counter[str] = Counter()
+        self.libraries: Counter[str] = Counter()
+        self.declarations: Counter[str] = Counter()
+        self.errors: int = 0
+
+    def count(self, tokens: Iterable[tuple]) -> "Usage":
+        """Count the ``(index, tokentype, value)`` triples of `DaedalusLexer.get_tokens_unprocessed`."""
+        externals = self.externals
+        zparserextender = self.zparserextender
+        libraries = self.libraries
+        declarations = self.declarations
+        Other = Name.Builtin.Other
+        for _, token, value in tokens:
+            if token is Externals:
+                externals[value.upper()] += 1
+            elif token is ZParserExtender:
+                zparserextender[value.upper()] += 1
+            elif token is Other:
+                libraries[value.upper()] += 1
+            elif token is Declaration:
+                declarations[value.lower()] += 1
+            elif token is Error:
+                self.errors += 1
+        return self
+
+    def merge(self, other: "Usage") -> None:
+        """Add the counters of another `Usage`."""
+        self.externals.update(other.externals)
+        self.zparserextender.update(other.zparserextender)
+        self.libraries.update(other.libraries)
+        self.declarations.update(other.declarations)
+        self.errors += other.errors
+
+    def dependencies(self, table: LibraryTable | None = None) -> list[str]:
+        """
+        Return the libraries and engine extensions the scripts call, e.g. ``ikarus``, ``lego``, ``zparserextender``.
+        The library calls are looked up in the ``table``, the default Ikarus and LeGo prefixes if not given.
+        """
+        table = table or LibraryTable.default()
+        found = {table.get(name) for name in self.libraries} - {None}
+        if self.zparserextender:
+            found.add("zparserextender")
+        return sorted(found)
+
+    def to_dict(self) -> dict:
+        """Return the counters, most common first, as a JSON-serializable dict."""
+        return {
+            "dependencies": self.dependencies(),
+            "externals": dict(self.externals.most_common()),
+            "zparserextender": dict(self.zparserextender.most_common()),
+            "libraries": dict(self.libraries.most_common()),
+            "declarations": dict(self.declarations.most_common()),
+            "errors": self.errors,
+        }
+
+
+def count_usage(text: str, lexer: DaedalusLexer | None = None) -> Usage:
+    """Lex ``text`` and return its `Usage`."""
+    return Usage().count((lexer or DaedalusLexer()).get_tokens_unprocessed(text))
+
+
+def count_file(path: str, encoding: str = ENCODING) -> Usage:
+    """Read and lex the script at ``path`` and return its `Usage`."""
+    return count_usage(read_script(path, encoding))
+
+
+class TreeUsage:
+    """The `Usage` of every file of a tree and their sum."""
+
+    def __init__(self) -> None:
+        self.files: dict[str, Usage] = {}
+        self.total = Usage()
+
+    def observe(self, path: str, usage: Usage) -> None:
+        """Add the `Usage` of a file."""
+        self.files[path] = usage
+        self.total.merge(usage)
+
+    def to_json(self) -> dict:
+        """Return the total and the per-file counters as a JSON-serializable dict."""
+        return {"total": self.total.to_dict(), "files": {path: usage.to_dict() for path, usage in self.files.items()}}
+
+    def write_text(self, file: TextIO, top: int = 20) -> None:
+        """Write a summary of the total with the ``top`` most common names of every counter."""
+        total = self.total
+        file.write(f"files: {len(self.files)}\n")
+        file.write(f"dependencies: {', '.join(total.dependencies()) or 'none'}\n")
+        file.write(f"errors: {total.errors}\n")
+        for title, counter in (
+            ("declarations", total.declarations),
+            ("externals", total.externals),
+            ("zparserextender", total.zparserextender),
+            ("libraries", total.libraries),
+        ):
+            file.write(f"{title}: {len(counter)} distinct, {sum(counter.values())} total\n")
+            for name, count in counter.most_common(top):
+                file.write(f"  {count:8} {name}\n")
+
+
+def count_files(paths: Iterable[str], jobs: int | None = None, encoding: str = ENCODING) -> TreeUsage:
+    """Lex the scripts on a pool of ``jobs`` processes and return their `TreeUsage`."""
+    usage = TreeUsage()
+    for path, file_usage in map_files(count_file, paths, jobs, encoding):
+        usage.observe(path, file_usage)
+    return usage
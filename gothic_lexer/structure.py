@@ -0,0 +1,176 @@
+"""
+Outline, folding ranges and matching brackets of Daedalus scripts,
+collected from the `DaedalusLexer` state transitions in the same pass as the tokenization.
+
+    builder = StructureBuilder()
+    tokens = list(builder.lex(DaedalusLexer(), source))
+    structure = builder.structure
+
+Line numbers are zero-based, like in the Language Server Protocol.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+
+from pygments.token import Keyword, Name, Punctuation
+
+from .daedalus import DaedalusLexer
+
+# states that become an entry in the outline, mapped to whether they are named
+_OUTLINE_STATES: dict[str, bool] = {
+    "class": True,
+    "namespace": True,
+    "function-declaration": True,
+    "instance-prototype": True,
+    "meta": False,
+    "var": True,
+}
+
+# states that can be folded, mapped to the folding range kind
+_FOLDING_STATES: dict[str, str] = {
+    "class": "region",
+    "namespace": "region",
+    "function-declaration": "region",
+    "instance-prototype": "region",
+    "meta": "region",
+    "if-block": "region",
+    "comment-block": "comment",
+}
+
+_OPENING_BRACKETS: dict[str, str] = {"(": ")", "[": "]", "{": "}"}
+_CLOSING_BRACKETS: dict[str, str] = {")": "(", "]": "[", "}": "{"}
+
+
+@dataclass
+class OutlineItem:
+    """A declaration of the script: class, namespace, function, instance, prototype, meta, var or const."""
+
+    kind: str
+    name: str
+    start: int
+    end: int = -1
+    children: list["OutlineItem"] = field(default_factory=list)
+
+
+@dataclass
+class FoldingRange:
+    """A foldable block spanning the lines from ``start_line`` to ``end_line`` inclusive."""
+
+    start_line: int
+    end_line: int
+    kind: str
+
+
+@dataclass
+class Structure:
+    """
+    The structure of a script.
+    ``brackets`` maps the offset of every matched bracket to the offset of its counterpart,
+    ``unmatched_brackets`` holds the offsets of brackets without one.
+    """
+
+    outline: list[OutlineItem] = field(default_factory=list)
+    folding_ranges: list[FoldingRange] = field(default_factory=list)
+    brackets: dict[int, int] = field(default_factory=dict)
+    unmatched_brackets: list[int] = field(default_factory=list)
+
+
+class StructureBuilder:
+    """
+    Listener for the `DaedalusLexer` state transitions building the `Structure` of the lexed script.
+    The builder has to be fed every token, use `lex` to do both at once.
+    """
+
+    def __init__(self) -> None:
+        self.structure = Structure()
+        self._newlines: list[int] = []
+        self._states: list[tuple[str, int, OutlineItem | None]] = []
+        self._items: list[OutlineItem] = []
+        self._brackets: list[tuple[str, int]] = []
+        self._last_name: str = ""
+        self._last_declaration: str = ""
+        self._unnamed: OutlineItem | None = None
+
+    def lex(self, lexer: DaedalusLexer, text: str, stack=("root",)):
+        """Yield the ``(index, tokentype, value)`` triples of ``text`` while building the structure."""
+        for token in lexer.get_tokens_unprocessed(text, stack, listener=self):
+            self.token(*token)
+            yield token
+        self.close(len(text))
+
+    def line(self, offset: int) -> int:
+        """Return the line of an ``offset`` the builder has been fed tokens up to."""
+        return bisect_right(self._newlines, offset - 1)
+
+    def token(self, index: int, token, value: str) -> None:
+        """Feed a single token, in the order the lexer yields them."""
+        newline = value.find("\n")
+        while newline != -1:
+            self._newlines.append(index + newline)
+            newline = value.find("\n", newline + 1)
+
+        if token in Keyword.Declaration:
+            self._last_declaration = value.lower()
+        elif token in Name:
+            self._last_name = value
+            if self._unnamed is not None:
+                self._unnamed.name = value
+                self._unnamed = None
+        elif token in Punctuation and value[0] in "([{}])":
+            self._bracket(value[0], index)
+
+    def enter(self, state: str, start: int, end: int) -> None:
+        """Called by the lexer when it enters a ``state``."""
+        item = None
+        if state in _OUTLINE_STATES:
+            item = OutlineItem(self._last_declaration, "", start)
+            if state == "instance-prototype":
+                # the name follows the match that entered the state
+                self._unnamed = item
+            elif _OUTLINE_STATES[state]:
+                item.name = self._last_name
+            (self._items[-1].children if self._items else self.structure.outline).append(item)
+            self._items.append(item)
+        self._states.append((state, start, item))
+
+    def leave(self, state: str, start: int, end: int) -> None:
+        """Called by the lexer when it leaves a ``state``."""
+        if not self._states:
+            return
+        _, opened, item = self._states.pop()
+        if item is not None:
+            item.end = end
+            self._items.pop()
+
+        kind = _FOLDING_STATES.get(state)
+        if kind is None or (kind == "comment" and self._states and self._states[-1][0] == state):
+            return
+        start_line = self.line(opened)
+        end_line = self.line(end - 1)
+        if end_line > start_line:
+            self.structure.folding_ranges.append(FoldingRange(start_line, end_line, kind))
+
+    def close(self, end: int) -> None:
+        """Close the blocks left open at the end of the text."""
+        while self._states:
+            self.leave(self._states[-1][0], end, end)
+        self.structure.folding_ranges.sort(key=lambda folding_range: folding_range.start_line)
+        self.structure.unmatched_brackets.extend(index for _, index in self._brackets)
+        self.structure.unmatched_brackets.sort()
+        self._brackets.clear()
+
+    def _bracket(self, bracket: str, index: int) -> None:
+        if bracket in _OPENING_BRACKETS:
+            self._brackets.append((bracket, index))
+        elif self._brackets and self._brackets[-1][0] == _CLOSING_BRACKETS[bracket]:
+            _, opening = self._brackets.pop()
+            self.structure.brackets[opening] = index
+            self.structure.brackets[index] = opening
+        else:
+            self.structure.unmatched_brackets.append(index)
+
+
+def get_structure(text: str, lexer: DaedalusLexer | None = None) -> tuple[list, Structure]:
+    """Lex ``text`` and return its ``(index, tokentype, value)`` triples together with its `Structure`."""
+    builder = StructureBuilder()
+    tokens = list(builder.lex(lexer or DaedalusLexer(), text))
+    return tokens, builder.structure
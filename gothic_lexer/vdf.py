@@ -0,0 +1,265 @@
+"""
+Reading scripts directly from the `.vdf` and `.mod` volumes of the game, without extracting them.
+
+    with Volume("Data/MyMod.mod") as volume:
+        text = volume.read_text("_WORK/DATA/SCRIPTS/CONTENT/STORY/B_GIVEINVITEMS.D")
+
+    for name, tokens in lex_volume("Data/MyMod.mod", jobs=8):
+        ...
+
+The volume is memory-mapped and the scripts are decoded straight from the mapping.
+Layout, all integers are unsigned 32-bit little-endian:
+
+    header, 296 bytes:
+        comment, 256 bytes, padded with 0x1A
+        signature, 16 bytes, b"PSVDSC_V2.00\\r\\n\\r\\n" or b"PSVDSC_V2.00\\n\\r\\n\\r"
+        number of entries, number of files, DOS timestamp, size of the file data,
+        offset of the directory table, size of an entry (80)
+    directory table, 80 bytes per entry:
+        name, 64 bytes, padded with spaces
+        offset of the data of a file, or the index of the first entry of a directory
+        size of the data, type flags (0x80000000: directory, 0x40000000: last entry of its directory), attributes
+
+The entries of a directory are consecutive, the root directory starts at the first entry.
+"""
+import fnmatch
+import mmap
+import struct
+from typing import Callable, Iterable, Iterator, Mapping, NamedTuple
+
+from pygments.token import _TokenType
+
+from .batch import ENCODING, lex_text, map_files, restore_tokens
+
+SIGNATURES: tuple[bytes, ...] = (b"PSVDSC_V2.00\r\n\r\n", b"PSVDSC_V2.00\n\r\n\r")
+
+DIRECTORY: int = 0x80000000
+LAST: int = 0x40000000
+
+_HEADER: struct.Struct = struct.Struct("<256s16s6I")
+_ENTRY: struct.Struct = struct.Struct("<64s4I")
+# the names of the entries are encoded in the Windows code page like the scripts
+_NAME_ENCODING: str = "cp1252"
+
+
+class VolumeError(ValueError):
+    """Raised for a file that isn't a volume or whose directory table is invalid."""
+
+
+class VolumeEntry(NamedTuple):
+    """A file of a volume, ``name`` is its path with ``/`` separators."""
+
+    name: str
+    offset: int
+    size: int
+
+
+def _normalize(name: str) -> str:
+    return name.replace("\\", "/").strip("/").casefold()
+
+
+class Volume:
+    """A memory-mapped `.vdf` or `.mod` volume."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file can't be mapped
+            self._file.close()
+            raise VolumeError("not a volume: the file is empty") from None
+        try:
+            self.entries: Mapping[str, VolumeEntry] = self._read_table()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_table(self) -> dict[str, VolumeEntry]:
+        if len(self._map) < _HEADER.size:
+            raise VolumeError("not a volume: the file is too short")
+        _, signature, count, _, _, _, table, entry_size = _HEADER.unpack_from(self._map)
+        if signature not in SIGNATURES:
+            raise VolumeError("not a volume: unknown signature")
+        if entry_size != _ENTRY.size or table + count * entry_size > len(self._map):
+            raise VolumeError("the directory table is invalid")
+
+        entries = {}
+        visited = set()
+        # (index of the first entry of a directory, its path prefix)
+        directories = [(0, "")] if count else []
+        while directories:
+            index, prefix = directories.pop()
+            while True:
+                if index >= count or index in visited:
+                    raise VolumeError("the directory table is invalid")
+                visited.add(index)
+                raw_name, jump, size, flags, _ = _ENTRY.unpack_from(self._map, table + index * entry_size)
+                name = prefix + raw_name.rstrip(b" \0").decode(_NAME_ENCODING)
+                if flags & DIRECTORY:
+                    directories.append((jump, name + "/"))
+                elif jump + size > len(self._map):
+                    raise VolumeError(f"the data of {name} is out of bounds")
+                else:
+                    entries[name.casefold()] = VolumeEntry(name, jump, size)
+                if flags & LAST:
+                    break
+                index += 1
+        return entries
+
+    def __iter__(self) -> Iterator[VolumeEntry]:
+        return iter(self.entries.values())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return _normalize(name) in self.entries
+
+    def find(self, *patterns: str) -> list[VolumeEntry]:
+        """Return the files whose name matches any of the case-insensitive wildcard ``patterns``, in name order."""
+        patterns = tuple(_normalize(pattern) for pattern in patterns)
+        matches = []
+        for key, entry in self.entries.items():
+            # patterns without a directory match the file name in any directory
+            candidates = (key, key.rsplit("/", 1)[-1])
+            if any(fnmatch.fnmatchcase(candidate, pattern) for pattern in patterns for candidate in candidates):
+                matches.append(entry)
+        return sorted(matches, key=lambda entry: entry.name.casefold())
+
+    def scripts(self) -> list[VolumeEntry]:
+        """Return the `.d` and `.src` files of the volume in name order."""
+        return self.find("*.d", "*.src")
+
+    def read(self, name: str) -> bytes:
+        """Return the data of the file ``name``, looked up case-insensitively with either separator."""
+        entry = self.entries[_normalize(name)]
+        return self._map[entry.offset:entry.offset + entry.size]
+
+    def read_text(self, name: str, encoding: str = ENCODING) -> str:
+        """Decode the file ``name`` straight from the mapping, replacing the bytes that aren't valid."""
+        entry = self.entries[_normalize(name)]
+        with memoryview(self._map) as view, view[entry.offset:entry.offset + entry.size] as data:
+            return str(data, encoding, "replace")
+
+    def close(self) -> None:
+        """Unmap and close the volume."""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "Volume":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_volume(path: str, files: Mapping[str, bytes], comment: str = "", timestamp: int = 0) -> None:
+    """
+    Write a volume with the ``files`` mapping names with ``/`` or ``\\`` separators to their data,
+    the directories are created from the names.
+    """
+    tree: dict = {}
+    for name, data in files.items():
+        *directories, file_name = name.replace("\\", "/").strip("/").split("/")
+        node = tree
+        for directory in directories:
+            node = node.setdefault(directory, {})
+        node[file_name] = data
+
+    # lay out the directories breadth first, each one as a block of consecutive entries
+    table = []
+    blobs = []
+    blocks = [tree]
+    data_offset = _HEADER.size + _ENTRY.size * _count_entries(tree)
+    while blocks:
+        node = blocks.pop(0)
+        items = sorted(node.items(), key=lambda item: item[0].casefold())
+        for number, (name, value) in enumerate(items):
+            flags = LAST if number == len(items) - 1 else 0
+            if isinstance(value, dict):
+                first = len(table) + len(items) - number + sum(len(block) for block in blocks)
+                table.append((name, first, 0, flags | DIRECTORY))
+                blocks.append(value)
+            else:
+                table.append((name, data_offset, len(value), flags))
+                blobs.append(value)
+                data_offset += len(value)
+
+    with open(path, "wb") as file:
+        file.write(
+            _HEADER.pack(
+                comment.encode(_NAME_ENCODING).ljust(256, b"\x1a"),
+                SIGNATURES[0],
+                len(table),
+                len(blobs),
+                timestamp,
+                sum(len(blob) for blob in blobs),
+                _HEADER.size,
+                _ENTRY.size,
+            )
+        )
+        for name, jump, size, flags in table:
+            file.write(_ENTRY.pack(name.upper().encode(_NAME_ENCODING).ljust(64, b" "), jump, size, flags, 0))
+        for blob in blobs:
+            file.write(blob)
+
+
+def _count_entries(tree: dict) -> int:
+    return sum(1 + (_count_entries(value) if isinstance(value, dict) else 0) for value in tree.values())
+
+
+# the workers keep their volumes mapped between the entries they process
+_VOLUMES: dict[str, Volume] = {}
+
+
+def _open_volume(path: str) -> Volume:
+    volume = _VOLUMES.get(path)
+    if volume is None:
+        volume = _VOLUMES[path] = Volume(path)
+    return volume
+
+
+def _apply(name: str, volume_path: str, function: Callable, encoding: str, *args):
+    return function(_open_volume(volume_path).read_text(name, encoding), *args)
+
+
+def map_entries(
+    function: Callable,
+    volume_path: str,
+    names: Iterable[str] | None = None,
+    jobs: int | None = None,
+    encoding: str = ENCODING,
+    *args,
+) -> Iterator[tuple[str, object]]:
+    """
+    Call ``function(text, *args)`` with the decoded text of every entry ``name``, all scripts by default,
+    on a pool of ``jobs`` processes and yield the ``(name, result)`` pairs in the order of the names.
+    Each worker maps the volume once, only the names and results are sent between the processes.
+    """
+    if names is None:
+        with Volume(volume_path) as volume:
+            names = [entry.name for entry in volume.scripts()]
+    try:
+        yield from map_files(_apply, names, jobs, volume_path, function, encoding, *args)
+    finally:
+        # a single job runs in this process, don't keep the volume mapped
+        volume = _VOLUMES.pop(volume_path, None)
+        if volume is not None:
+            volume.close()
+
+
+def lex_volume(
+    volume_path: str,
+    names: Iterable[str] | None = None,
+    jobs: int | None = None,
+    options: dict | None = None,
+    encoding: str = ENCODING,
+) -> Iterator[tuple[str, list[tuple[_TokenType, str]]]]:
+    """
+    Lex the entries of a volume, all scripts by default, on a pool of ``jobs`` processes,
+    and yield the ``(name, tokens)`` pairs in the order of the names.
+    """
+    for name, tokens in map_entries(lex_text, volume_path, names, jobs, encoding, options):
+        yield name, restore_tokens(tokens)
@@ -0,0 +1,145 @@
+"""
+Watch mode keeping the token caches and the identifier index of a script tree up to date.
+
+    python -m gothic_lexer watch Scripts/Content --cache .token-cache --index scripts.idx
+
+The modification times of the `.d` files are polled, no file system notification service is needed.
+Bursts of saves are coalesced into a single update, which re-lexes only the changed files.
+"""
+import hashlib
+import os
+import time
+from typing import Callable
+
+from pygments.token import _TokenType
+
+from .batch import ENCODING, map_files, read_script
+from .daedalus import DaedalusLexer
+from .index import IdentifierIndex, index_tokens
+from .serialize import dumps, loads
+
+
+def cache_path(cache_dir: str, path: str) -> str:
+    """Return the path of the token cache of the script at ``path``."""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(cache_dir, digest + ".glts")
+
+
+def _relex(path: str, cache_dir: str | None, encoding: str) -> tuple[int, list[tuple[str, int, str, bool]]]:
+    mtime = os.stat(path).st_mtime_ns
+    text = read_script(path, encoding)
+    tokens = list(DaedalusLexer().get_tokens_unprocessed(text))
+    if cache_dir is not None:
+        temporary = cache_path(cache_dir, path) + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(dumps(tokens, text))
+        os.replace(temporary, cache_path(cache_dir, path))
+    return mtime, [(name, offset, str(token), definition) for name, offset, token, definition in index_tokens(tokens)]
+
+
+class Watcher:
+    """
+    Keeps the token caches in ``cache_dir`` and the index saved at ``index_path`` in sync with the `.d` files
+    in ``directory``. Changes are applied once no file changed for ``settle`` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        cache_dir: str | None = None,
+        index_path: str | None = None,
+        interval: float = 0.5,
+        settle: float = 0.3,
+        jobs: int | None = None,
+        encoding: str = ENCODING,
+    ) -> None:
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.index_path = index_path
+        self.interval = interval
+        self.settle = settle
+        self.jobs = jobs
+        self.encoding = encoding
+        self._mtimes: dict[str, int] | None = None
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.index = IdentifierIndex()
+        if index_path is not None and os.path.exists(index_path):
+            self.index = IdentifierIndex.load(index_path)
+
+    def scan(self) -> dict[str, int]:
+        """Return the `.d` files of the watched directory mapped to their modification times in nanoseconds."""
+        mtimes = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.casefold().endswith(".d"):
+                    path = os.path.join(root, name)
+                    try:
+                        mtimes[path] = os.stat(path).st_mtime_ns
+                    except OSError:
+                        pass
+        return mtimes
+
+    def _is_stale(self, path: str, mtime: int, indexed: dict[str, int]) -> bool:
+        if self.cache_dir is not None:
+            cached = cache_path(self.cache_dir, path)
+            if not os.path.exists(cached) or os.stat(cached).st_mtime_ns < mtime:
+                return True
+        return self.index_path is not None and indexed.get(path) != mtime
+
+    def poll(self) -> tuple[set[str], set[str]]:
+        """
+        Return the files changed and removed since the last poll.
+        On the first poll the files with a missing or outdated cache or index entry are changed.
+        """
+        mtimes = self.scan()
+        if self._mtimes is None:
+            indexed = self.index.files
+            changed = {path for path, mtime in mtimes.items() if self._is_stale(path, mtime, indexed)}
+            removed = set(indexed) - set(mtimes)
+        else:
+            changed = {path for path, mtime in mtimes.items() if self._mtimes.get(path) != mtime}
+            removed = set(self._mtimes) - set(mtimes)
+        self._mtimes = mtimes
+        return changed, removed
+
+    def update(self, changed: set[str], removed: set[str]) -> None:
+        """Re-lex the ``changed`` files on the pool, drop the ``removed`` ones and save the index."""
+        for path in removed:
+            self.index.remove(path)
+            if self.cache_dir is not None and os.path.exists(cache_path(self.cache_dir, path)):
+                os.remove(cache_path(self.cache_dir, path))
+        for path, (mtime, postings) in map_files(_relex, sorted(changed), self.jobs, self.cache_dir, self.encoding):
+            self.index.update_named(path, postings, mtime)
+        if self.index_path is not None:
+            self.index.save(self.index_path)
+
+    def tokens(self, path: str) -> list[tuple[int, _TokenType, str]]:
+        """Return the cached ``(index, tokentype, value)`` triples of a watched script."""
+        if self.cache_dir is None:
+            raise ValueError("the watcher has no token cache")
+        with open(cache_path(self.cache_dir, path), "rb") as file:
+            return loads(file.read())
+
+    def run(
+        self,
+        stop: Callable[[], bool] = lambda: False,
+        on_update: Callable[[set[str], set[str]], None] | None = None,
+    ) -> None:
+        """Poll every ``interval`` seconds until ``stop()`` returns true, applying the coalesced changes."""
+        changed: set[str] = set()
+        removed: set[str] = set()
+        last_change = 0.0
+        while not stop():
+            new_changed, new_removed = self.poll()
+            if new_changed or new_removed:
+                changed = (changed | new_changed) - new_removed
+                removed = (removed | new_removed) - new_changed
+                last_change = time.monotonic()
+            if (changed or removed) and time.monotonic() - last_change >= self.settle:
+                self.update(changed, removed)
+                if on_update is not None:
+                    on_update(changed, removed)
+                changed, removed = set(), set()
+            time.sleep(self.interval)
@@ -18,5 +18,8 @@ setup(
         "pygments.lexers": [
             "dae=gothic_lexer:DaedalusLexer",
         ],
+        "pygments.formatters": [
+            "daedalus-html=gothic_lexer.formatter:DaedalusHtmlFormatter",
+        ],
     },
 )
@@ -48,7 +48,8 @@ CORRECT_TOKENS = [
     (Token.Punctuation, ')'),
     (Token.Punctuation, ';'),
     (Token.Text.Whitespace, '\n'),
-    (Token.Name, 'call_test_notworking'),
+    # library prefixes are matched case-insensitively, like the game matches names
+    (Token.Name.Builtin.Other, 'call_test_notworking'),
     (Token.Punctuation, '('),
     (Token.Literal.Number.Integer, '222'),
     (Token.Punctuation, ')'),
@@ -0,0 +1,18 @@
+"""
+Points the cache of the compiled lexer modules at a temporary directory for the whole test run, so that the tests
+don't write into ``~/.cache/gothic_lexer``. The test modules building compiled lexers import it first, the processes
+they start inherit the directory.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+if "GOTHIC_LEXER_TEST_CACHE" not in os.environ:
+    os.environ["GOTHIC_LEXER_TEST_CACHE"] = os.environ["GOTHIC_LEXER_CACHE"] = tempfile.mkdtemp(prefix="gothic-lexer-")
+    _owner = os.getpid()
+
+    @atexit.register
+    def _remove() -> None:
+        if os.getpid() == _owner:
+            shutil.rmtree(os.environ["GOTHIC_LEXER_TEST_CACHE"], ignore_errors=True)
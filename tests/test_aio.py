@@ -0,0 +1,90 @@
+"""
+Test suite for the asyncio tokenization
+"""
+import asyncio
+import os
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import temporary_cache  # noqa: F401
+from pygments.token import Keyword
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.aio import get_tokens_in_executor
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+
+class ReturnLexer(DaedalusLexer):
+    """Highlights ``return`` as a declaration."""
+
+    def get_tokens_unprocessed(self, text, *args, **kwargs):
+        for index, token, value in super().get_tokens_unprocessed(text, *args, **kwargs):
+            yield index, Keyword.Declaration if value.lower() == "return" else token, value
+
+
+class AioTest(unittest.TestCase):
+    """
+    Aio TestCase Class
+    """
+
+    def setUp(self) -> None:
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            self.source: str = file.read()
+        self.expected = list(DaedalusLexer().get_tokens(self.source))
+
+    def test_aget_tokens_yields_control(self) -> None:
+        """
+        Test that `aget_tokens` yields the same tokens and lets other tasks run in between
+        """
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.create_task(ticker())
+            tokens = [token async for token in DaedalusLexer().aget_tokens(self.source, yield_every=50)]
+            task.cancel()
+            return tokens
+
+        self.assertEqual(asyncio.run(main()), self.expected)
+        self.assertGreaterEqual(len(ticks), len(self.expected) // 50 - 1)
+
+    def test_get_tokens_in_process_executor(self) -> None:
+        """
+        Test that tokens lexed in another process keep the token type singletons
+        """
+
+        async def main():
+            with ProcessPoolExecutor(1) as executor:
+                return await get_tokens_in_executor(DaedalusLexer(), self.source, executor)
+
+        tokens = asyncio.run(main())
+        self.assertEqual(tokens, self.expected)
+        self.assertTrue(all(token is expected for (token, _), (expected, _) in zip(tokens, self.expected)))
+
+    def test_process_executor_keeps_lexer(self) -> None:
+        """
+        Test that the class and the filters of the lexer are kept in another process and a cancel token is rejected
+        """
+        lexer = ReturnLexer(compiled=True)
+        lexer.add_filter("keywordcase", case="upper")
+        expected = list(lexer.get_tokens(self.source))
+        self.assertIn((Keyword.Declaration, "RETURN"), expected)
+
+        async def main(lexer):
+            with ProcessPoolExecutor(1) as executor:
+                return await get_tokens_in_executor(lexer, self.source, executor)
+
+        self.assertEqual(asyncio.run(main(lexer)), expected)
+        with self.assertRaisesRegex(ValueError, "cancel token"):
+            asyncio.run(main(DaedalusLexer(cancel=threading.Event())))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test suite for the generated lexer module
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import temporary_cache  # noqa: F401
+from pygments.lexer import bygroups
+from pygments.token import Comment, Name
+
+from gothic_lexer import DaedalusLexer, codegen
+from gothic_lexer.structure import get_structure
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+
+class CodegenTest(unittest.TestCase):
+    """
+    Codegen TestCase Class
+    """
+
+    def setUp(self) -> None:
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            self.source: str = file.read() + "\nfunc void f() { MEM_Init(); CALL_Foo(); Wld_PlayEffect(); };\n"
+
+    def test_same_tokens_and_transitions(self) -> None:
+        """
+        Test that the generated module emits the tokens and state transitions of the interpreted table
+        """
+        for options in ({}, {"game": "g1", "ikarus": False}, {"zparserextender": False, "lego": False}):
+            self.assertEqual(
+                list(DaedalusLexer(compiled=True, **options).get_tokens_unprocessed(self.source)),
+                list(DaedalusLexer(**options).get_tokens_unprocessed(self.source)),
+            )
+        self.assertEqual(
+            get_structure(self.source, DaedalusLexer(compiled=True))[1],
+            get_structure(self.source, DaedalusLexer())[1],
+        )
+
+    def test_cache(self) -> None:
+        """
+        Test that the module is written to the cache under the fingerprint of the table and reused
+        """
+        with tempfile.TemporaryDirectory() as cache, mock.patch.dict(os.environ, {"GOTHIC_LEXER_CACHE": cache}):
+            with mock.patch.dict(codegen._LOADED, clear=True):
+                module = codegen.load(DaedalusLexer)
+                self.assertIs(codegen.load(DaedalusLexer), module)
+            [name] = [name for name in os.listdir(cache) if name.endswith(".py")]
+            self.assertIn(codegen.fingerprint(DaedalusLexer), name)
+
+            class ChangedLexer(DaedalusLexer):
+                tokens = {**DaedalusLexer.tokens, "root": [(r"#.*?\n", Comment.Single)] + DaedalusLexer.tokens["root"]}
+
+            self.assertNotEqual(codegen.fingerprint(ChangedLexer), codegen.fingerprint(DaedalusLexer))
+            with mock.patch.dict(codegen._LOADED, clear=True):
+                codegen.load(ChangedLexer)
+            self.assertEqual(len([name for name in os.listdir(cache) if name.endswith(".py")]), 2)
+
+    def test_unwritable_cache(self) -> None:
+        """
+        Test that the module is compiled in memory when the cache can't be written
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            cache = os.path.join(directory, "file")
+            with open(cache, "w"):
+                pass
+            with mock.patch.dict(os.environ, {"GOTHIC_LEXER_CACHE": cache}):
+                with mock.patch.dict(codegen._LOADED, clear=True):
+                    module = codegen.load(DaedalusLexer)
+        source = "var int x;"
+        self.assertEqual(list(module.lex(source, ("root",), None)), list(DaedalusLexer()._lex(source, ("root",), None)))
+
+    def test_unsupported_callbacks(self) -> None:
+        """
+        Test that rules with callbacks other than bygroups of token types are rejected with a clear error
+        """
+
+        def whole(lexer, match):
+            yield match.start(), Comment, match.group()
+
+        def twice(lexer, match):
+            yield match.start(1), Comment, match.group(1)
+            yield match.start(1), Comment, match.group(1)
+
+        for callback in (whole, twice, bygroups(Name, bygroups(Comment)), lambda lexer, match: match.missing()):
+
+            class CallbackLexer(DaedalusLexer):
+                tokens = {**DaedalusLexer.tokens, "root": [(r"(#)(.*?\n)", callback)] + DaedalusLexer.tokens["root"]}
+
+            with self.assertRaisesRegex(ValueError, "only token types and bygroups of token types are supported"):
+                codegen.generate(CallbackLexer)
+
+        class GroupsLexer(DaedalusLexer):
+            tokens = {**DaedalusLexer.tokens, "root": [(r"(#)(\s*)(.*?\n)", bygroups(Comment, None, Name))]}
+
+        self.assertEqual(codegen._rules(GroupsLexer)["root"][0][2], (Comment, None, Name))
+
+
+if __name__ == "__main__":
+    unittest.main()
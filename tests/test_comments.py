@@ -0,0 +1,90 @@
+"""
+Test suite for the bulk scanning of comments
+"""
+import os
+import unittest
+
+import temporary_cache  # noqa: F401
+from pygments.token import Comment
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.comments import comment_end, comment_spans
+from gothic_lexer.structure import get_structure
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+GENERAL_D_PATH = os.path.join(TESTS_DIR_PATH, "general.d")
+
+NESTED = """
+var int a; /* outer /* inner */ func void f() {}; */
+const string s = "/* not a comment */"; // nor /* this
+/*/ still open */ /**/ var int b;
+/***/ // done
+/* unterminated /* */
+"""
+
+
+def _merged(tokens):
+    """Join the consecutive ``Comment.Multiline`` tokens."""
+    merged = []
+    for index, token, value in tokens:
+        if merged and token is Comment.Multiline and merged[-1][1] is Comment.Multiline:
+            merged[-1] = (merged[-1][0], token, merged[-1][2] + value)
+        else:
+            merged.append((index, token, value))
+    return merged
+
+
+class CommentsTest(unittest.TestCase):
+    """
+    Comments TestCase Class
+    """
+
+    def setUp(self) -> None:
+        with open(GENERAL_D_PATH, encoding="utf8") as file:
+            self.source: str = file.read() + NESTED
+
+    def test_bulk_tokens(self) -> None:
+        """
+        Test that a comment is one token holding the tokens the comment-block state emits
+        """
+        tokens = list(DaedalusLexer().get_tokens_unprocessed(self.source))
+        for options in ({}, {"compiled": True}):
+            bulk = list(DaedalusLexer(bulk_comments=True, **options).get_tokens_unprocessed(self.source))
+            self.assertEqual(bulk, _merged(tokens))
+        outer = self.source.index("/* outer")
+        self.assertIn((outer, Comment.Multiline, self.source[outer:self.source.index("\n", outer)]), bulk)
+
+    def test_structure(self) -> None:
+        """
+        Test that the outermost comments are still reported to the listener
+        """
+        folding = get_structure(self.source)[1].folding_ranges
+        self.assertEqual(get_structure(self.source, DaedalusLexer(bulk_comments=True))[1].folding_ranges, folding)
+
+    def test_comment_end(self) -> None:
+        """
+        Test the nesting and the overlapping openings and closings
+        """
+        self.assertEqual(comment_end("/* a */ b", 2), 7)
+        self.assertEqual(comment_end("/* /* */ */ b", 2), 11)
+        self.assertEqual(comment_end("/*/ */", 2), 6)
+        self.assertEqual(comment_end("/**/", 2), 4)
+        self.assertEqual(comment_end("/* /* */", 2), 8)
+        self.assertEqual(comment_end(b" /* */ */", 0, 2), 9)
+
+    def test_spans(self) -> None:
+        """
+        Test that the pre-scan finds the comments of the lexer, also in bytes
+        """
+        lexed = [
+            (index, index + len(value))
+            for index, token, value in DaedalusLexer(bulk_comments=True).get_tokens_unprocessed(self.source)
+            if token is Comment.Multiline
+        ]
+        self.assertEqual(list(comment_spans(self.source)), lexed)
+        self.assertEqual(list(comment_spans(self.source.encode("ascii", "replace"))), lexed)
+        self.assertEqual(list(comment_spans(self.source, lexed[1][1])), lexed[2:])
+
+
+if __name__ == "__main__":
+    unittest.main()
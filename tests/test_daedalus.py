@@ -2,15 +2,18 @@
 Test suite for the Daedalus lexer
 """
 import os
+import threading
 import unittest
 
 import general_tokens
 import misc_tokens
 import var_tokens
 import other_tokens
+import temporary_cache  # noqa: F401
 from pygments import lexers
+from pygments.token import Token
 
-from gothic_lexer import DaedalusLexer
+from gothic_lexer import BudgetExceeded, DaedalusLexer
 
 TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
 GENERAL_D_PATH = os.path.join(TESTS_DIR_PATH, "general.d")
@@ -24,6 +27,9 @@ class DaedalusTest(unittest.TestCase):
     Daedalus TestCase Class
     """
 
+    # the options of the lexers of the golden tests
+    OPTIONS: dict = {}
+
     def test_get_lexer_by_name(self) -> None:
         """
         Test that both `dae` and `pbd` alias names get the correct lexer
@@ -38,7 +44,7 @@ class DaedalusTest(unittest.TestCase):
         with open(GENERAL_D_PATH, encoding="utf8") as file:
             source: str = file.read()
 
-        tokens = DaedalusLexer().get_tokens(source)
+        tokens = DaedalusLexer(**self.OPTIONS).get_tokens(source)
         correct = iter(general_tokens.CORRECT_TOKENS)
 
         for token in tokens:
@@ -52,7 +58,7 @@ class DaedalusTest(unittest.TestCase):
         with open(MISC_D_PATH, encoding="utf8") as file:
             source: str = file.read()
 
-        tokens = DaedalusLexer().get_tokens(source)
+        tokens = DaedalusLexer(**self.OPTIONS).get_tokens(source)
         correct = iter(misc_tokens.CORRECT_TOKENS_NO_WHITESPACE)
 
         for token in tokens:
@@ -66,7 +72,7 @@ class DaedalusTest(unittest.TestCase):
         with open(VAR_D_PATH, encoding="utf8") as file:
             source: str = file.read()
 
-        tokens = DaedalusLexer().get_tokens(source)
+        tokens = DaedalusLexer(**self.OPTIONS).get_tokens(source)
         correct = iter(var_tokens.CORRECT_TOKENS)
 
         for token in tokens:
@@ -79,12 +85,64 @@ class DaedalusTest(unittest.TestCase):
         with open(OTHER_D_PATH, encoding="utf8") as file:
             source: str = file.read()
 
-        tokens = DaedalusLexer().get_tokens(source)
+        tokens = DaedalusLexer(**self.OPTIONS).get_tokens(source)
         correct = iter(other_tokens.CORRECT_TOKENS)
 
         for token in tokens:
             self.assertEqual(token, next(correct))
 
+    def test_game_profiles(self) -> None:
+        """
+        Test that only the externals of the chosen game and the enabled libraries are highlighted
+        """
+        source = "Wld_PlayEffect(); Doc_Open(); Str_Format(); LeGo_Init(); MEM_Init();"
+
+        def builtins(**options):
+            return [
+                value
+                for token, value in DaedalusLexer(**options).get_tokens(source)
+                if token in Token.Name.Builtin
+            ]
+
+        self.assertEqual(builtins(), ["Wld_PlayEffect", "Doc_Open", "Str_Format", "LeGo_Init", "MEM_Init"])
+        self.assertEqual(builtins(game="g1"), ["Doc_Open", "Str_Format", "LeGo_Init", "MEM_Init"])
+        self.assertEqual(builtins(game="g2a", zparserextender=False), ["Wld_PlayEffect", "LeGo_Init", "MEM_Init"])
+        self.assertEqual(builtins(game="g2", lego=False, ikarus=False), ["Wld_PlayEffect", "Str_Format"])
+        self.assertIs(DaedalusLexer(game="g1")._profile, DaedalusLexer(game="g1")._profile)
+        self.assertEqual(DaedalusLexer(game="g2a").game, "g2")
+        self.assertIs(DaedalusLexer(game="g2a")._profile, DaedalusLexer(game="g2")._profile)
+
+    def test_budgets(self) -> None:
+        """
+        Test that the rest of the input is emitted as one token or an exception is raised when a budget runs out
+        """
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            source = file.read()
+        tokens = list(DaedalusLexer().get_tokens_unprocessed(source))
+
+        limited = list(DaedalusLexer(max_tokens=100).get_tokens_unprocessed(source))
+        self.assertEqual(limited[:100], tokens[:100])
+        self.assertEqual(limited[100:], [(tokens[100][0], Token.Text, source[tokens[100][0]:])])
+        self.assertEqual(list(DaedalusLexer(max_tokens=len(tokens)).get_tokens_unprocessed(source)), tokens)
+
+        cancel = threading.Event()
+        self.assertEqual(list(DaedalusLexer(cancel=cancel).get_tokens_unprocessed(source)), tokens)
+        cancel.set()
+        lexer = DaedalusLexer(cancel=cancel, budget_action="error")
+        self.assertEqual(list(lexer.get_tokens_unprocessed(source)), [(0, Token.Error, source)])
+
+        with self.assertRaises(BudgetExceeded) as context:
+            list(DaedalusLexer(max_seconds=1e-9, budget_action="raise").get_tokens_unprocessed(source * 100))
+        self.assertEqual(context.exception.reason, "seconds")
+
+
+class CompiledDaedalusTest(DaedalusTest):
+    """
+    Compiled Daedalus TestCase Class
+    """
+
+    OPTIONS: dict = {"compiled": True}
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+"""
+Test suite for the token-level diff
+"""
+import os
+import random
+import time
+import unittest
+
+from pygments.token import Comment
+
+from gothic_lexer.diff import diff_texts, format_hunks, matching_blocks
+from gothic_lexer.fuzz import ScriptGenerator
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+OLD = """func void B_Test() {
+    var int x; x = 1;
+    // old comment
+    Print("a");
+};
+"""
+
+
+class DiffTest(unittest.TestCase):
+    """
+    Diff TestCase Class
+    """
+
+    def test_reformatting(self) -> None:
+        """
+        Test that whitespace changes aren't differences, and comments and case only when they aren't ignored
+        """
+        new = OLD.replace("x; x", "x;\n\tx").replace("    ", "\t").replace("old", "new").replace("Print", "PRINT")
+
+        self.assertEqual(diff_texts(OLD, OLD.replace("\n", "\r\n").replace("    ", "  ")), [])
+        self.assertEqual(diff_texts(OLD, new, ignore_comments=True, ignore_case=True), [])
+        self.assertEqual(len(diff_texts(OLD, new, ignore_case=True)), 1)
+        self.assertEqual(len(diff_texts(OLD, new, ignore_comments=True)), 1)
+
+    def test_hunks(self) -> None:
+        """
+        Test that the changed tokens are reported with the lines they span in both versions
+        """
+        new = "const int C = 1;\n" + OLD.replace("x = 1", "x = 2").replace("    // old comment\n", "")
+        insert, replace, delete = diff_texts(OLD, new)
+
+        self.assertEqual(insert.tag, "insert")
+        self.assertEqual("".join(value for _, _, value in insert.new), "constintC=1;")
+        self.assertEqual((insert.old_lines, insert.new_lines), (range(1, 1), range(1, 2)))
+        self.assertEqual(replace.tag, "replace")
+        self.assertEqual([value for _, _, value in replace.old], ["1"])
+        self.assertEqual([value for _, _, value in replace.new], ["2"])
+        self.assertEqual((replace.old_lines, replace.new_lines), (range(2, 3), range(3, 4)))
+        self.assertEqual(delete.tag, "delete")
+        self.assertEqual(delete.old, [(OLD.index("//"), Comment, "// old comment")])
+        self.assertEqual((delete.old_lines, delete.new_lines), (range(3, 4), range(4, 4)))
+
+        report = list(format_hunks([replace, delete], OLD, new))
+        self.assertEqual(report[2:5], ["@@ -2,1 +3,1 @@", "-    var int x; x = 1;", "+    var int x; x = 2;"])
+        self.assertEqual(report[5:], ["@@ -3,1 +4,0 @@", "-    // old comment"])
+
+    def test_shortest_edit_script(self) -> None:
+        """
+        Test that the matching blocks are as long as the longest common subsequence
+        """
+
+        def longest_common_subsequence(a: list[int], b: list[int]) -> int:
+            lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+            for i in reversed(range(len(a))):
+                for j in reversed(range(len(b))):
+                    if a[i] == b[j]:
+                        lengths[i][j] = lengths[i + 1][j + 1] + 1
+                    else:
+                        lengths[i][j] = max(lengths[i + 1][j], lengths[i][j + 1])
+            return lengths[0][0]
+
+        generator = random.Random(38)
+        for _ in range(500):
+            a = [generator.randrange(4) for _ in range(generator.randrange(12))]
+            b = [generator.randrange(4) for _ in range(generator.randrange(12))]
+            blocks = matching_blocks(a, b)
+            for i, j, size in blocks:
+                self.assertEqual(a[i:i + size], b[j:j + size])
+            self.assertEqual(sum(size for _, _, size in blocks), longest_common_subsequence(a, b))
+
+    def test_large_file(self) -> None:
+        """
+        Test that a script compared with a copy with a few edits has only those differences
+        """
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            old = file.read() * 20
+        lines = old.split("\n")
+        lines[100] += " var int added;"
+        lines[500] = lines[500].upper()
+        hunks = diff_texts(old, "\n".join(lines), ignore_case=True)
+
+        self.assertEqual(len(hunks), 1)
+        self.assertEqual(hunks[0].tag, "insert")
+        self.assertEqual(hunks[0].new_lines, range(101, 102))
+
+    def test_very_different(self) -> None:
+        """
+        Test that large and very different inputs are compared in bounded time, in valid blocks
+        """
+        self.assertEqual(matching_blocks(list(range(20000)), list(range(20000, 40000))), [])
+
+        old, new = ScriptGenerator(1).script(400), ScriptGenerator(2).script(400)
+        start = time.perf_counter()
+        hunks = diff_texts(old, new)
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertGreater(len(hunks), 1)
+        for previous, hunk in zip(hunks, hunks[1:]):
+            self.assertLessEqual(previous.old_lines.stop, hunk.old_lines.start + 1)
+
+        generator = random.Random(38)
+        a = [generator.randrange(20) for _ in range(5000)]
+        b = [generator.randrange(20) for _ in range(5000)]
+        end_i = end_j = 0
+        for i, j, size in matching_blocks(a, b, max_cost=8):
+            self.assertGreaterEqual(i, end_i)
+            self.assertGreaterEqual(j, end_j)
+            self.assertEqual(a[i:i + size], b[j:j + size])
+            end_i, end_j = i + size, j + size
+
+
+if __name__ == "__main__":
+    unittest.main()
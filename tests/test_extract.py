@@ -0,0 +1,65 @@
+"""
+Test suite for the translatable strings extraction
+"""
+import io
+import os
+import unittest
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.extract import Entry, extract_files, extract_strings, write_csv
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+SOURCE = """const string TXT[2] = {"a",
+"b"};
+instance ItMi_X (C_Item) { name = "Coin"; text[1] = "Value"; description = NAME_X; };
+func void f() {
+    AI_Output (self, other,
+        "DIA_X_15_00"); //Multi line
+    AI_OutputSVM(self, other, "$Hello");
+    Info_AddChoice(DIA_X, "Choice text", DIA_X_Choice);
+};
+"""
+
+
+class ExtractTest(unittest.TestCase):
+    """
+    Extract TestCase Class
+    """
+
+    def test_extract_strings(self) -> None:
+        """
+        Test that dialogue lines, choices, members and constants are extracted, also across lines
+        """
+        entries = list(extract_strings(DaedalusLexer().get_tokens_unprocessed(SOURCE), "x.d"))
+
+        self.assertEqual(
+            entries,
+            [
+                Entry("x.d", 1, "const", "TXT[0]", "a"),
+                Entry("x.d", 1, "const", "TXT[1]", "b"),
+                Entry("x.d", 3, "member", "ItMi_X.name", "Coin"),
+                Entry("x.d", 3, "member", "ItMi_X.text[1]", "Value"),
+                Entry("x.d", 5, "output", "DIA_X_15_00", "Multi line"),
+                Entry("x.d", 7, "svm", "$Hello", ""),
+                Entry("x.d", 8, "choice", "DIA_X_Choice", "Choice text"),
+            ],
+        )
+
+    def test_extract_files(self) -> None:
+        """
+        Test that the strings extracted on a pool are written as CSV in script order
+        """
+        output = io.StringIO()
+        write_csv(extract_files([MISC_D_PATH, MISC_D_PATH], jobs=2), output)
+        lines = output.getvalue().splitlines()
+
+        self.assertEqual(lines[0], "file,line,kind,key,text")
+        self.assertEqual(len(lines), 15)
+        text = '"Hi, do you know something about regular expressions?"'
+        self.assertEqual(lines[3], f"{MISC_D_PATH},82,output,DIA_HRY_HELLO_15_00,{text}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Test suite for the Daedalus HTML formatter
+"""
+import os
+import unittest
+from html.parser import HTMLParser
+
+from pygments import highlight
+from pygments.formatters import HtmlFormatter, get_formatter_by_name
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.codegen import _rules
+from gothic_lexer.formatter import DaedalusHtmlFormatter, lexer_token_types
+from gothic_lexer.fuzz import ScriptGenerator
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+GENERAL_D_PATH = os.path.join(TESTS_DIR_PATH, "general.d")
+
+
+class _Rendering(HTMLParser):
+    """The characters of an HTML fragment with the classes or styles of the spans around them."""
+
+    def __init__(self, html: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self.spans: list[str] = []
+        self.characters: list[tuple[str, tuple[str, ...]]] = []
+        self.feed(html)
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        attributes = dict(attrs)
+        self.spans.append(attributes.get("class") or attributes.get("style") or "")
+
+    def handle_endtag(self, tag: str) -> None:
+        self.spans.pop()
+
+    def handle_data(self, data: str) -> None:
+        for character in data:
+            # the default style draws nothing around whitespace, its spans don't matter
+            spans = () if character.isspace() else tuple(span for span in self.spans if span)
+            self.characters.append((character, spans))
+
+
+class FormatterTest(unittest.TestCase):
+    """
+    Formatter TestCase Class
+    """
+
+    def setUp(self) -> None:
+        self.source = ""
+        for path in (MISC_D_PATH, GENERAL_D_PATH):
+            with open(path, encoding="utf8") as file:
+                self.source += file.read()
+        self.source += '\nconst string s = "<b> & \'q\'";\nWld_PlayEffect();'
+
+    def test_same_rendering(self) -> None:
+        """
+        Test that every character gets the same classes or styles as with the stock formatter
+        """
+        for options in ({}, {"noclasses": True}, {"style": "monokai"}, {"nowrap": True}):
+            expected = highlight(self.source, DaedalusLexer(), HtmlFormatter(**options))
+            output = highlight(self.source, DaedalusLexer(), DaedalusHtmlFormatter(**options))
+            self.assertEqual(_Rendering(output).characters, _Rendering(expected).characters, options)
+            self.assertLess(len(output), len(expected))
+
+        self.assertIn('<span class="nb nb-Externals">Wld_PlayEffect</span>', output)
+        self.assertIn("&lt;b&gt; &amp; &#39;q&#39;", output)
+
+    def test_linewise_options(self) -> None:
+        """
+        Test that the line-based options produce the output of the stock formatter
+        """
+        for options in ({"linenos": "table"}, {"linenos": "inline"}, {"hl_lines": [2, 3]}, {"lineanchors": "l"}):
+            self.assertEqual(
+                highlight(self.source, DaedalusLexer(), DaedalusHtmlFormatter(**options)),
+                highlight(self.source, DaedalusLexer(), HtmlFormatter(**options)),
+            )
+
+    def test_style_defs(self) -> None:
+        """
+        Test that the stylesheet only holds rules of the stock one, including the classes the lexer emits
+        """
+        rules = DaedalusHtmlFormatter().get_style_defs(".highlight").splitlines()
+        stock = HtmlFormatter().get_style_defs(".highlight").splitlines()
+
+        self.assertLess(len(rules), len(stock))
+        self.assertTrue(set(rules) <= set(stock))
+        self.assertTrue(any(rule.startswith(".highlight .nb ") for rule in rules))
+        self.assertFalse(any(rule.startswith(".highlight .gd ") for rule in rules))
+        self.assertIsInstance(get_formatter_by_name("daedalus-html"), DaedalusHtmlFormatter)
+
+    def test_token_types(self) -> None:
+        """
+        Test that the precomputed token types hold those of every rule and every token lexed
+        """
+        types = lexer_token_types()
+        for rules in _rules(DaedalusLexer).values():
+            for _, _, action, _ in rules:
+                for token in action if type(action) is tuple else (action,):
+                    if token is not None:
+                        self.assertIn(token, types)
+
+        sources = [self.source] + [ScriptGenerator(seed).script() for seed in range(20)]
+        for options in ({}, {"game": "g1", "zparserextender": False}):
+            lexer = DaedalusLexer(**options)
+            for source in sources:
+                self.assertLessEqual({token for token, _ in lexer.get_tokens(source)}, types)
+
+
+if __name__ == "__main__":
+    unittest.main()
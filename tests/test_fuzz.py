@@ -0,0 +1,77 @@
+"""
+Test suite for the fuzzing of the lexer
+"""
+import unittest
+
+import temporary_cache  # noqa: F401
+from pygments.lexer import inherit
+from pygments.token import Token, Whitespace
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.fuzz import ScriptGenerator, check_roundtrip, fuzz
+
+
+class QuadraticLexer(DaedalusLexer):
+    """Lexes whitespace a character at a time, rescanning the rest of the run every time."""
+
+    tokens = {"general": [(r"\s(?=\s*[^\s:])", Whitespace), inherit]}
+
+
+class FuzzTest(unittest.TestCase):
+    """
+    Fuzz TestCase Class
+    """
+
+    def test_generator(self) -> None:
+        """
+        Test that the scripts of a seed have the same tokens at every scale and cover the grammar
+        """
+        lexer = DaedalusLexer()
+        scripts = []
+        for seed in range(10):
+            script = ScriptGenerator(seed).script()
+            self.assertEqual(script, ScriptGenerator(seed).script())
+            scaled = ScriptGenerator(seed, 5).script()
+            self.assertGreater(len(scaled), len(script))
+            self.assertEqual(
+                [token for _, token, _ in lexer.get_tokens_unprocessed(script)],
+                [token for _, token, _ in lexer.get_tokens_unprocessed(scaled)],
+            )
+            scripts.append(script)
+
+        tokens = {
+            (token, value.lower()) for script in scripts for _, token, value in lexer.get_tokens_unprocessed(script)
+        }
+        for keyword in ("func", "instance", "prototype", "class", "namespace", "meta", "var", "const"):
+            self.assertIn((Token.Keyword.Declaration, keyword), tokens)
+        self.assertIn((Token.Keyword.Reserved, "else"), tokens)
+        self.assertIn(Token.Name.Label, {token for token, _ in tokens})
+        self.assertIn(Token.Comment.Multiline, {token for token, _ in tokens})
+
+    def test_invariants(self) -> None:
+        """
+        Test that the scripts round-trip and the compiled lexer agrees with the interpreted one
+        """
+        self.assertEqual(list(fuzz(20, threshold=None, declarations=20)), [])
+
+        class DroppingLexer(DaedalusLexer):
+            def get_tokens_unprocessed(self, text, stack=("root",)):
+                for index, token, value in super().get_tokens_unprocessed(text, stack):
+                    if value != ";":
+                        yield index, token, value
+
+        self.assertEqual(check_roundtrip("var int x;", DroppingLexer()), "tokens end at 9 of 10")
+        self.assertEqual(check_roundtrip("var int x; x = 1;", DroppingLexer()), "token at 10 instead of 9")
+
+    def test_superlinear(self) -> None:
+        """
+        Test that a rule rescanning whitespace runs is found and the lexer isn't
+        """
+        findings = list(fuzz(2, lexer_class=QuadraticLexer, compare_compiled=False, min_time=0.02))
+        self.assertEqual([finding.kind for finding in findings], ["superlinear"] * 2)
+        # timed long enough and halfway to quadratic, so that a busy machine doesn't make a linear lexer look slower
+        self.assertEqual(list(fuzz(2, threshold=1.5, min_time=0.25)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
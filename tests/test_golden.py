@@ -0,0 +1,126 @@
+"""
+Test suite for the golden token streams of the fixtures
+"""
+import os
+import tempfile
+import unittest
+
+import temporary_cache  # noqa: F401
+from pygments.token import Token
+
+from gothic_lexer.golden import (
+    FixtureResult,
+    check_fixtures,
+    diff_tokens,
+    dumps,
+    load_baseline,
+    loads,
+    regressions,
+    save_baseline,
+)
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+GOLDEN_DIR_PATH = os.path.join(TESTS_DIR_PATH, "golden")
+FIXTURES = [os.path.join(TESTS_DIR_PATH, name) for name in ("general.d", "misc.d", "var.d", "other.d")]
+
+
+class GoldenTest(unittest.TestCase):
+    """
+    Golden TestCase Class
+    """
+
+    def test_fixtures(self) -> None:
+        """
+        Test that the interpreted and the compiled lexers tokenize the fixtures like their golden files
+        """
+        for options in ({}, {"compiled": True}):
+            results = check_fixtures(FIXTURES, GOLDEN_DIR_PATH, 2, options, min_time=0, encoding="utf8")
+            self.assertEqual([result.name for result in results], [os.path.basename(path) for path in FIXTURES])
+            self.assertFalse(any(result.written for result in results))
+            self.assertEqual("\n".join(line for result in results for line in result.diff), "")
+
+    def test_format(self) -> None:
+        """
+        Test that golden files keep the token types and any value
+        """
+        tokens = [(Token, ""), (Token.Name.Builtin.Externals, "Wld_IsTime"), (Token.String, 'a"\\\n \r\x00ż')]
+        self.assertEqual(dumps(tokens[1:2]), 'Name.Builtin.Externals "Wld_IsTime"\n')
+        loaded = loads(dumps(tokens))
+        self.assertEqual(loaded, tokens)
+        self.assertIs(loaded[1][0], Token.Name.Builtin.Externals)
+
+    def test_diff_and_update(self) -> None:
+        """
+        Test that a changed stream is reported as a whole and the golden file is only rewritten with `update`
+        """
+        golden = [(Token.Keyword, "func"), (Token.Text, "\n"), (Token.Name, "A"), (Token.Text, "\n"), (Token.Name, "B")]
+        changed = golden[:2] + [(Token.Name.Function, "A")] + golden[3:4] + [(Token.Name.Function, "B")]
+        report = diff_tokens(golden, changed, "a.tokens", "a.d")
+        self.assertEqual(report[0], "a.d: first difference at token 2, line 2")
+        self.assertIn('-Name "A"', report)
+        self.assertIn('+Name.Function "B"', report)
+        self.assertEqual(diff_tokens(golden, golden), [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            fixture = os.path.join(directory, "a.d")
+            with open(fixture, "w", encoding="utf8") as file:
+                file.write("func void A() {};")
+            golden_dir = os.path.join(directory, "golden")
+            (result,) = check_fixtures([fixture], golden_dir, 1, min_time=0)
+            self.assertTrue(result.written)
+
+            with open(fixture, "w", encoding="utf8") as file:
+                file.write("func int A() {};")
+            (result,) = check_fixtures([fixture], golden_dir, 1, min_time=0)
+            self.assertFalse(result.written)
+            self.assertIn('+Keyword.Type "int"', result.diff)
+            (result,) = check_fixtures([fixture], golden_dir, 1, update=True, min_time=0)
+            self.assertTrue(result.written)
+            (result,) = check_fixtures([fixture], golden_dir, 1, min_time=0)
+            self.assertEqual((result.diff, result.written), ([], False))
+
+    def test_same_names(self) -> None:
+        """
+        Test that fixtures of the same name in other directories get their own golden files and baseline entries
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            fixtures = []
+            for name, source in (("Story/B_Story.d", "var int a;"), ("AI/B_Story.d", "func void A() {};")):
+                fixture = os.path.join(directory, "scripts", *name.split("/"))
+                os.makedirs(os.path.dirname(fixture))
+                with open(fixture, "w", encoding="utf8") as file:
+                    file.write(source)
+                fixtures.append(fixture)
+            golden_dir = os.path.join(directory, "golden")
+            results = check_fixtures(fixtures, golden_dir, 2, min_time=0)
+            self.assertEqual([result.name for result in results], ["Story/B_Story.d", "AI/B_Story.d"])
+            self.assertTrue(all(result.written for result in results))
+            self.assertTrue(os.path.isfile(os.path.join(golden_dir, "Story", "B_Story.tokens")))
+            self.assertTrue(os.path.isfile(os.path.join(golden_dir, "AI", "B_Story.tokens")))
+            results = check_fixtures(fixtures, golden_dir, 2, min_time=0)
+            self.assertEqual([(result.diff, result.written) for result in results], [([], False)] * 2)
+
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(results, path)
+            self.assertEqual(sorted(load_baseline(path)), ["AI/B_Story.d", "Story/B_Story.d"])
+
+    def test_baseline(self) -> None:
+        """
+        Test that only the fixtures slower than their baseline by more than the tolerance are reported
+        """
+        results = [FixtureResult("a.d", 10, 1000.0, [], False), FixtureResult("b.d", 10, 700.0, [], False)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(results, path)
+            baseline = load_baseline(path)
+        self.assertEqual(baseline, {"a.d": 1000, "b.d": 700})
+
+        baseline = {"a.d": 1100.0, "b.d": 1000.0, "c.d": 1000.0}
+        self.assertEqual(
+            regressions(results, baseline, 0.2), ["b.d: 700 tokens/s, 30% below the baseline of 1000 tokens/s"]
+        )
+        self.assertEqual(regressions(results, baseline, 0.35), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Test suite for the identifier index
+"""
+import os
+import tempfile
+import unittest
+
+from pygments.token import Token
+
+from gothic_lexer.index import IdentifierIndex, build_index
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+OTHER_D_PATH = os.path.join(TESTS_DIR_PATH, "other.d")
+
+
+class IndexTest(unittest.TestCase):
+    """
+    Index TestCase Class
+    """
+
+    def setUp(self) -> None:
+        self.index = build_index([MISC_D_PATH, OTHER_D_PATH], jobs=2)
+
+    def test_definitions_and_usages(self) -> None:
+        """
+        Test that definitions and uses are told apart and comments and strings aren't indexed
+        """
+        definitions = self.index.definitions("dia_hry_exit_condition")
+        usages = self.index.usages("DIA_HRY_EXIT_CONDITION")
+
+        self.assertEqual([(posting.file, posting.token) for posting in definitions], [(MISC_D_PATH, Token.Name.Function)])
+        self.assertEqual([(posting.file, posting.token) for posting in usages], [(MISC_D_PATH, Token.Name)])
+        self.assertEqual(len(self.index.definitions("C_NPC")), 1)
+        self.assertEqual(len(self.index.usages("C_NPC")), 2)
+        self.assertTrue(all(posting.definition for posting in self.index.find("victim")[-1:]))
+        self.assertEqual(self.index.find("regular"), [])
+        self.assertEqual(self.index.find("HRY_WP"), [])
+
+    def test_incremental_update(self) -> None:
+        """
+        Test that updating a file replaces only its postings, also with token types given by name
+        """
+        self.index.update(OTHER_D_PATH, [("lego_init", 0, Token.Name, False)])
+
+        self.assertEqual(self.index.find("mem_sendtospy"), [])
+        self.assertEqual(len(self.index.find("lego_init")), 1)
+        self.assertEqual(len(self.index.usages("AI_Output")), 5)
+
+        self.index.update_named(OTHER_D_PATH, [("lego_init", 0, "Token.Name.Function", True)], 7)
+        [posting] = self.index.definitions("lego_init")
+        self.assertIs(posting.token, Token.Name.Function)
+        self.assertEqual(self.index.files[OTHER_D_PATH], 7)
+
+        self.index.remove(MISC_D_PATH)
+        self.assertEqual(self.index.find("AI_Output"), [])
+        self.assertEqual(list(self.index.files), [OTHER_D_PATH])
+
+    def test_save_and_load(self) -> None:
+        """
+        Test that a saved index is loaded back
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scripts.idx")
+            self.index.save(path)
+            loaded = IdentifierIndex.load(path)
+
+        self.assertEqual(len(loaded), len(self.index))
+        self.assertEqual(loaded.files, self.index.files)
+        for identifier in ("c_npc", "self", "ai_output", "mem_sendtospy"):
+            self.assertEqual(loaded.find(identifier), self.index.find(identifier))
+
+
+if __name__ == "__main__":
+    unittest.main()
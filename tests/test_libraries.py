@@ -0,0 +1,78 @@
+"""
+Test suite for the recognition of library calls
+"""
+import os
+import tempfile
+import unittest
+
+import temporary_cache  # noqa: F401
+from pygments.token import Token
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.libraries import LibraryTable
+
+SOURCE = "LeGo_Init(); lego_init(); MEMINT_SwitchG1G2(); Memory(); AFSP_Foo_Bar(); Print_Ext(); Hlp_Foo();"
+
+
+def _calls(lexer: DaedalusLexer) -> list[str]:
+    return [value for token, value in lexer.get_tokens(SOURCE) if token is Token.Name.Builtin.Other]
+
+
+class LibrariesTest(unittest.TestCase):
+    """
+    Libraries TestCase Class
+    """
+
+    def test_get(self) -> None:
+        """
+        Test that names are found case-insensitively by their longest known prefix or their full name
+        """
+        table = LibraryTable({"AFSP": "afsp", "AFSP_FOO_": "foo"}, {"Print_Ext": "lego"})
+
+        self.assertEqual(table.get("afsp_Other"), "afsp")
+        self.assertEqual(table.get("AFSP_Foo_Bar"), "foo")
+        self.assertEqual(table.get("PRINT_EXT"), "lego")
+        self.assertIsNone(table.get("AFSPX_Foo"))
+        self.assertIsNone(table.get("AFSP"))
+        self.assertIsNone(table.get("Print_Ext2"))
+        self.assertEqual(LibraryTable.default(["ikarus"]).get("MEMINT_SwitchG1G2"), "ikarus")
+        # a prefix ends at an underscore
+        self.assertEqual(LibraryTable.default().get("call_test"), "ikarus")
+        self.assertIsNone(LibraryTable.default().get("MEMBERS"))
+        self.assertIsNone(LibraryTable.default(["ikarus"]).get("LeGo_Init"))
+
+    def test_load(self) -> None:
+        """
+        Test loading symbol lists and the functions declared by scripts
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            symbols = os.path.join(directory, "AFSP.txt")
+            with open(symbols, "w") as file:
+                file.write("// AFSP\nAFSP_*\n\n# single functions\nPrint_Ext\n")
+            script = os.path.join(directory, "Helpers.d")
+            with open(script, "w") as file:
+                file.write("func void Hlp_Foo() {};\nvar int Hlp_Bar;\n")
+
+            table = LibraryTable()
+            table.load(symbols)
+            table.load(script, "helpers")
+            self.assertEqual(table.prefixes, {"AFSP": "afsp"})
+            self.assertEqual(table.names, {"PRINT_EXT": "afsp", "HLP_FOO": "helpers"})
+
+            lexer = DaedalusLexer(libraries=f"{symbols} {script}", lego=False)
+            self.assertEqual(_calls(lexer), ["MEMINT_SwitchG1G2", "AFSP_Foo_Bar", "Print_Ext", "Hlp_Foo"])
+
+    def test_lexer(self) -> None:
+        """
+        Test that the lexer highlights the calls of the enabled and added libraries, also when compiled
+        """
+        self.assertEqual(_calls(DaedalusLexer()), ["LeGo_Init", "lego_init", "MEMINT_SwitchG1G2"])
+        self.assertEqual(_calls(DaedalusLexer(ikarus=False)), ["LeGo_Init", "lego_init"])
+        table = LibraryTable({"AFSP": "afsp"})
+        for options in ({}, {"compiled": True}):
+            lexer = DaedalusLexer(libraries=table, lego=False, **options)
+            self.assertEqual(_calls(lexer), ["MEMINT_SwitchG1G2", "AFSP_Foo_Bar"])
+
+
+if __name__ == "__main__":
+    unittest.main()
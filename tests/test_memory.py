@@ -0,0 +1,102 @@
+"""
+Test suite for the memory lexing huge inputs takes
+
+The inputs are a few megabytes by default, ``GOTHIC_LEXER_MEMORY_MB=100`` lexes 100MB+ like a generated bundle,
+which takes minutes under `tracemalloc`.
+"""
+import io
+import os
+import tracemalloc
+import unittest
+
+import temporary_cache  # noqa: F401
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.formatter import DaedalusHtmlFormatter
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+SIZE: int = int(os.environ.get("GOTHIC_LEXER_MEMORY_MB", "1")) << 20
+
+# tokens between the samples of the traced memory
+INTERVAL: int = 10_000
+
+
+class _NullWriter(io.TextIOBase):
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def _scripts() -> str:
+    scripts = []
+    for name in ("general.d", "misc.d", "var.d", "other.d"):
+        with open(os.path.join(TESTS_DIR_PATH, name), encoding="utf8") as file:
+            scripts.append(file.read())
+    return "\n".join(scripts) + "\n"
+
+
+class MemoryTest(unittest.TestCase):
+    """
+    Memory TestCase Class
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        scripts = _scripts()
+        cls.text: str = scripts * (SIZE // len(scripts) + 1)
+        # one character per byte, so that the multiples below are of the input size in memory
+        cls.text = cls.text.encode("ascii", "replace").decode("ascii")
+
+    def _assert_bounded(self, tokens, size: int, factor: float) -> None:
+        """Consume the tokens and check the traced memory, sampled every `INTERVAL` tokens, against the ``size``."""
+        samples = []
+        tracemalloc.start()
+        try:
+            for count, _ in enumerate(tokens):
+                if count % INTERVAL == 0:
+                    samples.append(tracemalloc.get_traced_memory()[0])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, factor * size + (1 << 20), f"peak {peak} for {size} bytes of input")
+        # nothing accumulates while lexing, the memory of the last samples is that of the first ones
+        self.assertLess(max(samples[len(samples) // 2:]), max(samples[:len(samples) // 2]) + (1 << 20))
+
+    def test_get_tokens(self) -> None:
+        """
+        Test that lexing takes little more memory than a copy of the input, also with Windows line breaks
+        """
+        for text in (self.text, self.text.replace("\n", "\r\n")):
+            self._assert_bounded(DaedalusLexer().get_tokens(text), len(text), 1.5)
+
+    def test_unbalanced(self) -> None:
+        """
+        Test that unbalanced brackets, blocks and comments don't grow the state stack with the input
+        """
+        text = "(" * (SIZE // 4) + "\n" + "if x { " * (SIZE // 28) + "\n" + "/* " * (SIZE // 12) + "\n"
+        self._assert_bounded(DaedalusLexer().get_tokens(text), len(text), 1.5)
+
+        # tracemalloc looks up line numbers in the huge function of the generated module, which takes ages,
+        # the generated module caps the stack like the lexer if it emits the same tokens
+        small = text[:1000] + text[SIZE // 4:SIZE // 4 + 1000] + text[-1000:]
+        self.assertEqual(
+            list(DaedalusLexer(compiled=True, max_depth=16).get_tokens_unprocessed(small)),
+            list(DaedalusLexer(max_depth=16).get_tokens_unprocessed(small)),
+        )
+
+    def test_format(self) -> None:
+        """
+        Test that the HTML formatter writes the output as it goes
+        """
+        formatter = DaedalusHtmlFormatter()
+        tokens = DaedalusLexer().get_tokens(self.text)
+        tracemalloc.start()
+        try:
+            formatter.format(tokens, _NullWriter())
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 1.5 * len(self.text) + (1 << 20))
+
+
+if __name__ == "__main__":
+    unittest.main()
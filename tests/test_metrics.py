@@ -0,0 +1,65 @@
+"""
+Test suite for the lexing metrics
+"""
+import json
+import os
+import unittest
+
+from gothic_lexer.metrics import BatchMetrics, Histogram, measure, measure_files
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+OTHER_D_PATH = os.path.join(TESTS_DIR_PATH, "other.d")
+
+
+class MetricsTest(unittest.TestCase):
+    """
+    Metrics TestCase Class
+    """
+
+    def test_measure(self) -> None:
+        """
+        Test that tokens, stack depth, errors and builtin hits are counted
+        """
+        metrics = measure('func void f() { if x { Wld_IsTime(); Str_Format(); }; }; #', "x.d")
+
+        self.assertEqual(metrics.path, "x.d")
+        self.assertEqual(metrics.max_depth, 5)
+        self.assertEqual((metrics.errors, metrics.externals, metrics.zparserextender), (1, 1, 1))
+        self.assertGreater(metrics.tokens, 20)
+
+    def test_histogram(self) -> None:
+        """
+        Test that the histogram buckets are cumulative and histograms merge
+        """
+        histogram = Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        other = Histogram((1, 10))
+        other.observe(2)
+        histogram.merge(other)
+
+        self.assertEqual([count for _, count in histogram.cumulative()], [2, 4, 5])
+        self.assertEqual(histogram.sum, 58.5)
+        with self.assertRaises(ValueError):
+            histogram.merge(Histogram((1,)))
+
+    def test_export(self) -> None:
+        """
+        Test the Prometheus and JSON exports of a batch
+        """
+        metrics = measure_files([MISC_D_PATH, OTHER_D_PATH], jobs=2)
+        prometheus = metrics.to_prometheus()
+
+        self.assertIn('gothic_lexer_lex_seconds_bucket{le="+Inf"} 2\n', prometheus)
+        self.assertIn("gothic_lexer_externals_total 12\n", prometheus)
+        self.assertIn("# TYPE gothic_lexer_max_stack_depth gauge\n", prometheus)
+        exported = json.loads(json.dumps(metrics.to_json()))
+        self.assertEqual([file["path"] for file in exported["files"]], [MISC_D_PATH, OTHER_D_PATH])
+        self.assertEqual(exported["bytes"]["count"], 2)
+        self.assertEqual(len(metrics.slowest(1)), 1)
+        self.assertEqual(BatchMetrics().to_json()["files"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Test suite for lexing parts of a script
+"""
+import os
+import unittest
+
+from pygments import format
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.formatter import DaedalusHtmlFormatter
+from gothic_lexer.fuzz import ScriptGenerator
+from gothic_lexer.partial import LineStates, _cut, find_restart, highlight_window, lex_lines, line_starts
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+GENERAL_D_PATH = os.path.join(TESTS_DIR_PATH, "general.d")
+
+# declarations whose matches run across line breaks
+SPLIT = """func
+void A() {
+    var
+    int x;
+};
+const
+int C = 1;
+instance
+Self(C_NPC) {
+};
+"""
+
+
+class PartialTest(unittest.TestCase):
+    """
+    Partial TestCase Class
+    """
+
+    def test_every_line(self) -> None:
+        """
+        Test that every line lexed from the checkpoints equals the one of the whole script, also after a backward
+        scan when it stops at a line in the root state, which it always does in the fixtures
+        """
+        texts = {}
+        for path in (MISC_D_PATH, GENERAL_D_PATH):
+            with open(path, encoding="utf8") as file:
+                texts[path] = file.read()
+        texts.update((f"seed {seed}", ScriptGenerator(seed).script()) for seed in range(20))
+        texts["split declarations"] = SPLIT
+        for name, text in texts.items():
+            tokens = list(DaedalusLexer().get_tokens_unprocessed(text))
+            states = LineStates(text)
+            starts = line_starts(text) + [len(text)]
+            for line in range(1, len(states) + 1):
+                expected = list(_cut(tokens, starts[line - 1], starts[line]))
+                [fragment] = lex_lines(text, [range(line, line + 1)], states=states)
+                self.assertEqual(fragment.tokens, expected, f"{name}:{line}")
+
+                restart = starts.index(find_restart(text, starts[line - 1])) + 1
+                if name.endswith(".d"):
+                    self.assertEqual(states.stacks[restart - 1], ("root",), f"{name}:{line}")
+                if states.stacks[restart - 1] == ("root",):
+                    [fragment] = lex_lines(text, [range(line, line + 1)])
+                    self.assertEqual(fragment.tokens, expected, f"{name}:{line}")
+
+        states = LineStates(SPLIT)
+        self.assertIsNone(states.stacks[1])
+        self.assertEqual(states.checkpoint(2), (1, ("root",)))
+
+    def test_ranges(self) -> None:
+        """
+        Test that the ranges are widened by the context, merged and lexed to exactly their lines
+        """
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            text = file.read()
+        lines = text.split("\n")
+
+        fragments = lex_lines(text, [range(40, 42), range(10, 11), range(44, 45), range(60, 60)], context=2)
+        # the empty range of an insertion point gets the context around it
+        self.assertEqual([fragment.lines for fragment in fragments], [range(8, 13), range(38, 47), range(58, 62)])
+        for fragment in fragments:
+            expected = "\n".join(lines[fragment.lines.start - 1:fragment.lines.stop - 1]) + "\n"
+            self.assertEqual("".join(value for _, _, value in fragment.tokens), expected)
+
+        self.assertEqual(lex_lines(text, [range(1, 1000)])[0].lines, range(1, len(lines) + 1))
+        self.assertEqual(lex_lines(text, []), [])
+
+    def test_lazy(self) -> None:
+        """
+        Test that lazy checkpoints are filled only as far as needed and equal the ones of the whole script
+        """
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            text = file.read() * 20
+        states = LineStates(text)
+        lazy = LineStates(text, lazy=True)
+        self.assertEqual(lazy.stacks, [])
+        self.assertEqual(lazy.stack(3), states.stack(3))
+        self.assertLess(len(lazy.stacks), len(states))
+        for line in (len(states), 1, len(states) // 2):
+            self.assertEqual(lazy.stack(line), states.stack(line))
+            self.assertEqual(lazy.key(line), states.key(line))
+        self.assertEqual(lazy.stacks, states.stacks)
+        checkpoints = [line for line in range(1, len(states) + 1) if states.stacks[line - 1] is not None]
+        self.assertEqual(len({states.key(line) for line in checkpoints}), len(set(states.stacks) - {None}))
+
+        # the key of a line without a checkpoint covers the text the lexing of the line depends on
+        split = LineStates(SPLIT)
+        self.assertNotEqual(split.key(2), split.key(1))
+        self.assertNotEqual(split.key(2), LineStates("FUNC  " + SPLIT[4:]).key(2))
+
+    def test_highlight_window(self) -> None:
+        """
+        Test that a window of lines is formatted like the same lines cut from the tokens of the whole script,
+        also when it begins inside a declaration split across lines
+        """
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            text = file.read()
+        formatter = DaedalusHtmlFormatter(nowrap=True)
+        for text, firsts in ((text, (1, 30, -5)), (SPLIT, range(1, 12)), (ScriptGenerator(3).script(), (2, 40, 80))):
+            tokens = list(DaedalusLexer().get_tokens_unprocessed(text))
+            starts = line_starts(text) + [len(text)]
+            states = LineStates(text, lazy=True)
+            for first in firsts:
+                first = first % len(states) or len(states)
+                stop = min(first + 10, len(states) + 1)
+                cut = _cut(tokens, starts[first - 1], starts[stop - 1])
+                expected = format(((token, value) for _, token, value in cut), formatter)
+                self.assertEqual(highlight_window(states, first, 10), expected, first)
+        self.assertIn('<span class="kt">void ', highlight_window(LineStates(SPLIT), 2, 1))
+
+    def test_find_restart(self) -> None:
+        """
+        Test that the backward scan stops at top-level declarations after a statement, outside of comments
+        and namespaces
+        """
+        text = "func void a() {\n    b();\n};\n/*\nfunc void c() {\n*/\n    d();\n"
+
+        self.assertEqual(find_restart(text, text.index("b();")), 0)
+        self.assertEqual(find_restart(text, text.index("d();")), 0)
+        self.assertEqual(find_restart(text + "INSTANCE e(C_NPC) {\n", len(text) + 5), len(text))
+        # nested comments, closings in strings and // comments don't end a comment
+        for prefix in ('/* /* */\n', 'var string s; /* "*/"\n'):
+            commented = "var int x;\n" + prefix + "func void c() {\n*/\n    d();\n"
+            self.assertEqual(find_restart(commented, commented.index("d();")), 0, prefix)
+        # and openings in them don't begin one
+        for prefix in ("var string s; // /*\n", 'var string s = "/*";\n'):
+            commented = prefix + "func void c() {\n    d();\n"
+            self.assertEqual(find_restart(commented, commented.index("d();")), len(prefix), prefix)
+        # a declaration continuing the one before it, or inside a namespace
+        for prefix, restart in (("func\n", 0), ("var int x;\nnamespace N {\n", 0), ("var int x; // ;\nfunc\n", 16)):
+            continued = prefix + "func void c() {\n    d();\n"
+            self.assertEqual(find_restart(continued, continued.index("d();")), restart, prefix)
+        commented = "var int x; /* a */ // b\n\nfunc void c() {\n    d();\n"
+        self.assertEqual(find_restart(commented, commented.index("d();")), commented.index("func"))
+
+
+if __name__ == "__main__":
+    unittest.main()
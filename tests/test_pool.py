@@ -0,0 +1,96 @@
+"""
+Test suite for the pool of warm workers
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import temporary_cache  # noqa: F401
+
+from gothic_lexer.pool import PoolError, highlight, parse_options, render, request
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+
+class PoolTest(unittest.TestCase):
+    """
+    Pool TestCase Class
+    """
+
+    def test_parse_options(self) -> None:
+        """
+        Test that the options are parsed like pygmentize parses -O and -P
+        """
+        self.assertEqual(
+            parse_options(["full, game=g1", "nowrap"], ["title=a, b"]),
+            {"full": True, "game": "g1", "nowrap": True, "title": "a, b"},
+        )
+
+    def test_render(self) -> None:
+        """
+        Test highlighting in the calling process, the fallback when no pool is listening
+        """
+        with open(MISC_D_PATH, "rb") as file:
+            source = file.read()
+        output = render(source, "dae", "html", {"nowrap": True})
+        self.assertIn(b'<span class="kd">var</span>', output)
+        self.assertEqual(render(source, "dae", "dae-html", {"outencoding": "cp1252"}).decode("cp1252")[:4], "<div")
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "pool.sock")
+            self.assertEqual(highlight(source, "dae", "html", {"nowrap": True}, address), output)
+            with self.assertRaises(PoolError):
+                highlight(source, "dae", "unknown", None, address)
+            with self.assertRaisesRegex(PoolError, "FileNotFoundError: .*missing.txt"):
+                highlight(source, "dae", "html", {"libraries": "missing.txt"}, address)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "the pool needs os.fork")
+    def test_pool(self) -> None:
+        """
+        Test that the workers highlight like the calling process, report errors and stop with the supervisor
+        """
+        with open(MISC_D_PATH, "rb") as file:
+            source = file.read()
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "pool.sock")
+            supervisor = subprocess.Popen(
+                [sys.executable, "-m", "gothic_lexer", "pool", "--workers", "2", "--socket", address],
+                cwd=os.path.dirname(TESTS_DIR_PATH),
+                stderr=subprocess.PIPE,
+            )
+            try:
+                self.assertIn(b"listening on", supervisor.stderr.readline())
+                for options in ({"nowrap": True}, {"compiled": "true", "game": "g1"}):
+                    self.assertEqual(request(source, options=options, address=address), render(source, options=options))
+                with self.assertRaisesRegex(PoolError, "ClassNotFound"):
+                    request(source, formatter="unknown", address=address)
+                with self.assertRaisesRegex(PoolError, "FileNotFoundError: .*missing.txt"):
+                    request(source, options={"libraries": "missing.txt"}, address=address)
+
+                # the relative paths of the options are the ones of the client, not of the supervisor
+                library = os.path.join(directory, "symbols.txt")
+                with open(library, "w", encoding="cp1252") as file:
+                    file.write("MyLib_*\n")
+                calls = b"func void f() { MyLib_Call(); };"
+                working_directory = os.getcwd()
+                os.chdir(directory)
+                try:
+                    output = request(calls, options={"libraries": "symbols.txt", "nowrap": True}, address=address)
+                    request(calls, options={"full": True, "cssfile": "style.css"}, address=address)
+                finally:
+                    os.chdir(working_directory)
+                self.assertEqual(output, render(calls, options={"libraries": library, "nowrap": True}))
+                self.assertNotEqual(output, render(calls, options={"nowrap": True}))
+                self.assertTrue(os.path.exists(os.path.join(directory, "style.css")))
+            finally:
+                supervisor.terminate()
+                supervisor.wait(10)
+                supervisor.stderr.close()
+            self.assertEqual(supervisor.returncode, 0)
+            self.assertFalse(os.path.exists(address))
+
+
+if __name__ == "__main__":
+    unittest.main()
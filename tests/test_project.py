@@ -0,0 +1,91 @@
+"""
+Test suite for the `.src` project lexing
+"""
+import os
+import tempfile
+import unittest
+
+from pygments.token import Token
+
+from gothic_lexer.project import lex_project, parse_src
+
+FILES = {
+    "Gothic.src": "_intern\\constants.d\n// comment\nAI\\ai.SRC\nstory\\DIALOGE\\*.d\n",
+    "_Intern/Constants.d": "const int a = 1;",
+    "AI/AI.src": "ai_intern.d\n",
+    "AI/AI_Intern.d": "func void f() {};",
+    "Story/Dialoge/b.d": "var int b;",
+    "Story/Dialoge/A.D": "var int a;",
+    "Story/Dialoge/notes.txt": "",
+}
+
+
+class ProjectTest(unittest.TestCase):
+    """
+    Project TestCase Class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        for path, content in FILES.items():
+            path = os.path.join(self.directory.name, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf8") as file:
+                file.write(content)
+        self.src_path = os.path.join(self.directory.name, "Gothic.src")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_parse_src(self) -> None:
+        """
+        Test that the paths are resolved case-insensitively, in compile order, following nested `.src` files
+        """
+        paths = [os.path.relpath(path, self.directory.name) for path in parse_src(self.src_path)]
+
+        self.assertEqual(
+            paths,
+            [
+                os.path.join("_Intern", "Constants.d"),
+                os.path.join("AI", "AI_Intern.d"),
+                os.path.join("Story", "Dialoge", "A.D"),
+                os.path.join("Story", "Dialoge", "b.d"),
+            ],
+        )
+
+    def test_missing_file(self) -> None:
+        """
+        Test that a missing file without wildcards is reported
+        """
+        with open(self.src_path, "a", encoding="utf8") as file:
+            file.write("missing.d\n")
+
+        with self.assertRaises(FileNotFoundError):
+            parse_src(self.src_path)
+
+    def test_cycle(self) -> None:
+        """
+        Test that `.src` files including each other are reported and the same one included twice isn't a cycle
+        """
+        with open(self.src_path, "a", encoding="utf8") as file:
+            file.write("ai\\ai.src\n")
+        self.assertEqual(len(parse_src(self.src_path)), 5)
+
+        with open(os.path.join(self.directory.name, "AI", "AI.src"), "a", encoding="utf8") as file:
+            file.write("..\\GOTHIC.SRC\n")
+        with self.assertRaisesRegex(ValueError, r"(?i)gothic\.src -> .*ai\.src -> .*gothic\.src"):
+            parse_src(self.src_path)
+
+    def test_lex_project(self) -> None:
+        """
+        Test that the scripts lexed on a pool are returned in compile order
+        """
+        results = list(lex_project(self.src_path, jobs=2))
+
+        self.assertEqual([path for path, _ in results], parse_src(self.src_path))
+        self.assertEqual(results[1][1][2], (Token.Keyword.Type, "void"))
+        self.assertIs(results[1][1][4][0], Token.Name.Function)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Test suite for the token stream serialization
+"""
+import os
+import unittest
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.serialize import FormatError, dumps, loads, read_varint, write_varint
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+
+class SerializeTest(unittest.TestCase):
+    """
+    Serialize TestCase Class
+    """
+
+    def setUp(self) -> None:
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            self.source: str = file.read() + '\nconst string umlaut = "Äöü ' + "x" * 300 + '";'
+        self.tokens = list(DaedalusLexer().get_tokens_unprocessed(self.source))
+
+    def test_round_trip(self) -> None:
+        """
+        Test that the tokens are loaded back with and without compression
+        """
+        for compress in (True, False):
+            tokens = loads(dumps(self.tokens, self.source, compress=compress))
+            self.assertEqual(tokens, self.tokens)
+            self.assertTrue(all(token is expected for (_, token, _), (_, expected, _) in zip(tokens, self.tokens)))
+
+    def test_without_text(self) -> None:
+        """
+        Test that a stream without the text needs the original text to be loaded
+        """
+        data = dumps(self.tokens, self.source, include_text=False)
+
+        self.assertEqual(loads(data, self.source), self.tokens)
+        with self.assertRaises(ValueError):
+            loads(data)
+
+    def test_invalid_data(self) -> None:
+        """
+        Test that data in another format is rejected
+        """
+        with self.assertRaises(FormatError):
+            loads(b"\x80\x04not a token stream")
+
+    def test_varints(self) -> None:
+        """
+        Test that varints are read back from where they were written, in as few bytes as their bits need
+        """
+        values = [0, 1, 0x7F, 0x80, 0x3FFF, 0x4000, 1 << 40]
+        buffer = bytearray()
+        for value in values:
+            write_varint(buffer, value)
+        self.assertEqual(len(buffer), 1 + 1 + 1 + 2 + 2 + 3 + 6)
+        pos = 0
+        for value in values:
+            read, pos = read_varint(buffer, pos)
+            self.assertEqual(read, value)
+        self.assertEqual(pos, len(buffer))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Test suite for the shared memory pool lexing
+"""
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.batch import read_script
+from gothic_lexer.shared import lex_files_shared
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+OTHER_D_PATH = os.path.join(TESTS_DIR_PATH, "other.d")
+
+
+class SharedTest(unittest.TestCase):
+    """
+    Shared TestCase Class
+    """
+
+    def test_lex_files_shared(self) -> None:
+        """
+        Test that the tokens read from shared memory equal the ones lexed in the parent, in path order
+        """
+        paths = [MISC_D_PATH, OTHER_D_PATH, MISC_D_PATH]
+        results = list(lex_files_shared(paths, jobs=2))
+
+        self.assertEqual([path for path, _ in results], paths)
+        for path, tokens in results:
+            with tokens:
+                expected = list(DaedalusLexer().get_tokens_unprocessed(read_script(path)))
+                self.assertEqual(len(tokens), len(expected))
+                self.assertEqual(list(tokens), expected)
+                self.assertEqual(tokens[-1], expected[-1])
+                self.assertEqual(tokens[2:5], expected[2:5])
+                self.assertIs(tokens[0][1], expected[0][1])
+
+    def test_empty_file(self) -> None:
+        """
+        Test that an empty script doesn't need a shared memory block
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "empty.d")
+            open(path, "w").close()
+
+            [(_, tokens)] = lex_files_shared([path], jobs=1)
+
+        self.assertEqual(list(tokens), [])
+        tokens.close()
+
+    @unittest.skipUnless(os.path.isdir("/dev/shm"), "needs the shared memory blocks listed in /dev/shm")
+    def test_stop_early(self) -> None:
+        """
+        Test that no block is left behind when the iteration stops early and the buffers aren't closed
+        """
+
+        def blocks() -> set[str]:
+            return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+        before = blocks()
+        results = lex_files_shared([MISC_D_PATH, OTHER_D_PATH] * 4, jobs=2)
+        _, tokens = next(results)
+        self.assertGreater(len(tokens), 0)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            results.close()
+            del tokens
+            gc.collect()
+        self.assertEqual(blocks() - before, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Test suite for the usage statistics
+"""
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+from gothic_lexer.__main__ import main
+from gothic_lexer.stats import Usage, count_files, count_usage
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+OTHER_D_PATH = os.path.join(TESTS_DIR_PATH, "other.d")
+
+
+class StatsTest(unittest.TestCase):
+    """
+    Stats TestCase Class
+    """
+
+    def test_count_usage(self) -> None:
+        """
+        Test that builtins, library calls, declarations and errors are counted by their upper case names
+        """
+        usage = count_usage(
+            "func void f() { var int x; Wld_IsTime(); WLD_ISTIME(); Str_Format(); MEM_Alloc(); LeGo_Init(); }; #"
+        )
+
+        self.assertEqual(usage.externals, {"WLD_ISTIME": 2})
+        self.assertEqual(usage.zparserextender, {"STR_FORMAT": 1})
+        self.assertEqual(usage.libraries, {"MEM_ALLOC": 1, "LEGO_INIT": 1})
+        self.assertEqual(usage.declarations, {"func": 1, "var": 1})
+        self.assertEqual(usage.errors, 1)
+        self.assertEqual(usage.dependencies(), ["ikarus", "lego", "zparserextender"])
+        self.assertEqual(Usage().dependencies(), [])
+
+    def test_count_files(self) -> None:
+        """
+        Test that the per-file counters of the workers add up to the total
+        """
+        usage = count_files([MISC_D_PATH, OTHER_D_PATH], jobs=2)
+
+        self.assertEqual(list(usage.files), [MISC_D_PATH, OTHER_D_PATH])
+        total = Usage()
+        for path in (MISC_D_PATH, OTHER_D_PATH):
+            total.merge(usage.files[path])
+        self.assertEqual(total.to_dict(), usage.total.to_dict())
+        self.assertEqual(sum(usage.total.externals.values()), 12)
+        self.assertEqual(usage.total.dependencies(), ["ikarus", "lego"])
+
+    def test_command(self) -> None:
+        """
+        Test the text and JSON outputs of the stats command
+        """
+        output = io.StringIO()
+        with mock.patch("sys.stdout", output):
+            main(["stats", MISC_D_PATH, OTHER_D_PATH, "--jobs", "1", "--top", "1"])
+        self.assertIn("dependencies: ikarus, lego\n", output.getvalue())
+        self.assertIn("         5 AI_OUTPUT\n", output.getvalue())
+
+        output = io.StringIO()
+        with mock.patch("sys.stdout", output):
+            main(["stats", OTHER_D_PATH, "--jobs", "1", "--format", "json"])
+        exported = json.loads(output.getvalue())
+        self.assertEqual(exported["total"], exported["files"][OTHER_D_PATH])
+
+
+if __name__ == "__main__":
+    unittest.main()
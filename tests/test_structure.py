@@ -0,0 +1,83 @@
+"""
+Test suite for the structure extraction
+"""
+import os
+import unittest
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.structure import FoldingRange, get_structure
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+
+SOURCE = """/* a
+/* nested */ b */
+namespace Example {
+    func void f(var int x) {
+        if (x) {
+            x = a[1];
+        };
+    };
+};
+instance self, other (C_NPC);
+"""
+
+
+class StructureTest(unittest.TestCase):
+    """
+    Structure TestCase Class
+    """
+
+    def test_tokens_unchanged(self) -> None:
+        """
+        Test that building the structure doesn't change the tokens
+        """
+        with open(MISC_D_PATH, encoding="utf8") as file:
+            source: str = file.read()
+
+        tokens, _ = get_structure(source)
+        self.assertEqual(tokens, list(DaedalusLexer().get_tokens_unprocessed(source)))
+
+    def test_outline(self) -> None:
+        """
+        Test that declarations are nested in the outline
+        """
+        _, structure = get_structure(SOURCE)
+
+        namespace, instance = structure.outline
+        self.assertEqual((namespace.kind, namespace.name), ("namespace", "Example"))
+        self.assertEqual((instance.kind, instance.name), ("instance", "self"))
+        self.assertEqual(namespace.children[0].kind, "func")
+        self.assertEqual(namespace.children[0].name, "f")
+        self.assertEqual(SOURCE[namespace.start:namespace.end], SOURCE[23:SOURCE.index("};\ninstance") + 2])
+
+    def test_folding_ranges(self) -> None:
+        """
+        Test that comments, blocks and nested blocks fold, but the nested comment does not
+        """
+        _, structure = get_structure(SOURCE)
+
+        self.assertEqual(
+            structure.folding_ranges,
+            [
+                FoldingRange(0, 1, "comment"),
+                FoldingRange(2, 8, "region"),
+                FoldingRange(3, 7, "region"),
+                FoldingRange(4, 6, "region"),
+            ],
+        )
+
+    def test_brackets(self) -> None:
+        """
+        Test that brackets are matched in both directions and unmatched ones are reported
+        """
+        _, structure = get_structure(SOURCE + "f(a[1)];")
+
+        opening = SOURCE.index("(var")
+        self.assertEqual(structure.brackets[opening], SOURCE.index(") {"))
+        self.assertEqual(structure.brackets[SOURCE.index(") {")], opening)
+        self.assertEqual(structure.unmatched_brackets, [len(SOURCE) + 1, len(SOURCE) + 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
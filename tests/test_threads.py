@@ -0,0 +1,65 @@
+"""
+Test suite for lexing from several threads
+"""
+import os
+import threading
+import unittest
+
+import temporary_cache  # noqa: F401
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.batch import lex_files_threaded, read_script
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+OTHER_D_PATH = os.path.join(TESTS_DIR_PATH, "other.d")
+
+
+class ThreadsTest(unittest.TestCase):
+    """
+    Threads TestCase Class
+    """
+
+    def test_lex_files_threaded(self) -> None:
+        """
+        Test that the scripts lexed on a thread pool equal the ones lexed sequentially, in path order
+        """
+        paths = [MISC_D_PATH, OTHER_D_PATH] * 8
+        results = list(lex_files_threaded(paths, threads=4, options={"game": "g2a"}))
+
+        self.assertEqual([path for path, _ in results], paths)
+        lexer = DaedalusLexer(game="g2a")
+        for path, tokens in results:
+            self.assertEqual(tokens, list(lexer.get_tokens(read_script(path))))
+
+    def test_concurrent_first_instantiation(self) -> None:
+        """
+        Test that a lexer class compiled by threads instantiating it at once lexes like the original class
+        """
+
+        class FreshLexer(DaedalusLexer):
+            pass
+
+        barrier = threading.Barrier(8)
+        lexers = []
+
+        def instantiate() -> None:
+            barrier.wait()
+            lexers.append(FreshLexer())
+
+        threads = [threading.Thread(target=instantiate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        text = read_script(MISC_D_PATH)
+        expected = list(DaedalusLexer().get_tokens(text))
+        self.assertEqual(len(lexers), 8)
+        for lexer in lexers:
+            self.assertIs(lexer._tokens, FreshLexer._tokens)
+            self.assertEqual(list(lexer.get_tokens(text)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Test suite for reading scripts from VDF volumes
+"""
+import os
+import tempfile
+import unittest
+
+from gothic_lexer import DaedalusLexer
+from gothic_lexer.vdf import Volume, VolumeError, lex_volume, write_volume
+
+TESTS_DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+MISC_D_PATH = os.path.join(TESTS_DIR_PATH, "misc.d")
+OTHER_D_PATH = os.path.join(TESTS_DIR_PATH, "other.d")
+
+
+class VdfTest(unittest.TestCase):
+    """
+    Vdf TestCase Class
+    """
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "Test.mod")
+        with open(MISC_D_PATH, "rb") as file:
+            self.misc = file.read()
+        with open(OTHER_D_PATH, "rb") as file:
+            self.other = file.read()
+        self.files = {
+            "_WORK/DATA/SCRIPTS/CONTENT/GOTHIC.SRC": b"STORY\\*.D\r\n",
+            "_WORK/DATA/SCRIPTS/CONTENT/STORY/MISC.D": self.misc,
+            "_WORK/DATA/SCRIPTS/CONTENT/STORY/OTHER.D": self.other,
+            "_WORK/DATA/SCRIPTS/CONTENT/STORY/UMLAUT.D": 'const string s = "Äöü";'.encode("cp1252"),
+            "_WORK/DATA/TEXTURES/_COMPILED/A-C.TEX": b"\0" * 10,
+            "README.TXT": b"",
+        }
+        write_volume(self.path, self.files, comment="test volume")
+
+    def test_read(self) -> None:
+        """
+        Test that every file of a written volume is read back, looked up case-insensitively
+        """
+        with Volume(self.path) as volume:
+            self.assertEqual(len(volume), len(self.files))
+            for name, data in self.files.items():
+                self.assertEqual(volume.read(name), data)
+            self.assertIn("_work\\data\\scripts\\content\\story\\misc.d", volume)
+            self.assertEqual(volume.read_text("_Work/Data/Scripts/Content/Story/Umlaut.d"), 'const string s = "Äöü";')
+            self.assertEqual(
+                [entry.name for entry in volume.scripts()],
+                [
+                    "_WORK/DATA/SCRIPTS/CONTENT/GOTHIC.SRC",
+                    "_WORK/DATA/SCRIPTS/CONTENT/STORY/MISC.D",
+                    "_WORK/DATA/SCRIPTS/CONTENT/STORY/OTHER.D",
+                    "_WORK/DATA/SCRIPTS/CONTENT/STORY/UMLAUT.D",
+                ],
+            )
+            self.assertEqual(len(volume.find("_work/data/*/*.tex")), 1)
+
+    def test_lex_volume(self) -> None:
+        """
+        Test that the scripts lexed from a volume on a pool equal the ones lexed from the files, in name order
+        """
+        names = ["_WORK/DATA/SCRIPTS/CONTENT/STORY/OTHER.D", "_WORK/DATA/SCRIPTS/CONTENT/STORY/MISC.D"]
+        results = list(lex_volume(self.path, names, jobs=2))
+
+        self.assertEqual([name for name, _ in results], names)
+        self.assertEqual(results[0][1], list(DaedalusLexer().get_tokens(self.other.decode("cp1252"))))
+        self.assertEqual(results[1][1], list(DaedalusLexer().get_tokens(self.misc.decode("cp1252"))))
+        self.assertEqual(len(list(lex_volume(self.path, jobs=1))), 4)
+
+    def test_invalid(self) -> None:
+        """
+        Test that files that aren't volumes and broken directory tables are rejected
+        """
+        for data in (b"", b"PSVDSC_V2.00\r\n\r\n", b"\0" * 400):
+            with open(self.path, "wb") as file:
+                file.write(data)
+            with self.assertRaises(VolumeError):
+                Volume(self.path)
+
+        write_volume(self.path, {"A/B.D": b""})
+        with open(self.path, "r+b") as file:
+            # point the root directory at itself
+            file.seek(296 + 64)
+            file.write(b"\0\0\0\0")
+        with self.assertRaises(VolumeError):
+            Volume(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Test suite for the watch mode
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+from pygments.token import Token
+
+from gothic_lexer.index import IdentifierIndex
+from gothic_lexer.watch import Watcher
+
+
+class WatchTest(unittest.TestCase):
+    """
+    Watch TestCase Class
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.scripts = os.path.join(self.directory.name, "scripts")
+        os.makedirs(self.scripts)
+        self.cache = os.path.join(self.directory.name, "cache")
+        self.index_path = os.path.join(self.directory.name, "scripts.idx")
+        self.write("a.d", "func void A() {};")
+        self.write("b.d", "func void B() { A(); };")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.scripts, name)
+        with open(path, "w", encoding="utf8") as file:
+            file.write(content)
+        return path
+
+    def test_poll_and_update(self) -> None:
+        """
+        Test that only changed files are re-lexed and the cache and the index are updated in place
+        """
+        watcher = Watcher(self.scripts, self.cache, self.index_path, jobs=1)
+        changed, removed = watcher.poll()
+        self.assertEqual(len(changed), 2)
+        watcher.update(changed, removed)
+        self.assertEqual(watcher.poll(), (set(), set()))
+
+        path = self.write("b.d", "func void B() { C(); };")
+        os.utime(path, (0, 1))
+        os.remove(os.path.join(self.scripts, "a.d"))
+        changed, removed = watcher.poll()
+        self.assertEqual(changed, {path})
+        watcher.update(changed, removed)
+
+        self.assertIn((Token.Name, "C"), [(token, value) for _, token, value in watcher.tokens(path)])
+        index = IdentifierIndex.load(self.index_path)
+        self.assertEqual(index.find("a"), [])
+        self.assertEqual(len(index.usages("c")), 1)
+
+    def test_restart_uses_cache(self) -> None:
+        """
+        Test that a new watcher only re-lexes the files changed while it wasn't running
+        """
+        watcher = Watcher(self.scripts, self.cache, self.index_path, jobs=1)
+        watcher.update(*watcher.poll())
+
+        self.assertEqual(Watcher(self.scripts, self.cache, self.index_path).poll(), (set(), set()))
+
+    def test_run_coalesces_changes(self) -> None:
+        """
+        Test that the changes found by the polling loop are applied in a single update
+        """
+        watcher = Watcher(self.scripts, self.cache, interval=0.01, settle=0.05, jobs=1)
+        updates = []
+        stop = threading.Event()
+
+        def on_update(changed, removed):
+            updates.append((changed, removed))
+            stop.set()
+
+        watcher.run(stop.is_set, on_update)
+
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(len(updates[0][0]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()